@@ -1,28 +1,308 @@
-from models import Project
-from datetime import date
+"""
+Incremental project anomaly detector.
 
+Har project ka running state `project_anomaly_state` me rehta hai:
+negative feedback count, contractor updates ka total spend aur spend
+velocity (₹/day). `AnomalyEngine.run` sirf pichle run ke baad aaye naye
+feedback / contractor updates (id cursor se) aur edit hue (dirty) projects
+ko dobara score karta hai — full rescan nahi. "Delayed" / "Projected
+overrun" aaj ki date par bhi tikte hain, isliye adhoore projects jinka
+score STALE_AFTER se purana hai wo bhi har run me dobara score hote hain
+(bina naye write ke planned end paar ho jaye to bhi flag aata hai).
+
+State par deltas jodte hain, isliye ek hi cursor range do baar apply nahi
+honi chahiye: process ke andar runs ek lock se serialize hote hain, aur
+cursor conditional UPDATE (`WHERE last_id = :old`) se claim hota hai —
+doosre process ne beech me wahi range le li to yeh run rollback ho jaata hai.
+
+Planned end date `start_year` + `duration_months` se nikalti hai (model
+me planned/actual end date columns nahi hain).
+
+Cron / scheduler se:  python -m ai.anomaly  (backend/ folder se)
+"""
+import threading
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import func, case, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import Project, Feedback, ContractorUpdate, ProjectAnomalyState, AnomalyCursor
+
+NEGATIVE_RATING = 2          # rating <= 2 negative feedback hai
+OVERRUN_TOLERANCE = 1.1      # projected spend budget se 10% upar -> flag
+SOURCES = ("feedbacks", "contractor_updates")
+STALE_AFTER = timedelta(days=1)   # date-based rules ke liye adhoore projects isse purane score nahi rakhte
+
+
+def planned_start_date(project: Project):
+    if not project.start_year:
+        return None
+    return date(project.start_year, 1, 1)
 
-def compute_risk_score(project: Project, negative_feedback_count: int) -> float:
-    """
-    Simple risk score between 0 and 1
-    You can later replace this with ML model.
-    """
-    score = 0.0
+
+def planned_end_date(project: Project):
+    """start_year ki 1 January + duration_months; data na ho to None."""
+    if not project.start_year or project.duration_months is None:
+        return None
+    months = project.duration_months
+    return date(project.start_year + months // 12, 1 + months % 12, 1)
+
+
+def risk_components(
+    project: Project,
+    negative_feedback_count: int,
+    today: date = None,
+    actual_end_date: date = None,
+    spend_velocity: float = 0.0,
+):
+    """[(weight, reason)] — compute_risk_score inka sum hai."""
+    parts = []
+    today = today or date.today()
+    budget, spent = project.budget or 0, project.spent or 0
+    planned_end = planned_end_date(project)
+    completed = (project.status or "").lower() == "completed"
 
     # Overspending
-    if project.spent > project.budget:
-        score += 0.4
+    if spent > budget:
+        parts.append((0.4, "Overspent"))
 
-    # Delayed completion
-    today = date.today()
-    end_date = project.actual_end_date or today
-    if end_date > project.planned_end_date:
-        score += 0.3
+    # Delayed completion — completed project ki end date = last update
+    end_date = actual_end_date if completed else today
+    if planned_end and end_date and end_date > planned_end:
+        parts.append((0.3, "Delayed"))
+
+    # Spend velocity — isi raftaar se planned end tak budget paar ho jayega
+    if not completed and spent <= budget and spend_velocity and planned_end:
+        remaining_days = max((planned_end - today).days, 0)
+        if spent + spend_velocity * remaining_days > budget * OVERRUN_TOLERANCE:
+            parts.append((0.2, "Projected overrun"))
 
     # Multiple negative feedback (rating <= 2)
     if negative_feedback_count >= 3:
-        score += 0.3
+        parts.append((0.3, f"{negative_feedback_count} negative feedback"))
     elif negative_feedback_count > 0:
-        score += 0.15
+        parts.append((0.15, f"{negative_feedback_count} negative feedback"))
+
+    return parts
+
+
+def compute_risk_score(project: Project, negative_feedback_count: int, **kwargs) -> float:
+    """
+    Simple risk score between 0 and 1
+    You can later replace this with ML model.
+    """
+    return min(sum(w for w, _ in risk_components(project, negative_feedback_count, **kwargs)), 1.0)
+
+
+def spend_velocity(project: Project, state: ProjectAnomalyState):
+    """Updates ka total spend / project start (ya pehle update) se last update tak ke din."""
+    if not state.update_count or not state.last_update_at:
+        return 0.0
+    start = planned_start_date(project) or (state.first_update_at and state.first_update_at.date())
+    if start is None:
+        return 0.0
+    days = max((state.last_update_at.date() - start).days, 1)
+    return (state.update_spent or 0) / days
+
+
+class AnomalyEngine:
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def mark_dirty(self, db: Session, project_ids):
+        """Project edit (budget / status / dates) ke baad — agle run me dobara score."""
+        ids = [p for p in set(project_ids) if p]
+        if ids:
+            db.query(ProjectAnomalyState).filter(ProjectAnomalyState.project_id.in_(ids)) \
+                .update({ProjectAnomalyState.dirty: 1}, synchronize_session=False)
+            db.commit()
+
+    def _cursors(self, db: Session):
+        """source -> last_id; pehle run par cursor rows bana kar commit."""
+        rows = {c.source: c.last_id or 0 for c in db.query(AnomalyCursor).all()}
+        missing = [source for source in SOURCES if source not in rows]
+        if missing:
+            db.add_all(AnomalyCursor(source=source, last_id=0) for source in missing)
+            try:
+                db.commit()
+            except IntegrityError:   # doosre process ne abhi banayi
+                db.rollback()
+            rows = {c.source: c.last_id or 0 for c in db.query(AnomalyCursor).all()}
+        return rows
+
+    @staticmethod
+    def _claim(db: Session, source, old_id, new_id) -> bool:
+        """Cursor old -> new, sirf tab jab abhi bhi old ho (row lock commit tak)."""
+        result = db.execute(
+            update(AnomalyCursor)
+            .where(AnomalyCursor.source == source, AnomalyCursor.last_id == old_id)
+            .values(last_id=new_id)
+        )
+        return result.rowcount == 1
+
+    @staticmethod
+    def _feedback_counts(db: Session, after_id, upto_id, project_ids=None):
+        query = (
+            db.query(
+                Feedback.project_id,
+                func.sum(case((Feedback.rating <= NEGATIVE_RATING, 1), else_=0)),
+            )
+            .filter(Feedback.id > after_id, Feedback.id <= upto_id)
+            .group_by(Feedback.project_id)
+        )
+        if project_ids is not None:
+            query = query.filter(Feedback.project_id.in_(project_ids))
+        return {pid: int(n or 0) for pid, n in query.all()}
+
+    @staticmethod
+    def _update_totals(db: Session, after_id, upto_id, project_ids=None):
+        query = (
+            db.query(
+                ContractorUpdate.project_id,
+                func.count(ContractorUpdate.id),
+                func.coalesce(func.sum(ContractorUpdate.amount_spent), 0),
+                func.min(ContractorUpdate.submitted_at),
+                func.max(ContractorUpdate.submitted_at),
+            )
+            .filter(ContractorUpdate.id > after_id, ContractorUpdate.id <= upto_id)
+            .group_by(ContractorUpdate.project_id)
+        )
+        if project_ids is not None:
+            query = query.filter(ContractorUpdate.project_id.in_(project_ids))
+        return {pid: (n, spent, first, last) for pid, n, spent, first, last in query.all()}
+
+    def run(self, db: Session, today: date = None):
+        """Naye feedback / updates, dirty, bina state wale aur stale adhoore projects hi score hote hain."""
+        with self._lock:
+            return self._run(db, today)
+
+    def _run(self, db: Session, today: date = None):
+        # Run ki ghadi — `today` diya ho (tests / backfill) to wahi din
+        now = datetime.now() if today is None else datetime.combine(today, time())
+        cursors = self._cursors(db)
+        fb_from, up_from = cursors["feedbacks"], cursors["contractor_updates"]
+        # Snapshot — run ke dauraan aaye rows agle run me
+        fb_to = db.query(func.coalesce(func.max(Feedback.id), 0)).scalar()
+        up_to = db.query(func.coalesce(func.max(ContractorUpdate.id), 0)).scalar()
+
+        # Range pehle claim — doosra process isi range par ho to yahan rukta hai,
+        # uske commit ke baad last_id badla milta hai aur yeh run kuch nahi likhta
+        if not (self._claim(db, "feedbacks", fb_from, fb_to)
+                and self._claim(db, "contractor_updates", up_from, up_to)):
+            db.rollback()
+            return {"recomputed": 0, "new_projects": 0, "flagged": 0, "skipped": True}
+
+        feedback = self._feedback_counts(db, fb_from, fb_to)
+        updates = self._update_totals(db, up_from, up_to)
+
+        states = {s.project_id: s for s in db.query(ProjectAnomalyState).filter(
+            (ProjectAnomalyState.dirty == 1)
+            | ProjectAnomalyState.project_id.in_((set(feedback) | set(updates)) - {None})
+        )}
+        # Time sweep: adhoore projects ka purana score (date rules aaj par nirbhar)
+        stale = (
+            db.query(ProjectAnomalyState)
+            .join(Project, Project.id == ProjectAnomalyState.project_id)
+            .filter(func.lower(func.coalesce(Project.status, "")) != "completed")
+            .filter((ProjectAnomalyState.computed_at == None)
+                    | (ProjectAnomalyState.computed_at < now - STALE_AFTER))
+        )
+        for state in stale:
+            states.setdefault(state.project_id, state)
+        missing = {
+            pid for (pid,) in db.query(Project.id)
+            .outerjoin(ProjectAnomalyState, ProjectAnomalyState.project_id == Project.id)
+            .filter(ProjectAnomalyState.project_id == None)
+        }
+
+        # Naye projects ka state poori history se (snapshot tak), baaki par sirf delta
+        if missing:
+            full_feedback = self._feedback_counts(db, 0, fb_to, list(missing))
+            full_updates = self._update_totals(db, 0, up_to, list(missing))
+            for pid in missing:
+                states[pid] = ProjectAnomalyState(
+                    project_id=pid, negative_feedback=0, update_count=0, update_spent=0,
+                )
+                db.add(states[pid])
+                self._apply(states[pid], full_feedback.get(pid), full_updates.get(pid))
+        for pid, state in states.items():
+            if pid not in missing:
+                self._apply(state, feedback.get(pid), updates.get(pid))
+
+        projects = {p.id: p for p in db.query(Project).filter(Project.id.in_(list(states)))}
+        flagged = 0
+        for pid, state in states.items():
+            project = projects.get(pid)
+            if project is None:  # project delete ho chuka
+                db.delete(state)
+                continue
+            state.spend_velocity = spend_velocity(project, state)
+            parts = risk_components(
+                project,
+                state.negative_feedback,
+                today=today,
+                actual_end_date=state.last_update_at.date() if state.last_update_at else None,
+                spend_velocity=state.spend_velocity,
+            )
+            state.score = min(sum(w for w, _ in parts), 1.0)
+            state.flags = ", ".join(reason for _, reason in parts) or None
+            state.dirty = 0
+            state.computed_at = now
+            flagged += bool(parts)
+
+        db.commit()
+        return {"recomputed": len(projects), "new_projects": len(missing), "flagged": flagged}
+
+    @staticmethod
+    def _apply(state: ProjectAnomalyState, negative, update):
+        if negative:
+            state.negative_feedback = (state.negative_feedback or 0) + negative
+        if update:
+            n, spent, first, last = update
+            state.update_count = (state.update_count or 0) + n
+            state.update_spent = (state.update_spent or 0) + (spent or 0)
+            if first and (state.first_update_at is None or first < state.first_update_at):
+                state.first_update_at = first
+            if last and (state.last_update_at is None or last > state.last_update_at):
+                state.last_update_at = last
+
+    def get(self, db: Session, project_id: int):
+        state = db.query(ProjectAnomalyState).get(project_id)
+        if state is None:
+            return None
+        return {
+            "project_id": state.project_id,
+            "score": state.score,
+            "flags": state.flags.split(", ") if state.flags else [],
+            "negative_feedback": state.negative_feedback,
+            "update_count": state.update_count,
+            "update_spent": state.update_spent,
+            "spend_velocity": round(state.spend_velocity or 0, 2),
+            "stale": bool(state.dirty),
+            "computed_at": state.computed_at.strftime("%Y-%m-%d %H:%M:%S") if state.computed_at else None,
+        }
+
+    def flagged(self, db: Session, min_score: float = 0.3, limit: int = 50):
+        rows = (
+            db.query(ProjectAnomalyState.project_id)
+            .filter(ProjectAnomalyState.score >= min_score)
+            .order_by(ProjectAnomalyState.score.desc(), ProjectAnomalyState.project_id)
+            .limit(limit)
+            .all()
+        )
+        return [self.get(db, pid) for (pid,) in rows]
+
+
+# Singleton
+anomaly_engine = AnomalyEngine()
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
 
-    return min(score, 1.0)
+    _db = SessionLocal()
+    try:
+        print(f"[Anomaly] {anomaly_engine.run(_db)}")
+    finally:
+        _db.close()
@@ -0,0 +1,79 @@
+"""
+Async engine / session — hot read endpoints ke liye.
+
+Sync `get_db` wale handlers FastAPI ke threadpool me chalte hain, isliye
+ek saath utne hi requests DB par ho sakte hain jitne threads. Async
+handlers event loop par rehte hain; DB wait ke dauraan loop doosre
+requests leta hai.
+
+URL `DATABASE_URL` se hi banta hai (sqlite -> sqlite+aiosqlite,
+postgresql -> postgresql+asyncpg); `ASYNC_DATABASE_URL` se override.
+SQLite par wahi pragma profile (WAL, busy_timeout, ...) lagta hai.
+In-memory SQLite yahan nahi chalta — aiosqlite ka connection sync engine
+wala memory DB nahi dekh sakta (async reads khali DB padhte), isliye
+startup par hi saaf error.
+
+Scripts (seed_locations.py, check_db.py, migrations) aur write paths sync
+`database.py` hi use karte hain.
+"""
+import os
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from database import (
+    SQLALCHEMY_DATABASE_URL, POOL_SIZE, MAX_OVERFLOW, POOL_TIMEOUT, POOL_RECYCLE,
+    is_memory_sqlite, sqlite_connect_args, install_sqlite_pragmas,
+)
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def async_url(database_url: str = SQLALCHEMY_DATABASE_URL):
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    return url.set(drivername=driver) if driver else url
+
+
+ASYNC_DATABASE_URL = os.environ.get("ASYNC_DATABASE_URL") or async_url()
+
+
+def make_async_engine(database_url=ASYNC_DATABASE_URL):
+    url = make_url(database_url)
+
+    if url.get_backend_name() != "sqlite":
+        return create_async_engine(
+            url,
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            pool_timeout=POOL_TIMEOUT,
+            pool_recycle=POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+
+    if is_memory_sqlite(url):
+        raise RuntimeError(
+            "In-memory SQLite can't back the async engine: it would open its own empty database, "
+            "separate from the sync engine's. Point DATABASE_URL at a file, e.g. sqlite:///./panchayat.db"
+        )
+    engine = create_async_engine(
+        url,
+        connect_args=sqlite_connect_args(),
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+    )
+    install_sqlite_pragmas(engine.sync_engine, url)
+    return engine
+
+
+async_engine = make_async_engine()
+
+# expire_on_commit=False — commit ke baad attribute access par implicit (await-less) IO na ho
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
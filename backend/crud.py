@@ -1,6 +1,10 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func, case, or_, and_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import State, District, Block, Village, Project, Contractor, Feedback, ContractorUpdate
 import schemas
+from services import rollup_service, contractor_performance
+from ai.anomaly import anomaly_engine
 
 
 # ----------------------------
@@ -25,15 +29,31 @@ def get_villages_by_block(db: Session, block_id: int):
 # ----------------------------
 # PROJECT QUERIES
 # ----------------------------
-def get_projects_by_village(db: Session, village_id: int):
+# ProjectResponse nested village -> block -> district -> state bhi serialize
+# karta hai; eager load na ho to har project par 4 lazy queries (aur async
+# session me lazy load hota hi nahi)
+PROJECT_RESPONSE_LOADERS = (
+    selectinload(Project.village).selectinload(Village.block)
+    .selectinload(Block.district).selectinload(District.state),
+)
+
+
+def _projects_by_village_stmt(village_id: int):
     return (
-        db.query(Project)
+        select(Project)
         .filter(Project.village_id == village_id)
-        .outerjoin(Project.contractor)   # IMPORTANT JOIN
-        .all()
+        .options(*PROJECT_RESPONSE_LOADERS)   # contractor model me lazy="joined" hai
     )
 
 
+def get_projects_by_village(db: Session, village_id: int):
+    return db.scalars(_projects_by_village_stmt(village_id)).all()
+
+
+async def get_projects_by_village_async(db: AsyncSession, village_id: int):
+    return (await db.scalars(_projects_by_village_stmt(village_id))).all()
+
+
 def get_project(db: Session, project_id: int):
     return (
         db.query(Project)
@@ -47,6 +67,7 @@ def create_project(db: Session, payload: schemas.ProjectCreate):
     # Fix: Convert Pydantic model to SQLAlchemy model
     db_project = Project(**payload.dict()) 
     db.add(db_project)
+    rollup_service.refresh_villages(db, [db_project.village_id])
     db.commit()
     db.refresh(db_project)
     return db_project
@@ -54,9 +75,13 @@ def create_project(db: Session, payload: schemas.ProjectCreate):
 
 def update_project(db: Session, project_id: int, data: dict):
     project = db.query(Project).get(project_id)
+    old_village_id, old_contractor_id = project.village_id, project.contractor_id
     for k, v in data.items():
         setattr(project, k, v)
+    rollup_service.refresh_villages(db, [old_village_id, project.village_id])
     db.commit()
+    contractor_performance.refresh_contractors(db, [old_contractor_id, project.contractor_id])
+    anomaly_engine.mark_dirty(db, [project_id])
     db.refresh(project)
     return project
 
@@ -64,8 +89,12 @@ def update_project(db: Session, project_id: int, data: dict):
 def delete_project(db: Session, project_id: int):
     project = db.query(Project).get(project_id)
     if project:
+        village_id, contractor_id = project.village_id, project.contractor_id
         db.delete(project)
+        rollup_service.refresh_villages(db, [village_id])
         db.commit()
+        contractor_performance.refresh_contractors(db, [contractor_id])
+        anomaly_engine.mark_dirty(db, [project_id])  # agla run state hata dega
     return {"deleted": True}
 
 
@@ -74,7 +103,10 @@ def delete_project(db: Session, project_id: int):
 # ----------------------------
 def add_feedback(db: Session, feedback: Feedback):
     db.add(feedback)
+    village_id = db.query(Project.village_id).filter(Project.id == feedback.project_id).scalar()
+    rollup_service.refresh_villages(db, [village_id])
     db.commit()
+    contractor_performance.refresh_projects(db, [feedback.project_id])
     db.refresh(feedback)
     return feedback
 
@@ -83,17 +115,23 @@ def list_feedback(db: Session, project_id: int):
     return db.query(Feedback).filter(Feedback.project_id == project_id).all()
 
 
-def list_problematic_feedback(db: Session, village_id: int):
-    from sqlalchemy import or_
+def _problematic_feedback_stmt(village_id: int):
     return (
-        db.query(Feedback, Project)
+        select(Feedback, Project)
         .join(Project, Feedback.project_id == Project.id)
         .filter(Project.village_id == village_id)
         .filter(or_(Feedback.rating <= 3, Feedback.is_flagged == 1))
-        .all()
     )
 
 
+def list_problematic_feedback(db: Session, village_id: int):
+    return db.execute(_problematic_feedback_stmt(village_id)).all()
+
+
+async def list_problematic_feedback_async(db: AsyncSession, village_id: int):
+    return (await db.execute(_problematic_feedback_stmt(village_id))).all()
+
+
 # ----------------------------
 # DASHBOARD SUMMARY
 # ----------------------------
@@ -104,84 +142,79 @@ def get_officer_dashboard_stats(
     block_id: int = None, 
     village_id: int = None
 ):
-    # Base query for Projects
-    p_query = db.query(Project).join(Village).join(Block).join(District)
+    return rollup_service.get_rollup(db, *_rollup_key(state_id, district_id, block_id, village_id))
 
-    if village_id:
-        p_query = p_query.filter(Project.village_id == village_id)
-    elif block_id:
-        p_query = p_query.filter(Village.block_id == block_id)
-    elif district_id:
-        p_query = p_query.filter(Block.district_id == district_id)
-    elif state_id:
-        p_query = p_query.filter(District.state_id == state_id)
 
-    total_projects = p_query.count()
-    completed_projects = p_query.filter(Project.status.ilike("completed")).count()
+async def get_officer_dashboard_stats_async(
+    db: AsyncSession,
+    state_id: int = None,
+    district_id: int = None,
+    block_id: int = None,
+    village_id: int = None
+):
+    # rollup service sync hai (ensure_rollups rebuild bhi kar sakta hai) — usi connection par run_sync
+    key = _rollup_key(state_id, district_id, block_id, village_id)
+    return await db.run_sync(lambda session: rollup_service.get_rollup(session, *key))
 
-    # Base query for Feedback (Complaints)
-    # Join path: Feedback -> Project -> Village -> Block -> District -> State
-    f_query = db.query(Feedback).join(Project).join(Village).join(Block).join(District)
 
+def _rollup_key(state_id=None, district_id=None, block_id=None, village_id=None):
+    # Pre-aggregated rollup row — multi-join scan ki jagah ek PK lookup
     if village_id:
-        f_query = f_query.filter(Project.village_id == village_id)
-    elif block_id:
-        f_query = f_query.filter(Village.block_id == block_id)
-    elif district_id:
-        f_query = f_query.filter(Block.district_id == district_id)
-    elif state_id:
-        f_query = f_query.filter(District.state_id == state_id)
-    
-    from sqlalchemy import or_
-    complaints = f_query.filter(
-        or_(
-            Feedback.rating <= 3, 
-            Feedback.is_flagged == 1
-        )
-    ).count()
-
-    return {
-        "total_projects": total_projects,
-        "completed_projects": completed_projects,
-        "complaints": complaints
-    }
+        return ("village", village_id)
+    if block_id:
+        return ("block", block_id)
+    if district_id:
+        return ("district", district_id)
+    if state_id:
+        return ("state", state_id)
+    return rollup_service.ALL_LEVEL
 
-from sqlalchemy.orm import Session
-from models import Project, Feedback
 
+def _village_summary_stmt(village_id: int):
+    status = func.lower(Project.status)
 
-def get_village_dashboard(db: Session, village_id: int):
-    projects = db.query(Project).filter(Project.village_id == village_id).all()
+    def status_count(value):
+        return func.coalesce(func.sum(case((status == value, 1), else_=0)), 0)
 
-    feedback_count = (
-        db.query(Feedback)
+    complaints = (
+        select(func.count(Feedback.id))
         .join(Project)
         .filter(Project.village_id == village_id, Feedback.rating <= 3)
-        .count()
+        .scalar_subquery()
+    )
+
+    # Ek hi grouped aggregate — saare headline numbers SQL me
+    return (
+        select(
+            func.count(Project.id),
+            status_count("completed"),
+            status_count("ongoing"),
+            status_count("delayed"),
+            func.coalesce(func.sum(Project.budget), 0),
+            func.coalesce(func.sum(Project.spent), 0),
+            func.avg(Project.progress_percent),
+            complaints,
+        )
+        .filter(Project.village_id == village_id)
     )
 
-    if not projects:
-        return {
-            "total_projects": 0,
-            "completed_projects": 0,
-            "ongoing_projects": 0,
-            "delayed_projects": 0,
-            "total_budget": 0,
-            "total_spent": 0,
-            "avg_progress": 0,
-            "complaints": feedback_count,
-            "project_list": []
-        }
-
-    total = len(projects)
-    completed = len([p for p in projects if p.status.lower() == "completed"])
-    ongoing = len([p for p in projects if p.status.lower() == "ongoing"])
-    delayed = len([p for p in projects if p.status.lower() == "delayed"])
-
-    total_budget = sum(p.budget for p in projects)
-    total_spent = sum(p.spent for p in projects)
-    avg_progress = round(sum(p.progress_percent for p in projects) / total, 1)
 
+def _village_projects_stmt(village_id: int, limit: int = None, offset: int = 0):
+    stmt = (
+        select(Project)
+        .filter(Project.village_id == village_id)
+        .options(*PROJECT_RESPONSE_LOADERS)
+        .order_by(Project.id)
+        .offset(offset)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def _village_dashboard(summary, project_list):
+    (total, completed, ongoing, delayed,
+     total_budget, total_spent, avg_progress, feedback_count) = summary
     return {
         "total_projects": total,
         "completed_projects": completed,
@@ -189,12 +222,40 @@ def get_village_dashboard(db: Session, village_id: int):
         "delayed_projects": delayed,
         "total_budget": total_budget,
         "total_spent": total_spent,
-        "avg_progress": avg_progress,
+        "avg_progress": round(avg_progress or 0, 1),
         "complaints": feedback_count,
-        "project_list": projects
+        "project_list": project_list
     }
 
 
+def get_village_dashboard(
+    db: Session,
+    village_id: int,
+    include_projects: bool = True,
+    limit: int = None,
+    offset: int = 0,
+):
+    summary = db.execute(_village_summary_stmt(village_id)).one()
+    project_list = None
+    if include_projects:
+        project_list = db.scalars(_village_projects_stmt(village_id, limit, offset)).all()
+    return _village_dashboard(summary, project_list)
+
+
+async def get_village_dashboard_async(
+    db: AsyncSession,
+    village_id: int,
+    include_projects: bool = True,
+    limit: int = None,
+    offset: int = 0,
+):
+    summary = (await db.execute(_village_summary_stmt(village_id))).one()
+    project_list = None
+    if include_projects:
+        project_list = (await db.scalars(_village_projects_stmt(village_id, limit, offset))).all()
+    return _village_dashboard(summary, project_list)
+
+
 # ----------------------------
 # CONTRACTOR UPDATES
 # ----------------------------
@@ -205,14 +266,20 @@ def create_contractor_update(
     db: Session, 
     update_data: schemas.ContractorUpdateCreate, 
     bill_path: str = None, 
-    work_path: str = None
+    work_path: str = None,
+    work_phash: str = None,
+    work_flag_reason: str = None
 ):
     # 1. Create Update Record
+    now = datetime.now()
     new_update = ContractorUpdate(
         **update_data.dict(),
         bill_image_path=bill_path,
         work_image_path=work_path,
-        submission_date=datetime.now().strftime("%Y-%m-%d %H:%M")
+        work_phash=work_phash,
+        work_flag_reason=work_flag_reason,
+        submission_date=now.strftime("%Y-%m-%d %H:%M"),
+        submitted_at=now
     )
     db.add(new_update)
     
@@ -220,47 +287,222 @@ def create_contractor_update(
     project = db.query(Project).get(update_data.project_id)
     if project:
         project.spent += update_data.amount_spent
-    
+        rollup_service.refresh_villages(db, [project.village_id])
+
     db.commit()
+    if project:
+        contractor_performance.refresh_contractors(db, [new_update.contractor_id, project.contractor_id])
     db.refresh(new_update)
     return new_update
 
 
-from sqlalchemy.orm import joinedload
-
-def get_contractor_projects(db: Session, contractor_id: int):
-    return (
-        db.query(Project)
-        .filter(Project.contractor_id == contractor_id)
-        .options(
-            joinedload(Project.village)
-            .joinedload(Village.block)
-            .joinedload(Block.district)
-            .joinedload(District.state)
+# ----------------------------
+# CONTRACTOR LISTING
+# ----------------------------
+# pin kabhi bahar nahi jata
+CONTRACTOR_FIELDS = ("id", "name", "company", "phone", "performance", "is_active")
+PROJECT_FIELDS = (
+    "id", "name", "description", "village_id", "contractor_id", "budget", "spent", "status",
+    "progress_percent", "risk_score", "risk_level", "start_year", "duration_months",
+)
+
+
+def _contractor_region_filter(query, state_id=None, district_id=None, block_id=None, village_id=None):
+    """Contractors jinka kam se kam ek project is region me hai (EXISTS, rows multiply nahi hoti)."""
+    if not (state_id or district_id or block_id or village_id):
+        return query
+    region = select(Project.id).where(Project.contractor_id == Contractor.id)
+    if village_id:
+        region = region.where(Project.village_id == village_id)
+    elif block_id:
+        region = region.join(Village, Project.village_id == Village.id).where(Village.block_id == block_id)
+    elif district_id:
+        region = (
+            region.join(Village, Project.village_id == Village.id)
+            .join(Block, Village.block_id == Block.id)
+            .where(Block.district_id == district_id)
         )
-        .all()
-    )
-
+    else:
+        region = (
+            region.join(Village, Project.village_id == Village.id)
+            .join(Block, Village.block_id == Block.id)
+            .join(District, Block.district_id == District.id)
+            .where(District.state_id == state_id)
+        )
+    return query.filter(region.exists())
 
-def get_contractor_updates(db: Session, project_id: int):
-    return db.query(ContractorUpdate).filter(ContractorUpdate.project_id == project_id).order_by(ContractorUpdate.id.desc()).all()
 
-def get_all_contractor_updates(
+def list_contractors(
     db: Session,
+    fields=None,
+    sort: str = "id",
+    active_only: bool = False,
+    min_performance: float = None,
+    max_performance: float = None,
     state_id: int = None,
     district_id: int = None,
     block_id: int = None,
-    village_id: int = None
+    village_id: int = None,
+    limit: int = None,
+    after: str = None,
 ):
-    query = db.query(ContractorUpdate).join(Project).join(Village).join(Block).join(District)
+    """
+    Column projection (ORM objects hydrate nahi hote) + keyset paging.
+    sort="id" -> cursor "<id>";  sort="performance" -> best first, cursor "<performance>:<id>".
+    Returns (rows as dicts, next cursor ya None).
+    """
+    names = [f for f in (fields or CONTRACTOR_FIELDS) if f in CONTRACTOR_FIELDS]
+    if "id" not in names:
+        names.insert(0, "id")
+    performance = func.coalesce(Contractor.performance, 0)
+    query = db.query(*[getattr(Contractor, f) for f in names], performance.label("_perf"))
+
+    if active_only:
+        query = query.filter(Contractor.is_active == 1)
+    if min_performance is not None:
+        query = query.filter(performance >= min_performance)
+    if max_performance is not None:
+        query = query.filter(performance <= max_performance)
+    query = _contractor_region_filter(query, state_id, district_id, block_id, village_id)
+
+    if sort == "performance":
+        if after:
+            perf, last_id = after.split(":")
+            perf, last_id = float(perf), int(last_id)
+            query = query.filter(or_(performance < perf, and_(performance == perf, Contractor.id > last_id)))
+        query = query.order_by(performance.desc(), Contractor.id)
+    else:
+        if after:
+            query = query.filter(Contractor.id > int(after))
+        query = query.order_by(Contractor.id)
+
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows = query.all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = f"{last._perf}:{last.id}" if sort == "performance" else str(last.id)
+    return [{f: getattr(r, f) for f in names} for r in rows], next_cursor
 
+
+def get_contractor_projects(db: Session, contractor_id: int):
+    """
+    Ek flat join query — project columns + village -> state names, wahi nested
+    shape jo pehle joinedload chain se aata tha (contractor / pin ke bina).
+    """
+    rows = (
+        db.query(
+            *[getattr(Project, f) for f in PROJECT_FIELDS],
+            Village.name.label("village_name"), Village.block_id,
+            Block.name.label("block_name"), Block.district_id,
+            District.name.label("district_name"), District.state_id,
+            State.name.label("state_name"),
+        )
+        .outerjoin(Village, Project.village_id == Village.id)
+        .outerjoin(Block, Village.block_id == Block.id)
+        .outerjoin(District, Block.district_id == District.id)
+        .outerjoin(State, District.state_id == State.id)
+        .filter(Project.contractor_id == contractor_id)
+        .order_by(Project.id)
+        .all()
+    )
+    projects = []
+    for r in rows:
+        project = {f: getattr(r, f) for f in PROJECT_FIELDS}
+        project["village"] = None
+        if r.village_name is not None:
+            project["village"] = {
+                "id": r.village_id,
+                "name": r.village_name,
+                "block": {
+                    "id": r.block_id,
+                    "name": r.block_name,
+                    "district": {
+                        "id": r.district_id,
+                        "name": r.district_name,
+                        "state": {"id": r.state_id, "name": r.state_name},
+                    },
+                } if r.block_name is not None else None,
+            }
+        projects.append(project)
+    return projects
+
+
+UPDATE_PAGE_SIZE = 50
+UPDATE_FIELDS = (
+    "id", "project_id", "contractor_id", "amount_spent", "description", "bill_image_path",
+    "work_image_path", "work_flag_reason", "expected_completion_date", "submission_date", "submitted_at",
+)
+
+
+def _page_updates(query, limit: int, before: int = None):
+    """Newest first keyset page: `before` = pichle page ki aakhri update id."""
+    if before:
+        query = query.filter(ContractorUpdate.id < before)
+    query = query.order_by(ContractorUpdate.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def get_contractor_updates(db: Session, project_id: int, limit: int = None, before: int = None):
+    # (project_id, id) index se seek — offset scan nahi
+    query = db.query(ContractorUpdate).filter(ContractorUpdate.project_id == project_id)
+    return _page_updates(query, limit, before)
+
+
+def _region_updates_query(query, state_id=None, district_id=None, block_id=None, village_id=None):
+    query = query.join(Project, ContractorUpdate.project_id == Project.id)
     if village_id:
         query = query.filter(Project.village_id == village_id)
     elif block_id:
-        query = query.filter(Village.block_id == block_id)
+        query = query.join(Village, Project.village_id == Village.id).filter(Village.block_id == block_id)
     elif district_id:
-        query = query.filter(Block.district_id == district_id)
+        query = (
+            query.join(Village, Project.village_id == Village.id)
+            .join(Block, Village.block_id == Block.id)
+            .filter(Block.district_id == district_id)
+        )
     elif state_id:
-        query = query.filter(District.state_id == state_id)
+        query = (
+            query.join(Village, Project.village_id == Village.id)
+            .join(Block, Village.block_id == Block.id)
+            .join(District, Block.district_id == District.id)
+            .filter(District.state_id == state_id)
+        )
+    return query
+
+
+def get_all_contractor_updates(
+    db: Session,
+    state_id: int = None,
+    district_id: int = None,
+    block_id: int = None,
+    village_id: int = None,
+    limit: int = UPDATE_PAGE_SIZE,
+    before: int = None,
+):
+    query = _region_updates_query(db.query(ContractorUpdate), state_id, district_id, block_id, village_id)
+    return _page_updates(query, limit, before)
+
 
-    return query.order_by(ContractorUpdate.id.desc()).limit(50).all()
+def iter_contractor_updates(
+    db: Session,
+    state_id: int = None,
+    district_id: int = None,
+    block_id: int = None,
+    village_id: int = None,
+    project_id: int = None,
+    batch_size: int = 500,
+):
+    """Audit export: column rows batch-by-batch (yield_per), poora result memory me nahi."""
+    query = db.query(*[getattr(ContractorUpdate, f) for f in UPDATE_FIELDS])
+    if project_id:
+        query = query.filter(ContractorUpdate.project_id == project_id)
+    else:
+        query = _region_updates_query(query, state_id, district_id, block_id, village_id)
+    for row in query.order_by(ContractorUpdate.id).yield_per(batch_size):
+        yield dict(zip(UPDATE_FIELDS, row))
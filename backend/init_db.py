@@ -4,4 +4,7 @@ import models
 print("⏳ Creating DB Schema...")
 Base.metadata.drop_all(bind=engine)
 Base.metadata.create_all(bind=engine)
+
+from migrations import run_migrations
+run_migrations(engine)  # fresh schema ko latest version par mark karo
 print("✔ Database Schema Created Successfully!")
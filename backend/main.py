@@ -1,12 +1,42 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from database import Base, engine
+from database import Base, engine, SessionLocal
 import models  # models import zaroori hai
 from routers import locations, projects, feedback, dashboard, ai, schemes
+from services import rollup_service, contractor_performance
+from services.phash_index import phash_index
+from services.geo_index import geo_service
+from services.location_tree import location_cache
+from services.location_search import location_search
+from services.algorand_sync import sync_worker
+from services.scheme_catalogue import scheme_catalogue
+from ai.anomaly import anomaly_engine
+from services.spend_anomaly import spend_detector
+from migrations import run_migrations
 
 # ✅ IMPORTANT: yahi tables create karega agar DB khali ho
 Base.metadata.create_all(bind=engine)
+# Existing DB ke liye naye indexes / columns (create_all inhe skip karta hai)
+run_migrations(engine)
+
+# Officer dashboard rollups pehli baar build karo (already bane hain to skip)
+# + near-duplicate photo index aur spatial index memory me load karo
+_db = SessionLocal()
+try:
+    rollup_service.ensure_rollups(_db)
+    contractor_performance.ensure_performance(_db)
+    phash_index.load(_db)
+    geo_service.load(_db)
+    location_search.current(location_cache.load(_db))  # typeahead index bhi abhi bana lo
+    sync_worker.resume(_db)  # pending / failed Algorand syncs dobara queue
+    anomaly_engine.run(_db)  # sirf pichle run ke baad badle projects
+    spend_detector.load(_db)  # contractor updates par streaming spend stats
+finally:
+    _db.close()
+
+# Schemes catalogue (data/schemes.json) compile karo — galat file ho to yahin fail
+scheme_catalogue.load()
 
 app = FastAPI(
     title="Bharat Panchayat Transparency - Backend",
@@ -19,6 +49,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],   # /contractors/list ka paging cursor
 )
 
 # Routers mount
@@ -34,6 +65,21 @@ app.include_router(schemes.router)
 def root():
     return {"message": "Bharat Panchayat Transparency API OK"}
 
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    from services.sms_service import alert_dispatcher
+    alert_dispatcher.flush(timeout=5)
+    alert_dispatcher.stop()
+    sync_worker.flush(timeout=5)
+    sync_worker.stop()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    from async_database import async_engine
+    await async_engine.dispose()
+
 from fastapi.staticfiles import StaticFiles
 
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
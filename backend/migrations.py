@@ -0,0 +1,134 @@
+"""
+Lightweight schema migrations.
+
+`Base.metadata.create_all` sirf missing tables banata hai — existing
+panchayat.db me naye indexes / columns kabhi nahi aate. Har schema change
+yahan ek numbered migration ke roop me add karo; `schema_migrations` table
+yaad rakhta hai ki kaunsa version lag chuka hai.
+
+Usage:
+    python migrations.py          # pending migrations apply karo
+"""
+from datetime import datetime
+
+from sqlalchemy import inspect, text, bindparam
+
+from database import Base, engine
+import models  # noqa: F401  (metadata me saare tables register karne ke liye)
+
+
+# ----------------------------
+# HELPERS
+# ----------------------------
+def _create_missing_indexes(conn, *table_names):
+    """Model me declared indexes jo DB me nahi hain, unhe bana do."""
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    for name in table_names:
+        if name not in existing_tables:
+            continue
+        columns = {c["name"] for c in inspector.get_columns(name)}
+        for index in Base.metadata.tables[name].indexes:
+            # jis column ko baad wali migration add karegi, uska index wahi banayegi
+            if all(col.name in columns for col in index.columns):
+                index.create(bind=conn, checkfirst=True)
+
+
+def _add_column(conn, table_name: str, column_name: str, column_sql: str):
+    """ALTER TABLE ... ADD COLUMN, agar column pehle se nahi hai."""
+    columns = {c["name"] for c in inspect(conn).get_columns(table_name)}
+    if column_name not in columns:
+        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_sql}"))
+
+
+# ----------------------------
+# MIGRATIONS
+# ----------------------------
+def _m001_hot_fk_indexes(conn):
+    _create_missing_indexes(
+        conn,
+        "districts", "blocks", "villages", "projects", "feedbacks", "contractor_updates",
+    )
+
+
+def _m002_contractor_update_submitted_at(conn):
+    _add_column(conn, "contractor_updates", "submitted_at", "DATETIME")
+
+    # Purane "YYYY-MM-DD HH:MM" strings ko real datetime me backfill karo
+    rows = conn.execute(text(
+        "SELECT id, submission_date FROM contractor_updates "
+        "WHERE submitted_at IS NULL AND submission_date IS NOT NULL"
+    )).fetchall()
+    table = Base.metadata.tables["contractor_updates"]
+    params = []
+    for row_id, raw in rows:
+        try:
+            params.append({"row_id": row_id, "ts": datetime.strptime(raw, "%Y-%m-%d %H:%M")})
+        except ValueError:
+            print(f"[Migrations] Skipping unparseable submission_date on update {row_id}: {raw!r}")
+    if params:
+        conn.execute(
+            table.update().where(table.c.id == bindparam("row_id")).values(submitted_at=bindparam("ts")),
+            params,
+        )
+
+    _create_missing_indexes(conn, "contractor_updates")
+
+
+def _m003_perceptual_hashes(conn):
+    _add_column(conn, "feedbacks", "phash", "VARCHAR")
+    _add_column(conn, "contractor_updates", "work_phash", "VARCHAR")
+
+
+def _m004_rehash_feedback_photos(conn):
+    # Feedback hash ab overlay ke baad wali (saved) image ka hai — purane
+    # pre-overlay hashes hata do, phash_index.load unhe file se dobara bharega
+    conn.execute(text("UPDATE feedbacks SET phash = NULL WHERE image_path IS NOT NULL"))
+    _add_column(conn, "contractor_updates", "work_flag_reason", "VARCHAR")
+
+
+# (version, name, fn) — order matters, never renumber an applied migration
+MIGRATIONS = [
+    (1, "hot foreign key indexes", _m001_hot_fk_indexes),
+    (2, "contractor_updates.submitted_at datetime", _m002_contractor_update_submitted_at),
+    (3, "perceptual hash columns", _m003_perceptual_hashes),
+    (4, "feedback photo hashes from saved image, work photo flag", _m004_rehash_feedback_photos),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at VARCHAR NOT NULL)"
+    ))
+
+
+def applied_versions(conn):
+    _ensure_version_table(conn)
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def run_migrations(bind=engine):
+    """Pending migrations ek-ek karke apni transaction me apply karo."""
+    with bind.begin() as conn:
+        done = applied_versions(conn)
+
+    applied = []
+    for version, name, fn in MIGRATIONS:
+        if version in done:
+            continue
+        with bind.begin() as conn:
+            fn(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": version, "n": name, "t": datetime.now().strftime("%Y-%m-%d %H:%M")},
+            )
+        print(f"[Migrations] Applied {version:03d} — {name}")
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    if not run_migrations():
+        print("✔ Schema already up to date")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, Index, DateTime
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -14,7 +14,7 @@ class District(Base):
     __tablename__ = "districts"
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
-    state_id = Column(Integer, ForeignKey("states.id"))
+    state_id = Column(Integer, ForeignKey("states.id"), index=True)
     state = relationship("State", back_populates="districts")
     blocks = relationship("Block", back_populates="district")
 
@@ -23,7 +23,7 @@ class Block(Base):
     __tablename__ = "blocks"
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
-    district_id = Column(Integer, ForeignKey("districts.id"))
+    district_id = Column(Integer, ForeignKey("districts.id"), index=True)
     district = relationship("District", back_populates="blocks")
     villages = relationship("Village", back_populates="block")
 
@@ -32,7 +32,7 @@ class Village(Base):
     __tablename__ = "villages"
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
-    block_id = Column(Integer, ForeignKey("blocks.id"))
+    block_id = Column(Integer, ForeignKey("blocks.id"), index=True)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
     block = relationship("Block", back_populates="villages")
@@ -60,8 +60,8 @@ class Project(Base):
     name = Column(String, nullable=False)
     description = Column(String)
 
-    village_id = Column(Integer, ForeignKey("villages.id"))
-    contractor_id = Column(Integer, ForeignKey("contractors.id"), nullable=True)
+    village_id = Column(Integer, ForeignKey("villages.id"), index=True)
+    contractor_id = Column(Integer, ForeignKey("contractors.id"), nullable=True, index=True)
 
     budget = Column(Float, default=0)
     spent = Column(Float, default=0)
@@ -91,32 +91,135 @@ class Feedback(Base):
     comment = Column(String)
     image_path = Column(String, nullable=True)
 
-    image_hash = Column(String, nullable=True)     # For duplicate detection
+    image_hash = Column(String, nullable=True, index=True)     # For duplicate detection
+    phash = Column(String, nullable=True)          # 64-bit dHash hex, near-duplicate detection
     is_flagged = Column(Integer, default=0)        # 0=Clean, 1=Flagged (SQLite has no Boolean)
     flag_reason = Column(String, nullable=True)    # e.g. "Duplicate", "Fake"
 
     latitude = Column(Float, nullable=True)  # 🌍 Geo coordinates
     longitude = Column(Float, nullable=True)
 
-    project_id = Column(Integer, ForeignKey("projects.id"))
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)
     project = relationship("Project", back_populates="feedbacks")
 
 
 class ContractorUpdate(Base):
     __tablename__ = "contractor_updates"
+    __table_args__ = (
+        # latest update per project: WHERE project_id = ? ORDER BY id DESC
+        Index("ix_contractor_updates_project_id_id", "project_id", "id"),
+        # inactivity scan: MAX(submitted_at) GROUP BY project_id
+        Index("ix_contractor_updates_project_id_submitted_at", "project_id", "submitted_at"),
+    )
     
     id = Column(Integer, primary_key=True)
     project_id = Column(Integer, ForeignKey("projects.id"))
-    contractor_id = Column(Integer, ForeignKey("contractors.id"))
+    contractor_id = Column(Integer, ForeignKey("contractors.id"), index=True)
     
     amount_spent = Column(Float, default=0)
     description = Column(String, nullable=True)
     
     bill_image_path = Column(String, nullable=True)
     work_image_path = Column(String, nullable=True)
+    work_phash = Column(String, nullable=True)  # dHash of work photo
+    work_flag_reason = Column(String, nullable=True)  # e.g. "Near-Duplicate Photo Detected (...)"
     
     expected_completion_date = Column(String, nullable=True) # Storing as String for simplicity (YYYY-MM-DD)
     submission_date = Column(String, nullable=True) # Storing as String (YYYY-MM-DD HH:MM)
+    submitted_at = Column(DateTime, nullable=True, index=True)  # same moment, real datetime for DB-side comparisons
     
     project = relationship("Project", back_populates="updates")
     contractor = relationship("Contractor", back_populates="updates")
+
+
+class LocationRollup(Base):
+    """
+    Pre-aggregated officer dashboard numbers per location.
+    level = "all" | "state" | "district" | "block" | "village"
+    (level="all" ka location_id hamesha 0 hota hai)
+    """
+    __tablename__ = "location_rollups"
+
+    level = Column(String, primary_key=True)
+    location_id = Column(Integer, primary_key=True)
+
+    total_projects = Column(Integer, default=0)
+    completed_projects = Column(Integer, default=0)
+    complaints = Column(Integer, default=0)
+    total_budget = Column(Float, default=0)
+    total_spent = Column(Float, default=0)
+
+
+class ProjectSyncState(Base):
+    """
+    Algorand sync status per project.
+    status = "pending" | "synced" | "failed" | "skipped"
+    """
+    __tablename__ = "project_sync_state"
+
+    project_id = Column(Integer, primary_key=True)
+    status = Column(String, default="pending", index=True)
+    is_registered = Column(Integer, default=0)   # 1 = on-chain box ban chuka ("register" ho gaya)
+    last_txid = Column(String, nullable=True)
+    last_hash = Column(String, nullable=True)    # hex SHA256 jo chain par bheja gaya
+    attempts = Column(Integer, default=0)
+    last_error = Column(String, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+
+
+class ContractorPerformance(Base):
+    """
+    Materialized contractor performance components (services/contractor_performance.py).
+    Final 0-5 score Contractor.performance me bhi likha jata hai.
+    """
+    __tablename__ = "contractor_performance"
+
+    contractor_id = Column(Integer, primary_key=True)
+    updates = Column(Integer, default=0)
+    on_time_rate = Column(Float, nullable=True)     # update gaps <= 30 days ka hissa
+    efficiency = Column(Float, nullable=True)       # progress / spent ratio, 0-1
+    feedback_count = Column(Integer, default=0)
+    complaint_rate = Column(Float, nullable=True)   # rating <= 2
+    flagged_rate = Column(Float, nullable=True)     # flagged (duplicate / fake / geofence) photos
+    score = Column(Float, nullable=True)            # 0-5
+    computed_at = Column(DateTime, nullable=True)
+
+
+class ProjectAnomalyState(Base):
+    """
+    Incremental anomaly engine ka per-project running state (ai/anomaly.py).
+    dirty = 1 -> project edit hua, agle run me dobara score karo.
+    """
+    __tablename__ = "project_anomaly_state"
+
+    project_id = Column(Integer, primary_key=True)
+    negative_feedback = Column(Integer, default=0)   # rating <= 2
+    update_count = Column(Integer, default=0)
+    update_spent = Column(Float, default=0)          # ContractorUpdate.amount_spent ka sum
+    first_update_at = Column(DateTime, nullable=True)
+    last_update_at = Column(DateTime, nullable=True)
+    spend_velocity = Column(Float, default=0)        # ₹ per day
+    score = Column(Float, default=0)                 # 0-1
+    flags = Column(String, nullable=True)            # e.g. "Overspent, Delayed"
+    dirty = Column(Integer, default=0, index=True)
+    computed_at = Column(DateTime, nullable=True)
+
+
+class AnomalyCursor(Base):
+    """Har source table ki last processed id (source = "feedbacks" | "contractor_updates")."""
+    __tablename__ = "anomaly_cursors"
+
+    source = Column(String, primary_key=True)
+    last_id = Column(Integer, default=0)
+
+
+class DataVersion(Base):
+    """
+    Rarely-changing data ka version counter (name = "locations").
+    Har write (seed script / admin API) bump karta hai; in-memory caches
+    version badla dekh kar reload karte hain — doosre process ke writes bhi.
+    """
+    __tablename__ = "data_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, default=0)
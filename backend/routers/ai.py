@@ -1,10 +1,15 @@
 from fastapi import APIRouter, HTTPException
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 from database import get_db
 from models import Contractor, Project, ContractorUpdate
 from datetime import datetime, timedelta
+from services.sms_service import alert_dispatcher
+from services.risk_engine import score_projects
+from ai.anomaly import anomaly_engine
+from services.spend_anomaly import spend_detector
 
 router = APIRouter(prefix="/ai", tags=["AI Risk Prediction"])
 
@@ -61,18 +66,79 @@ def compute_risk(payload: RiskRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/risk/batch")
+def compute_risk_batch(
+    state_id: int = None,
+    district_id: int = None,
+    block_id: int = None,
+    village_id: int = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Region ke saare projects ka risk ek saath score karke Project.risk_score /
+    risk_level me likho (bina filter ke saare projects).
+    """
+    return score_projects(db, state_id, district_id, block_id, village_id)
+
+
+@router.post("/anomalies/run")
+def run_anomaly_detection(db: Session = Depends(get_db)):
+    """Sirf pichle run ke baad touch hue projects dobara score hote hain."""
+    return anomaly_engine.run(db)
+
+
+@router.get("/anomalies")
+def list_anomalies(min_score: float = 0.3, limit: int = 50, db: Session = Depends(get_db)):
+    return anomaly_engine.flagged(db, min_score, limit)
+
+
+@router.get("/anomalies/{project_id}")
+def project_anomaly(project_id: int, db: Session = Depends(get_db)):
+    state = anomaly_engine.get(db, project_id)
+    if not state:
+        raise HTTPException(status_code=404, detail="Project not scored yet")
+    return state
+
+
+@router.get("/spend-anomalies")
+def spend_anomalies(project_id: int = None, contractor_id: int = None, limit: int = 100):
+    """Flagged contractor updates (z-score / MAD outliers, spend spikes), newest first."""
+    return {
+        "flagged": spend_detector.flagged_updates(project_id, contractor_id, limit),
+        "stats": spend_detector.stats(),
+    }
+
+
+@router.get("/spend-anomalies/peers")
+def spend_peer_outliers(block_id: int = None):
+    """Contractors jinka spend pattern same block ke peers se alag hai."""
+    return spend_detector.peer_outliers(block_id)
+
+
 def analyze_fake_image(image_path: str):
     """
     Heuristic check for potential manipulation.
     """
-    from PIL import Image, ExifTags
-    import os
+    from PIL import Image
+
+    try:
+        img = Image.open(image_path)
+    except Exception as e:
+        print(f"AI Check Failed: {e}")
+        return False, None
+    return inspect_image(img)
+
+
+def inspect_image(img):
+    """
+    Same heuristics as analyze_fake_image, on an already-opened PIL image
+    (feedback pipeline image ko ek hi baar decode karti hai).
+    """
+    from PIL import ExifTags
 
     flags = []
     
     try:
-        img = Image.open(image_path)
-        
         # 1. Metadata Strip Check
         # Most modern phones leave EXIF data. AI/Edited images often strip it.
         exif_data = img._getexif()
@@ -104,71 +170,76 @@ def analyze_fake_image(image_path: str):
 
 
 
-def send_alert_sms(phone: str, message: str):
-    """
-    Simulates sending an SMS.
-    In production, this would use Twilio, SNS, or Fast2SMS.
-    """
-    if not phone:
-        return "No phone number linked."
-    
-    # SIMULATION
-    print(f"--------[SMS ALERT]--------")
-    print(f"To: {phone}")
-    print(f"Message: {message}")
-    print(f"---------------------------")
-    return "Sent"
-
-
 @router.get("/alerts")
 def check_alerts(db: Session = Depends(get_db)):
     """
     Identify contractors who haven't submitted updates for > 30 days.
     """
     alerts = []
-    
-    # Get all ongoing projects with contractors
-    projects = db.query(Project).filter(Project.contractor_id != None, Project.status == "ongoing").all()
-    
     now = datetime.now()
-    
-    for p in projects:
-        # Get last update
-        last_update = db.query(ContractorUpdate)\
-            .filter(ContractorUpdate.project_id == p.id)\
-            .order_by(ContractorUpdate.id.desc())\
-            .first()
-            
+    # delta.days > 30  <=>  last update at or before now - 31 days
+    cutoff = now - timedelta(days=31)
+
+    # Latest update per project — ek grouped query, per-project lookup nahi
+    latest = (
+        db.query(
+            ContractorUpdate.project_id.label("project_id"),
+            func.max(ContractorUpdate.submitted_at).label("last_at"),
+            func.count(ContractorUpdate.id).label("n_updates"),
+        )
+        .group_by(ContractorUpdate.project_id)
+        .subquery()
+    )
+
+    # Ongoing projects with contractors jinka last update stale hai (ya hai hi nahi)
+    stale = (
+        db.query(Project, latest.c.last_at)
+        .outerjoin(latest, latest.c.project_id == Project.id)
+        .filter(Project.contractor_id != None, Project.status == "ongoing")
+        .filter(or_(latest.c.project_id == None, latest.c.last_at <= cutoff))
+        .order_by(Project.id)
+        .all()
+    )
+
+    for p, last_at in stale:
         contractor_name = p.contractor.name if p.contractor else "Unknown"
         contractor_phone = p.contractor.phone if p.contractor else None
-        
-        # Helper to construct alert and possibly send SMS
-        def add_alert(msg, days):
-            # Send SMS
-            sms_status = send_alert_sms(contractor_phone, f"URGENT: {msg} for Project {p.name}")
-            
-            alerts.append({
-                "contractor": contractor_name,
-                "project": p.name,
-                "message": msg,
-                "days_overdue": days,
-                "sms_status": sms_status
-            })
-
-        if not last_update:
+
+        if last_at is None:
             # Check project start date if no updates... simplified logic
-            add_alert("No updates submitted yet.", "N/A")
-            continue
-
-        try:
-            # Parse date "YYYY-MM-DD HH:MM"
-            submitted_at = datetime.strptime(last_update.submission_date, "%Y-%m-%d %H:%M")
-            delta = now - submitted_at
-            
-            if delta.days > 30:
-                add_alert(f"Last update was {delta.days} days ago.", delta.days)
-
-        except:
-             pass # Date parsing error or something
-             
+            msg, days = "No updates submitted yet.", "N/A"
+        else:
+            days = (now - last_at).days
+            msg = f"Last update was {days} days ago."
+
+        # SMS background queue me jata hai — request block nahi hoti
+        dispatch = alert_dispatcher.enqueue(
+            contractor_phone,
+            f"URGENT: {msg} for Project {p.name}",
+            contractor_id=p.contractor_id,
+            project_id=p.id,
+        )
+
+        alerts.append({
+            "contractor": contractor_name,
+            "project": p.name,
+            "message": msg,
+            "days_overdue": days,
+            "sms_status": dispatch["status"],
+            "alert_id": dispatch["alert_id"]
+        })
+
     return alerts
+
+
+@router.get("/alerts/dispatch")
+def alert_dispatch_stats():
+    return alert_dispatcher.stats()
+
+
+@router.get("/alerts/dispatch/{alert_id}")
+def alert_dispatch_status(alert_id: str):
+    status = alert_dispatcher.status(alert_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return status
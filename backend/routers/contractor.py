@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, Form, UploadFile, File
+from fastapi import APIRouter, Depends, Form, UploadFile, File, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from database import get_db
+from fastapi.responses import StreamingResponse
+from database import get_db, SessionLocal
 from models import Contractor, Project
+from services import contractor_performance
 
 router = APIRouter(prefix="/contractors", tags=["Contractors"])
 
@@ -13,9 +15,81 @@ def add_contractor(name: str, company: str = "", phone: str = "", db: Session =
     db.refresh(c)
     return c
 
+def _parse_fields(fields: str = None):
+    return [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+
+LIST_LIMIT = 200
+
+
 @router.get("/list")
-def list_contractors(db: Session = Depends(get_db)):
-    return db.query(Contractor).all()
+def list_contractors(
+    response: Response,
+    limit: int = Query(LIST_LIMIT, ge=1, le=1000),
+    after: str = None,
+    sort: str = "id",
+    fields: str = None,
+    active_only: bool = False,
+    min_performance: float = None,
+    max_performance: float = None,
+    state_id: int = None,
+    district_id: int = None,
+    block_id: int = None,
+    village_id: int = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Matching contractors (plain list, pin ke bina), ek baar me `limit` tak.
+    Aur rows hon to `X-Next-Cursor` header aata hai — use `after` me bhejo
+    (/contractors/page wala hi cursor).
+    """
+    try:
+        rows, next_cursor = crud.list_contractors(
+            db, _parse_fields(fields), sort, active_only, min_performance, max_performance,
+            state_id, district_id, block_id, village_id, limit, after,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+
+@router.get("/page")
+def page_contractors(
+    limit: int = Query(50, ge=1, le=500),
+    after: str = None,
+    sort: str = "id",
+    fields: str = None,
+    active_only: bool = False,
+    min_performance: float = None,
+    max_performance: float = None,
+    state_id: int = None,
+    district_id: int = None,
+    block_id: int = None,
+    village_id: int = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Keyset pagination — `next_cursor` ko agli request me `after` bhejo.
+    sort = "id" | "performance";  fields = "name,phone,performance" (id hamesha aata hai).
+    """
+    try:
+        rows, next_cursor = crud.list_contractors(
+            db, _parse_fields(fields), sort, active_only, min_performance, max_performance,
+            state_id, district_id, block_id, village_id, limit, after,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+@router.get("/{contractor_id}/performance")
+def contractor_performance_breakdown(contractor_id: int, db: Session = Depends(get_db)):
+    row = contractor_performance.get_performance(db, contractor_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Performance not computed yet")
+    return row
 
 @router.put("/{contractor_id}/pin")
 def set_contractor_pin(contractor_id: int, pin: str = Form(...), db: Session = Depends(get_db)):
@@ -41,8 +115,10 @@ def verify_contractor_pin(
 @router.put("/assign/{project_id}")
 def assign_contractor(project_id: int, contractor_id: int, db: Session = Depends(get_db)):
     project = db.query(Project).filter(Project.id == project_id).first()
+    old_contractor_id = project.contractor_id
     project.contractor_id = contractor_id
     db.commit()
+    contractor_performance.refresh_contractors(db, [old_contractor_id, contractor_id])
     return {"message": "Assigned Successfully"}
 
 
@@ -50,10 +126,13 @@ def assign_contractor(project_id: int, contractor_id: int, db: Session = Depends
 # ---------------------
 # NEW ENDPOINTS
 # ---------------------
+import json
 import shutil
 import os
 import crud
 import schemas
+from services.phash_index import phash_index, dhash_file
+from services.spend_anomaly import spend_detector
 
 UPLOAD_DIR = "uploads"
 
@@ -81,10 +160,20 @@ def submit_update(
         with open(f"{UPLOAD_DIR}/{bill_path}", "wb") as buffer:
             shutil.copyfileobj(bill_image.file, buffer)
 
+    work_phash = None
     if work_image:
         work_path = f"work_{project_id}_{contractor_id}_{work_image.filename}"
         with open(f"{UPLOAD_DIR}/{work_path}", "wb") as buffer:
             shutil.copyfileobj(work_image.file, buffer)
+        work_phash = dhash_file(f"{UPLOAD_DIR}/{work_path}")
+
+    # Purani (feedback ya pichle update ki) photo dobara progress ke roop me
+    work_flag_reason = None
+    near = phash_index.find_near(work_phash)
+    if near:
+        distance, (kind, item_id) = near[0]
+        source = "feedback" if kind == "feedback" else "contractor work photo"
+        work_flag_reason = f"Near-Duplicate Photo Detected (matches {source} #{item_id}, distance {distance})"
 
     update_data = schemas.ContractorUpdateCreate(
         project_id=project_id,
@@ -94,7 +183,23 @@ def submit_update(
         expected_completion_date=expected_completion_date
     )
 
-    return crud.create_contractor_update(db, update_data, bill_path, work_path)
+    update = crud.create_contractor_update(db, update_data, bill_path, work_path, work_phash, work_flag_reason)
+    phash_index.add("work", update.id, work_phash)
+    spend_detector.observe(db, update)
+    return update
+
+
+def _stream_updates(**filters):
+    """NDJSON export; apna session kyunki response dependency close hone ke baad stream hota hai."""
+    def rows():
+        db = SessionLocal()
+        try:
+            for row in crud.iter_contractor_updates(db, **filters):
+                yield json.dumps(row, default=str) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
 
 
 @router.get("/updates/all")
@@ -103,9 +208,33 @@ def get_all_updates(
     district_id: int = None,
     block_id: int = None,
     village_id: int = None,
+    limit: int = Query(crud.UPDATE_PAGE_SIZE, ge=1, le=500),
+    before: int = None,
+    format: str = None,
     db: Session = Depends(get_db)
 ):
-    return crud.get_all_contractor_updates(db, state_id, district_id, block_id, village_id)
+    """
+    Newest first. Agla page: `before` = is page ki aakhri update id.
+    format=ndjson -> filter ke saare updates (oldest first) stream, audit export ke liye.
+    """
+    if format == "ndjson":
+        return _stream_updates(state_id=state_id, district_id=district_id, block_id=block_id, village_id=village_id)
+    return crud.get_all_contractor_updates(db, state_id, district_id, block_id, village_id, limit, before)
+
+
+@router.get("/updates/project/{project_id}")
+def get_project_updates(
+    project_id: int,
+    limit: int = Query(crud.UPDATE_PAGE_SIZE, ge=1, le=500),
+    before: int = None,
+    format: str = None,
+    db: Session = Depends(get_db)
+):
+    """Ek project ki update history, same `before` cursor / ndjson export ke saath."""
+    if format == "ndjson":
+        return _stream_updates(project_id=project_id)
+    return crud.get_contractor_updates(db, project_id, limit, before)
+
 
 @router.delete("/{contractor_id}")
 def delete_contractor(contractor_id: int, db: Session = Depends(get_db)):
@@ -119,6 +248,7 @@ def delete_contractor(contractor_id: int, db: Session = Depends(get_db)):
         
         db.delete(c)
         db.commit()
+        contractor_performance.refresh_contractors(db, [contractor_id])
         return {"message": "Contractor removed Successfully"}
     return {"message": "Contractor not found"}, 404
 
@@ -1,23 +1,29 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 import crud
 import schemas
-from database import get_db
+from async_database import get_async_db
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
 @router.get("/village/{village_id}", response_model=schemas.DashboardVillageResponse)
-def get_dashboard(village_id: int, db: Session = Depends(get_db)):
-    return crud.get_village_dashboard(db, village_id)
+async def get_dashboard(
+    village_id: int,
+    include_projects: bool = True,
+    limit: int = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await crud.get_village_dashboard_async(db, village_id, include_projects, limit, offset)
 
 
 @router.get("/officer/stats", response_model=schemas.OfficerStatsResponse)
-def get_officer_stats(
+async def get_officer_stats(
     state_id: int = None,
     district_id: int = None,
     block_id: int = None,
     village_id: int = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return crud.get_officer_dashboard_stats(db, state_id, district_id, block_id, village_id)
+    return await crud.get_officer_dashboard_stats_async(db, state_id, district_id, block_id, village_id)
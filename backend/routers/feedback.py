@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 import crud
 from database import get_db
-from models import Feedback
+from async_database import get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Feedback, Project
 from schemas import ProblematicFeedbackResponse
-import os, shutil
+from services.image_pipeline import run_in_pool, stream_to_disk, process_image
+from services.phash_index import phash_index
+from services.geo_index import geo_service, GEOFENCE_RADIUS_KM
+import os
 from typing import List
 
 router = APIRouter(prefix="/feedback", tags=["Feedback"])
@@ -25,87 +31,53 @@ async def add_feedback(
 ):
     image_path = None
     image_hash = None
+    phash = None
     is_flagged = 0
     flag_reason = None
 
-    if image:
-        # Pre-process Step: Hash Calculation
-        import hashlib
-        from PIL import Image, ImageDraw, ImageFont
-        from datetime import datetime
-        from routers.ai import analyze_fake_image
+    village_id = await run_in_threadpool(
+        lambda: db.query(Project.village_id).filter(Project.id == project_id).scalar()
+    )
 
-        contents = await image.read()
-        image_hash = hashlib.sha256(contents).hexdigest()
+    if image:
+        # Stage 1: stream to disk in chunks, hashing as we go
+        save_location = os.path.join(UPLOAD_DIR, image.filename)
+        image_hash = await run_in_pool(stream_to_disk, image.file, save_location)
+        image_path = image.filename
 
         # Check Duplicate
-        existing = db.query(Feedback).filter(Feedback.image_hash == image_hash).first()
+        existing = await run_in_threadpool(
+            lambda: db.query(Feedback.id).filter(Feedback.image_hash == image_hash).first()
+        )
         if existing:
             is_flagged = 1
             flag_reason = "Duplicate Photo Detected"
 
-        # Save File
-        save_location = os.path.join(UPLOAD_DIR, image.filename)
-        with open(save_location, "wb") as buffer:
-            buffer.write(contents)
-        image_path = image.filename
+        # Stage 2: single decode — AI fake detection (if not already duplicate) + overlay
+        result = await run_in_pool(process_image, save_location, latitude, longitude, not is_flagged)
+        phash = result["phash"]
 
-        # AI Fake Detection (if not already duplicate)
+        # Near-duplicate (resized / re-compressed copy) — duplicate flag AI flag se upar
         if not is_flagged:
-            fake_detected, reason = analyze_fake_image(save_location)
-            if fake_detected:
+            near = phash_index.find_near(phash)
+            if near:
+                distance, (kind, item_id) = near[0]
+                source = "feedback" if kind == "feedback" else "contractor work photo"
                 is_flagged = 1
-                flag_reason = f"AI Flag: {reason}"
+                flag_reason = f"Near-Duplicate Photo Detected (matches {source} #{item_id}, distance {distance})"
+
+        if not is_flagged and result["fake_detected"]:
+            is_flagged = 1
+            flag_reason = f"AI Flag: {result['fake_reason']}"
 
         # 🌍 GEOFENCING CHECK (User Request)
         if not is_flagged and latitude and longitude:
-            project = db.query(Project).get(project_id)
-            if project and project.village and project.village.latitude:
-                from math import radians, cos, sin, asin, sqrt
-                
-                def haversine(lon1, lat1, lon2, lat2):
-                    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-                    dlon = lon2 - lon1 
-                    dlat = lat2 - lat1 
-                    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-                    c = 2 * asin(sqrt(a)) 
-                    r = 6371 # Radius of earth in km. Use 3956 for miles
-                    return c * r
-
-                v_lat = project.village.latitude
-                v_lng = project.village.longitude
-                dist = haversine(longitude, latitude, v_lng, v_lat)
-                
-                # If further than 0.5km (500 meters) from village center
-                if dist > 0.5:
-                    is_flagged = 1
-                    flag_reason = f"Out of Bounds: Photo taken {dist:.2f}km away from {project.village.name}"
-
-        # Metadata Overlay
-        try:
-            img = Image.open(save_location)
-            draw = ImageDraw.Draw(img)
-            
-            # Simple timestamp & location text
-            text = f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
-            if latitude and longitude:
-                text += f"Lat: {latitude:.4f}, Long: {longitude:.4f}"
-            
-            # Draw text (Top-left, Red color for visibility)
-            # Find a font or use default
-            try:
-                # Try standard fonts if available, else default
-                font = ImageFont.truetype("arial.ttf", 20)
-            except:
-                font = ImageFont.load_default()
-
-            draw.text((10, 10), text, fill="red", font=font)
-            
-            # Overwrite original
-            img.save(save_location)
-        
-        except Exception as e:
-            print(f"Overlay Failed: {e}")
+            await run_in_threadpool(geo_service.ensure_loaded, db)
+            fence = geo_service.geofence(village_id, latitude, longitude)
+            # If further than 0.5km (500 meters) from village center
+            if fence and not fence["inside"]:
+                is_flagged = 1
+                flag_reason = f"Out of Bounds: Photo taken {fence['distance_km']:.2f}km away from {fence['village']}"
 
     fb = Feedback(
         project_id=project_id,
@@ -115,20 +87,21 @@ async def add_feedback(
         latitude=latitude,
         longitude=longitude,
         image_hash=image_hash,
+        phash=phash,
         is_flagged=is_flagged,
         flag_reason=flag_reason
     )
 
-    db.add(fb)
-    db.commit()
-    db.refresh(fb)
+    fb = await run_in_threadpool(crud.add_feedback, db, fb)
+    phash_index.add("feedback", fb.id, phash)
+    geo_service.add_feedback(fb.id, latitude, longitude, rating, is_flagged, village_id)
 
     return {"success": True, "feedback": fb}
 
 
 @router.get("/problematic/{village_id}", response_model=List[ProblematicFeedbackResponse])
-def get_problematic_feedbacks(village_id: int, db: Session = Depends(get_db)):
-    results = crud.list_problematic_feedback(db, village_id)
+async def get_problematic_feedbacks(village_id: int, db: AsyncSession = Depends(get_async_db)):
+    results = await crud.list_problematic_feedback_async(db, village_id)
     response = []
     for feedback, project in results:
         # Pydantic requires dict or object matching schema
@@ -145,3 +118,50 @@ def get_problematic_feedbacks(village_id: int, db: Session = Depends(get_db)):
         )
         response.append(item)
     return response
+
+
+@router.get("/clusters")
+def feedback_clusters(
+    lat: float,
+    lng: float,
+    radius_km: float = Query(2.0, gt=0, le=50),
+    cell_km: float = Query(0.5, gt=0, le=10),
+    db: Session = Depends(get_db)
+):
+    """Point ke aas-paas geotagged feedback ke clusters (count, flagged, avg rating)."""
+    geo_service.ensure_loaded(db)
+    return geo_service.feedback_clusters(lat, lng, radius_km, cell_km)
+
+
+@router.get("/geofence/audit/{village_id}")
+def geofence_audit(
+    village_id: int,
+    radius_km: float = Query(GEOFENCE_RADIUS_KM, gt=0),
+    db: Session = Depends(get_db)
+):
+    """Village ke saare geotagged feedback ka ek saath (vectorized) geofence check."""
+    geo_service.ensure_loaded(db)
+    rows = (
+        db.query(Feedback.id, Feedback.project_id, Feedback.latitude, Feedback.longitude, Feedback.is_flagged)
+        .join(Project, Feedback.project_id == Project.id)
+        .filter(Project.village_id == village_id)
+        .filter(Feedback.latitude != None, Feedback.longitude != None)
+        .all()
+    )
+    if not rows:
+        return {"checked": 0, "out_of_bounds": []}
+
+    distances = geo_service.batch_distances(
+        [village_id] * len(rows), [r.latitude for r in rows], [r.longitude for r in rows]
+    )
+    out = [
+        {
+            "feedback_id": r.id,
+            "project_id": r.project_id,
+            "distance_km": round(float(d), 3),
+            "already_flagged": bool(r.is_flagged),
+        }
+        for r, d in zip(rows, distances)
+        if d > radius_km  # NaN (village coords missing) yahan False hota hai
+    ]
+    return {"checked": len(rows), "out_of_bounds": out}
@@ -1,28 +1,139 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Optional
 from sqlalchemy.orm import Session
 from database import get_db
-import crud
-import schemas
+from models import State, District, Block, Village
+from services.location_tree import location_cache
+from services.location_search import location_search, LEVELS as SEARCH_LEVELS
+from services.geo_index import geo_service
 
 router = APIRouter(prefix="/locations", tags=["Locations"])
 
+# Browser / proxy thodi der rakh sakte hain, phir ETag se revalidate
+CACHE_CONTROL = "public, max-age=60"
+
+
+def _cached(request: Request, tree, body):
+    """ETag match ho to 304, warna JSON + caching headers."""
+    headers = {"ETag": tree.etag, "Cache-Control": CACHE_CONTROL}
+    if request.headers.get("if-none-match") == tree.etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(body, headers=headers)
+
+
+def _items(pairs):
+    return [{"id": i, "name": n} for i, n in pairs]
+
 
 @router.get("/states")
-def list_states(db: Session = Depends(get_db)):
-     states = crud.get_states(db)
-     return [{"id": s.id, "name": s.name} for s in states]
+def list_states(request: Request, db: Session = Depends(get_db)):
+    tree = location_cache.current(db)
+    return _cached(request, tree, _items(tree.states))
 
 @router.get("/districts/{state_id}")
-def list_districts(state_id: int, db: Session = Depends(get_db)):
-    districts = crud.get_districts_by_state(db, state_id)
-    return [{"id": d.id, "name": d.name} for d in districts]
+def list_districts(state_id: int, request: Request, db: Session = Depends(get_db)):
+    tree = location_cache.current(db)
+    return _cached(request, tree, _items(tree.districts.get(state_id, [])))
 
 @router.get("/blocks/{district_id}")
-def list_blocks(district_id: int, db: Session = Depends(get_db)):
-    blocks = crud.get_blocks_by_district(db, district_id)
-    return [{"id": b.id, "name": b.name} for b in blocks]
+def list_blocks(district_id: int, request: Request, db: Session = Depends(get_db)):
+    tree = location_cache.current(db)
+    return _cached(request, tree, _items(tree.blocks.get(district_id, [])))
 
 @router.get("/villages/{block_id}")
-def list_villages(block_id: int, db: Session = Depends(get_db)):
-    villages = crud.get_villages_by_block(db, block_id)
-    return [{"id": v.id, "name": v.name} for v in villages]
\ No newline at end of file
+def list_villages(block_id: int, request: Request, db: Session = Depends(get_db)):
+    tree = location_cache.current(db)
+    return _cached(request, tree, _items(tree.villages.get(block_id, [])))
+
+
+@router.get("/tree")
+def location_tree(
+    request: Request,
+    state_id: int = None,
+    district_id: int = None,
+    block_id: int = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Ek hi call me poora subtree: {"id", "name", "children": [...]} (villages ke children nahi).
+    Sabse specific id chalti hai; koi id nahi to saare states.
+    """
+    tree = location_cache.current(db)
+    node = tree.subtree(state_id, district_id, block_id)
+    if node is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    return _cached(request, tree, {"version": tree.version, "tree": node})
+
+
+@router.get("/search")
+def search_locations(
+    q: str = Query(..., min_length=1, max_length=100),
+    level: str = None,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    Typeahead — Devanagari ya Latin, spelling variants bhi ("लखनऊ" / "Lucknow").
+    level = state | district | block | village; har result ke saath uska path.
+    """
+    if level is not None and level not in SEARCH_LEVELS:
+        raise HTTPException(status_code=400, detail=f"level must be one of {', '.join(SEARCH_LEVELS)}")
+    index = location_search.current(location_cache.current(db))
+    return index.search(q, level, limit)
+
+
+# ----------------------------
+# ADMIN
+# ----------------------------
+LEVELS = {
+    "states": (State, None),
+    "districts": (District, ("state_id", State)),
+    "blocks": (Block, ("district_id", District)),
+    "villages": (Village, ("block_id", Block)),
+}
+
+
+class LocationCreate(BaseModel):
+    name: str
+    parent_id: Optional[int] = None
+    latitude: Optional[float] = None    # sirf villages
+    longitude: Optional[float] = None
+
+
+@router.post("/{level}")
+def create_location(level: str, payload: LocationCreate, db: Session = Depends(get_db)):
+    if level not in LEVELS:
+        raise HTTPException(status_code=404, detail="Unknown location level")
+    model, parent = LEVELS[level]
+    fields = {"name": payload.name}
+    if parent:
+        column, parent_model = parent
+        if payload.parent_id is None or db.get(parent_model, payload.parent_id) is None:
+            raise HTTPException(status_code=400, detail=f"Valid parent_id required for {level}")
+        fields[column] = payload.parent_id
+    if model is Village:
+        fields.update(latitude=payload.latitude, longitude=payload.longitude)
+
+    row = model(**fields)
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    tree = location_cache.invalidate(db)
+    if model is Village:
+        geo_service.invalidate()
+    return {"id": row.id, "name": row.name, "version": tree.version}
+
+
+@router.put("/{level}/{location_id}")
+def rename_location(level: str, location_id: int, name: str, db: Session = Depends(get_db)):
+    if level not in LEVELS:
+        raise HTTPException(status_code=404, detail="Unknown location level")
+    row = db.get(LEVELS[level][0], location_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    row.name = name
+    db.commit()
+    tree = location_cache.invalidate(db)
+    return {"id": row.id, "name": row.name, "version": tree.version}
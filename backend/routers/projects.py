@@ -1,16 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from sqlalchemy.orm import Session
 from database import get_db
+from async_database import get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
 import crud
 import schemas
 from services.algorand_service import algo_service
+from services.algorand_sync import sync_worker, project_payload
+from services.geo_index import geo_service
+from services.project_import import import_projects, read_rows, FORMATS as IMPORT_FORMATS
+from models import Village, Project, ProjectSyncState
+from concurrent.futures import ThreadPoolExecutor
+
+VERIFY_WORKERS = 8
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
 
 @router.get("/by_village/{village_id}", response_model=list[schemas.ProjectResponse])
-def projects_by_village(village_id: int, db: Session = Depends(get_db)):
-    return crud.get_projects_by_village(db, village_id)
+async def projects_by_village(village_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await crud.get_projects_by_village_async(db, village_id)
+
+
+@router.get("/nearby")
+def projects_nearby(
+    lat: float,
+    lng: float,
+    radius_km: float = Query(5.0, gt=0, le=100),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """Projects within radius_km (project location = uske village ka center)."""
+    geo_service.ensure_loaded(db)
+    nearby = geo_service.villages_within(lat, lng, radius_km)
+    if not nearby:
+        return []
+
+    distance = {v_id: d for d, v_id in nearby}
+    rows = (
+        db.query(Project.id, Project.name, Project.status, Project.progress_percent,
+                 Project.village_id, Village.name.label("village_name"))
+        .join(Village, Project.village_id == Village.id)
+        .filter(Project.village_id.in_(list(distance)))
+        .all()
+    )
+    result = [
+        {
+            "id": r.id,
+            "name": r.name,
+            "status": r.status,
+            "progress_percent": r.progress_percent,
+            "village_id": r.village_id,
+            "village_name": r.village_name,
+            "distance_km": round(distance[r.village_id], 3),
+        }
+        for r in rows
+    ]
+    result.sort(key=lambda p: (p["distance_km"], p["id"]))
+    return result[:limit]
 
 
 @router.get("/{project_id}", response_model=schemas.ProjectResponse)
@@ -24,35 +73,118 @@ def get_project(project_id: int, db: Session = Depends(get_db)):
 @router.post("/add", response_model=schemas.ProjectResponse)
 def create_project(payload: schemas.ProjectCreate, db: Session = Depends(get_db)):
     project = crud.create_project(db, payload)
-    # Sync to Blockchain
-    try:
-        project_data = {"name": project.name, "budget": project.budget}
-        algo_service.sync_project(project.id, int(project.budget), int(project.spent), project_data, is_new=True)
-    except Exception as e:
-        print(f"Blockchain Sync Error: {e}")
+    # Sync to Blockchain — background worker batches it into an atomic group
+    sync_worker.enqueue(project.id)
     return project
 
 
+@router.post("/import")
+def bulk_import_projects(
+    file: UploadFile = File(...),
+    format: str = Query(None, description="csv / xlsx; default file extension se"),
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Sanction list (CSV / XLSX) se bulk projects. Columns ProjectCreate wale;
+    village_id ki jagah village (+ block / district / state) naam bhi chalega.
+    Galat rows skip hoti hain aur `errors` me row number ke saath aati hain.
+    File beech me toot jaye to ab tak insert hui rows rehti hain, `reader_error` me wajah.
+    """
+    if format and format.lower() not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {IMPORT_FORMATS}")
+    try:
+        return import_projects(db, read_rows(file.file, file.filename, format), dry_run=dry_run)
+    except (ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.put("/update/{project_id}", response_model=schemas.ProjectResponse)
 def update_project(project_id: int, payload: schemas.ProjectUpdate, db: Session = Depends(get_db)):
-    project = crud.update_project(db, project_id, payload)
-    # Sync to Blockchain
+    project = crud.update_project(db, project_id, payload.dict(exclude_unset=True))
+    # Sync to Blockchain — repeated updates to the same project are coalesced
     if project:
-        try:
-            project_data = {"name": project.name, "budget": project.budget, "status": project.status}
-            algo_service.sync_project(project.id, int(project.budget), int(project.spent), project_data, is_new=False)
-        except Exception as e:
-            print(f"Blockchain Sync Error: {e}")
+        sync_worker.enqueue(project.id)
     return project
 
+def _last_txid(db: Session, project_id: int):
+    return db.query(ProjectSyncState.last_txid).filter(ProjectSyncState.project_id == project_id).scalar()
+
+
+@router.get("/verify/bulk")
+def verify_projects_bulk(
+    village_id: int = None,
+    block_id: int = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Village / block ke saare projects ka on-chain budget, spent aur hash
+    abhi ki DB row se compare karo. Box reads concurrently aur cached hote hain.
+    """
+    if not village_id and not block_id:
+        raise HTTPException(status_code=400, detail="village_id or block_id is required")
+
+    query = (
+        db.query(Project.id, Project.name, Project.budget, Project.spent, Project.status,
+                 ProjectSyncState.status.label("sync_status"), ProjectSyncState.last_txid,
+                 ProjectSyncState.last_hash)
+        .outerjoin(ProjectSyncState, ProjectSyncState.project_id == Project.id)
+    )
+    if village_id:
+        query = query.filter(Project.village_id == village_id)
+    else:
+        query = query.join(Village, Project.village_id == Village.id).filter(Village.block_id == block_id)
+    rows = query.order_by(Project.id).all()
+
+    with ThreadPoolExecutor(max_workers=VERIFY_WORKERS) as pool:
+        chain = list(pool.map(lambda r: algo_service.get_verified_data(r.id, r.last_txid), rows))
+
+    results = []
+    summary = {"verified": 0, "mismatch": 0, "not_on_chain": 0}
+    for r, data in zip(rows, chain):
+        # Hash abhi ki DB row se — sync ke baad hua edit bhi mismatch dikhe.
+        # Chain par register (name, budget) ya update (+ status) wala payload ho sakta hai.
+        current = [algo_service.generate_project_hash(project_payload(r, is_new)).hex() for is_new in (False, True)]
+        db_hash = data["hash"] if data is not None and data["hash"] in current else current[0]
+        item = {
+            "project_id": r.id,
+            "name": r.name,
+            "sync_status": r.sync_status,
+            "db": {"budget": int(r.budget or 0), "spent": int(r.spent or 0), "hash": db_hash},
+            "last_synced_hash": r.last_hash,
+            "on_chain": data,
+        }
+        if data is None:
+            item["result"] = "not_on_chain"
+        else:
+            item["checks"] = {
+                "budget": data["budget"] == item["db"]["budget"],
+                "spent": data["spent"] == item["db"]["spent"],
+                "hash": data["hash"] == db_hash,
+            }
+            item["result"] = "verified" if all(item["checks"].values()) else "mismatch"
+        summary[item["result"]] += 1
+        results.append(item)
+
+    return {"checked": len(rows), **summary, "projects": results}
+
+
 @router.get("/verify/{project_id}")
-def verify_project_on_chain(project_id: int):
-    data = algo_service.get_on_chain_data(project_id)
+def verify_project_on_chain(project_id: int, db: Session = Depends(get_db)):
+    data = algo_service.get_verified_data(project_id, _last_txid(db, project_id))
     if not data:
         raise HTTPException(status_code=404, detail="Project not found on blockchain")
     return data
 
 
+@router.get("/sync/{project_id}")
+def project_sync_status(project_id: int, db: Session = Depends(get_db)):
+    status = sync_worker.status(db, project_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="No sync record for this project")
+    return status
+
+
 @router.delete("/delete/{project_id}")
 def delete_project(project_id: int, db: Session = Depends(get_db)):
     return crud.delete_project(db, project_id)
@@ -67,16 +67,16 @@ class ProjectCreate(BaseModel):
 
 
 class ProjectUpdate(BaseModel):
-    name: Optional[str]
+    name: Optional[str] = None
     contractor_id: Optional[int] = None
-    description: Optional[str]
-    status: Optional[str]
-    budget: Optional[float]
-    spent: Optional[float]
-    progress_percent: Optional[float]
-    start_year: Optional[int]
-    duration_months: Optional[int]
-    risk_level: Optional[str]
+    description: Optional[str] = None
+    status: Optional[str] = None
+    budget: Optional[float] = None
+    spent: Optional[float] = None
+    progress_percent: Optional[float] = None
+    start_year: Optional[int] = None
+    duration_months: Optional[int] = None
+    risk_level: Optional[str] = None
 
 # ----------------------------
 # Contractor Schema
@@ -140,14 +140,15 @@ class DashboardVillageResponse(BaseModel):
     total_spent: float
     avg_progress: float
     complaints: int  # 🔥 ADDED
-    project_list: List[ProjectResponse]
+    project_list: Optional[List[ProjectResponse]] = None  # include_projects=false par None
 
 
 class OfficerStatsResponse(BaseModel):
     total_projects: int
     completed_projects: int
-    completed_projects: int
     complaints: int
+    total_budget: float = 0
+    total_spent: float = 0
 
 
 # ----------------------------
@@ -163,6 +164,7 @@ class ContractorUpdateBase(ORMBase):
     work_image_path: Optional[str]
     expected_completion_date: Optional[str]
     submission_date: Optional[str]
+    submitted_at: Optional[datetime] = None
 
 
 class ContractorUpdateCreate(BaseModel):
@@ -134,6 +134,13 @@ if v_mhow:
 
 db.add_all(projects)
 db.commit()
+
+# Officer dashboard rollups naye data se dobara banao
+from services import rollup_service
+rollup_service.rebuild_rollups(db)
+# Chalte server ka location tree cache aur village geo index version badla dekh kar reload karenge
+from services.location_tree import bump_version
+bump_version(db)
 db.close()
 
 print("Database expanded and re-seeded successfully!")
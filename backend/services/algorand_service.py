@@ -1,6 +1,8 @@
 import os
 import hashlib
 import json
+import threading
+import time
 
 # Configuration from environment
 ALGOD_ADDRESS = os.environ.get("ALGOD_ADDRESS", "https://testnet-api.algonode.cloud")
@@ -9,70 +11,149 @@ DEPLOYER_MNEMONIC = os.environ.get("DEPLOYER_MNEMONIC")
 APP_ID = int(os.environ.get("ALGORAND_APP_ID", 0))
 
 
+SUGGESTED_PARAMS_TTL = float(os.environ.get("ALGOD_PARAMS_TTL", 30))
+VERIFY_CACHE_TTL = float(os.environ.get("ALGOD_VERIFY_TTL", 300))
+MAX_GROUP_SIZE = 16  # Algorand atomic group limit
+
+
 class AlgorandService:
-    def __init__(self):
-        self.app_id = APP_ID
-        self.client = None
+    def __init__(self, client=None, deployer_mnemonic=DEPLOYER_MNEMONIC, app_id=APP_ID):
+        self.app_id = app_id
+        self.client = client
         self.deployer_sk = None
         self.deployer_address = None
+        self._params = None
+        self._params_fetched_at = 0.0
+        self._params_lock = threading.Lock()
+        self._verify_cache = {}   # project_id -> (txid, fetched_at, data)
+        self._verify_lock = threading.Lock()
 
-        try:
-            from algosdk.v2client import algod
-            self.client = algod.AlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
-            print(f"[Algorand] Connected to node: {ALGOD_ADDRESS}")
-        except Exception as e:
-            print(f"[Algorand] Could not connect to node: {e}")
+        if self.client is None:
+            try:
+                from algosdk.v2client import algod
+                self.client = algod.AlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
+                print(f"[Algorand] Connected to node: {ALGOD_ADDRESS}")
+            except Exception as e:
+                print(f"[Algorand] Could not connect to node: {e}")
 
-        if DEPLOYER_MNEMONIC:
+        if deployer_mnemonic:
             try:
                 from algosdk import mnemonic, account
-                self.deployer_sk = mnemonic.to_private_key(DEPLOYER_MNEMONIC)
+                self.deployer_sk = mnemonic.to_private_key(deployer_mnemonic)
                 self.deployer_address = account.address_from_private_key(self.deployer_sk)
                 print(f"[Algorand] Deployer loaded: {self.deployer_address}")
             except Exception as e:
                 print(f"[Algorand] Could not load deployer wallet: {e}")
 
+    @property
+    def is_configured(self) -> bool:
+        return bool(self.deployer_sk and self.app_id != 0 and self.client)
+
     def generate_project_hash(self, project_data: dict) -> bytes:
         """SHA256 hash of project details for on-chain integrity check."""
         data_str = json.dumps(project_data, sort_keys=True)
         return hashlib.sha256(data_str.encode()).digest()
 
+    def suggested_params(self):
+        """algod suggested params, SUGGESTED_PARAMS_TTL seconds tak cached."""
+        with self._params_lock:
+            now = time.monotonic()
+            if self._params is None or now - self._params_fetched_at > SUGGESTED_PARAMS_TTL:
+                self._params = self.client.suggested_params()
+                self._params_fetched_at = now
+            return self._params
+
+    def invalidate_params(self):
+        with self._params_lock:
+            self._params = None
+
+    def build_sync_txn(self, project_id: int, budget: int, spent: int, project_data: dict, is_new=True, params=None):
+        """Unsigned app call txn for register/update of one project."""
+        from algosdk import transaction
+
+        status_hash = self.generate_project_hash(project_data)
+
+        project_id_bytes = project_id.to_bytes(8, 'big')
+        budget_bytes = budget.to_bytes(8, 'big')
+        spent_bytes = spent.to_bytes(8, 'big')
+
+        if is_new:
+            app_args = [b"register", project_id_bytes, budget_bytes, spent_bytes, status_hash]
+        else:
+            app_args = [b"update", project_id_bytes, spent_bytes, status_hash]
+
+        boxes = [(self.app_id, project_id_bytes)]
+        return transaction.ApplicationNoOpTxn(
+            sender=self.deployer_address,
+            sp=params or self.suggested_params(),
+            index=self.app_id,
+            app_args=app_args,
+            boxes=boxes
+        )
+
+    def submit_group(self, items):
+        """
+        Up to MAX_GROUP_SIZE projects ek atomic group me.
+        items: [{"project_id", "budget", "spent", "project_data", "is_new"}, ...]
+        Returns {project_id: txid}. Group ya to poora lagta hai ya poora fail.
+        """
+        from algosdk import transaction
+
+        if len(items) > MAX_GROUP_SIZE:
+            raise ValueError(f"Atomic group can hold at most {MAX_GROUP_SIZE} transactions")
+
+        params = self.suggested_params()
+        txns = [
+            self.build_sync_txn(
+                i["project_id"], i["budget"], i["spent"], i["project_data"], i["is_new"], params
+            )
+            for i in items
+        ]
+        if len(txns) > 1:
+            transaction.assign_group_id(txns)
+        signed = [t.sign(self.deployer_sk) for t in txns]
+        try:
+            self.client.send_transactions(signed)
+        except Exception:
+            self.invalidate_params()  # stale params (e.g. expired round range) ho sakte hain
+            raise
+        for i in items:
+            self.invalidate_verification(i["project_id"])
+        return {i["project_id"]: t.get_txid() for i, t in zip(items, txns)}
+
     def sync_project(self, project_id: int, budget: int, spent: int, project_data: dict, is_new=True):
         """Sync project data to Algorand Box Storage."""
-        if not self.deployer_sk or self.app_id == 0 or not self.client:
+        if not self.is_configured:
             print(f"[Algorand] Skipping sync for project {project_id} (no credentials or App ID configured)")
             return None
 
         try:
-            from algosdk import transaction
-            params = self.client.suggested_params()
-            status_hash = self.generate_project_hash(project_data)
-
-            project_id_bytes = project_id.to_bytes(8, 'big')
-            budget_bytes = budget.to_bytes(8, 'big')
-            spent_bytes = spent.to_bytes(8, 'big')
-
-            if is_new:
-                app_args = [b"register", project_id_bytes, budget_bytes, spent_bytes, status_hash]
-            else:
-                app_args = [b"update", project_id_bytes, spent_bytes, status_hash]
-
-            boxes = [(self.app_id, project_id_bytes)]
-            txn = transaction.ApplicationNoOpTxn(
-                sender=self.deployer_address,
-                sp=params,
-                index=self.app_id,
-                app_args=app_args,
-                boxes=boxes
-            )
-            signed_txn = txn.sign(self.deployer_sk)
-            txid = self.client.send_transaction(signed_txn)
+            txid = self.submit_group([{
+                "project_id": project_id, "budget": budget, "spent": spent,
+                "project_data": project_data, "is_new": is_new,
+            }])[project_id]
             print(f"[Algorand] Project {project_id} synced — TxID: {txid}")
             return txid
         except Exception as e:
             print(f"[Algorand] Sync error for project {project_id}: {e}")
             return None
 
+    def box_exists(self, project_id: int):
+        """
+        Project ka box chain par hai? True / False; node error par None (pata nahi).
+        Purane inline sync ne jo projects register kiye unka sync state row nahi hai.
+        """
+        if self.app_id == 0 or not self.client:
+            return None
+        try:
+            self.client.application_box_by_name(self.app_id, project_id.to_bytes(8, 'big'))
+            return True
+        except Exception as e:
+            if getattr(e, "code", None) == 404 or "not found" in str(e).lower():
+                return False
+            print(f"[Algorand] Box lookup error for project {project_id}: {e}")
+            return None
+
     def get_on_chain_data(self, project_id: int):
         """Reads project data from Algorand Box Storage."""
         if self.app_id == 0 or not self.client:
@@ -90,6 +171,27 @@ class AlgorandService:
             print(f"[Algorand] Read error for project {project_id}: {e}")
             return None
 
+    def get_verified_data(self, project_id: int, txid: str = None):
+        """
+        get_on_chain_data with a cache keyed on (project_id, last sync txid).
+        Naya sync (alag txid) ya TTL khatam hone par hi box dobara padha jata hai.
+        """
+        now = time.monotonic()
+        with self._verify_lock:
+            cached = self._verify_cache.get(project_id)
+        if cached and cached[0] == txid and now - cached[1] < VERIFY_CACHE_TTL:
+            return cached[2]
+
+        data = self.get_on_chain_data(project_id)
+        if data is not None:
+            with self._verify_lock:
+                self._verify_cache[project_id] = (txid, now, data)
+        return data
+
+    def invalidate_verification(self, project_id: int):
+        with self._verify_lock:
+            self._verify_cache.pop(project_id, None)
+
 
 # Singleton — always succeeds even if blockchain is unavailable
 algo_service = AlgorandService()
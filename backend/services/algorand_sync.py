@@ -0,0 +1,298 @@
+"""
+Background Algorand project sync.
+
+`/projects/add` aur `/projects/update` ab chain par inline transaction nahi
+bhejte — sirf project id queue karte hain. Worker thread:
+  - ek hi project ke baar-baar updates ko coalesce karta hai (queue me id ek baar),
+  - flush ke waqt DB se latest row padh kar up to 16 projects ka atomic group bhejta hai,
+  - har project ka status `project_sync_state` me rakhta hai,
+  - fail hone par backoff ke saath retry karta hai (restart ke baad bhi `resume`).
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from database import SessionLocal
+from models import Project, ProjectSyncState
+from services.algorand_service import algo_service, MAX_GROUP_SIZE
+
+
+def project_payload(project: Project, is_new: bool) -> dict:
+    """Wahi fields jo pehle inline sync me hash hote the."""
+    if is_new:
+        return {"name": project.name, "budget": project.budget}
+    return {"name": project.name, "budget": project.budget, "status": project.status}
+
+
+class AlgorandSyncWorker:
+    def __init__(
+        self,
+        service=algo_service,
+        session_factory=SessionLocal,
+        flush_interval: float = 1.0,
+        max_attempts: int = 5,
+        backoff_base: float = 5.0,
+    ):
+        self.service = service
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()   # project_id -> None (ordered set, coalesces repeats)
+        self._retry = []                # heap of (due, seq, project_id)
+        self._seq = itertools.count()
+        self._solo = set()              # group fail hua — agli baar akele bhejo
+        self._in_flight = 0
+        self._thread = None
+        self._stopping = False
+
+    # ---------- public API ----------
+    def enqueue(self, project_id: int):
+        db = self.session_factory()
+        try:
+            state = db.get(ProjectSyncState, project_id)
+            if state is None:
+                state = ProjectSyncState(project_id=project_id, is_registered=0, attempts=0)
+                db.add(state)
+            state.status = "pending"
+            state.attempts = 0
+            state.updated_at = datetime.now()
+            db.commit()
+        finally:
+            db.close()
+        self._schedule(project_id)
+
+    def enqueue_many(self, project_ids, schedule: bool = True):
+        """
+        Bulk import ke liye — saare sync states ek commit me, phir ek saath queue.
+        schedule=False: sirf "pending" mark (CLI); API server startup par `resume` bhejega.
+        """
+        project_ids = list(dict.fromkeys(project_ids))
+        if not project_ids:
+            return
+        db = self.session_factory()
+        try:
+            now = datetime.now()
+            states = {}
+            for start in range(0, len(project_ids), 500):   # SQLite bound-parameter limit
+                chunk = project_ids[start:start + 500]
+                states.update(
+                    (s.project_id, s)
+                    for s in db.query(ProjectSyncState).filter(ProjectSyncState.project_id.in_(chunk))
+                )
+            for project_id in project_ids:
+                state = states.get(project_id)
+                if state is None:
+                    state = ProjectSyncState(project_id=project_id, is_registered=0, attempts=0)
+                    db.add(state)
+                state.status = "pending"
+                state.attempts = 0
+                state.updated_at = now
+            db.commit()
+        finally:
+            db.close()
+        if not schedule:
+            return
+        with self._cond:
+            for project_id in project_ids:
+                self._pending[project_id] = None
+        self._schedule(project_ids[0])
+
+    def resume(self, db):
+        """Startup par pending / failed projects dobara queue karo."""
+        rows = (
+            db.query(ProjectSyncState.project_id)
+            .filter(ProjectSyncState.status.in_(["pending", "failed"]))
+            .filter(ProjectSyncState.attempts < self.max_attempts)
+            .all()
+        )
+        for (project_id,) in rows:
+            self._schedule(project_id)
+        return len(rows)
+
+    def status(self, db, project_id: int):
+        state = db.get(ProjectSyncState, project_id)
+        if not state:
+            return None
+        with self._cond:
+            queued = project_id in self._pending or any(pid == project_id for _, _, pid in self._retry)
+        return {
+            "project_id": project_id,
+            "status": state.status,
+            "queued": queued,
+            "is_registered": bool(state.is_registered),
+            "last_txid": state.last_txid,
+            "last_hash": state.last_hash,
+            "attempts": state.attempts,
+            "last_error": state.last_error,
+            "updated_at": state.updated_at,
+        }
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+
+    # ---------- internals ----------
+    def _schedule(self, project_id: int, delay: float = 0):
+        with self._cond:
+            if delay:
+                heapq.heappush(self._retry, (time.monotonic() + delay, next(self._seq), project_id))
+            else:
+                self._pending[project_id] = None
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="algorand-sync", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._stopping:
+                now = time.monotonic()
+                while self._retry and self._retry[0][0] <= now:
+                    _, _, project_id = heapq.heappop(self._retry)
+                    self._pending[project_id] = None
+                if self._pending:
+                    break
+                self._cond.wait(self._retry[0][0] - now if self._retry else None)
+            if self._stopping:
+                return None
+
+        # Thoda rukne do taki same project ke rapid updates ek me mil jayein
+        if self.flush_interval:
+            time.sleep(self.flush_interval)
+
+        with self._cond:
+            batch = []
+            for project_id in list(self._pending):
+                if project_id in self._solo:
+                    if batch:
+                        continue
+                    batch.append(project_id)
+                    break
+                batch.append(project_id)
+                if len(batch) >= MAX_GROUP_SIZE:
+                    break
+            for project_id in batch:
+                del self._pending[project_id]
+            self._in_flight += len(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                if batch:
+                    self._sync_batch(batch)
+            except Exception as e:
+                print(f"[Algorand] Sync worker error: {e}")
+            finally:
+                with self._cond:
+                    self._in_flight -= len(batch)
+                    self._cond.notify_all()
+
+    def _fail(self, state, project_id, error, now, solo):
+        """Attempt gino; max_attempts tak backoff ke saath dobara schedule."""
+        state.attempts = (state.attempts or 0) + 1
+        state.status = "failed"
+        state.last_error = error
+        state.updated_at = now
+        if state.attempts < self.max_attempts:
+            if solo:
+                self._solo.add(project_id)
+            self._schedule(project_id, self.backoff_base * (2 ** (state.attempts - 1)))
+
+    def _sync_batch(self, project_ids):
+        db = self.session_factory()
+        try:
+            projects = {p.id: p for p in db.query(Project).filter(Project.id.in_(project_ids))}
+            states = {
+                s.project_id: s
+                for s in db.query(ProjectSyncState).filter(ProjectSyncState.project_id.in_(project_ids))
+            }
+            now = datetime.now()
+
+            items = []
+            for project_id in project_ids:
+                state = states.get(project_id)
+                project = projects.get(project_id)
+                if project is None:
+                    if state is not None:
+                        db.delete(state)  # project delete ho gaya
+                    continue
+                if state is None:
+                    state = states[project_id] = ProjectSyncState(project_id=project_id, is_registered=0, attempts=0)
+                    db.add(state)
+                if not self.service.is_configured:
+                    state.status = "skipped"
+                    state.last_error = "No credentials or App ID configured"
+                    state.updated_at = now
+                    continue
+                if not state.is_registered:
+                    # Sync state na hone ka matlab naya project hona zaroori nahi — purana
+                    # inline sync box bana chuka ho to "register" hamesha fail hoga
+                    exists = self.service.box_exists(project_id)
+                    if exists is None:
+                        self._fail(state, project_id, "could not check on-chain box", now, solo=False)
+                        continue
+                    if exists:
+                        state.is_registered = 1
+                is_new = not state.is_registered
+                data = project_payload(project, is_new)
+                items.append({
+                    "project_id": project_id,
+                    "budget": int(project.budget or 0),
+                    "spent": int(project.spent or 0),
+                    "project_data": data,
+                    "is_new": is_new,
+                    "hash": self.service.generate_project_hash(data).hex(),
+                })
+
+            if items:
+                try:
+                    txids = self.service.submit_group(items)
+                except Exception as e:
+                    for item in items:
+                        self._fail(states[item["project_id"]], item["project_id"], str(e), now, solo=len(items) > 1)
+                    print(f"[Algorand] Group sync failed for projects {[i['project_id'] for i in items]}: {e}")
+                else:
+                    for item in items:
+                        state = states[item["project_id"]]
+                        state.status = "synced"
+                        state.is_registered = 1
+                        state.last_txid = txids[item["project_id"]]
+                        state.last_hash = item["hash"]
+                        state.attempts = 0
+                        state.last_error = None
+                        state.updated_at = now
+                        self._solo.discard(item["project_id"])
+                    print(f"[Algorand] Synced {len(items)} project(s) in one group")
+
+            db.commit()
+        finally:
+            db.close()
+
+
+# Singleton — worker thread pehle enqueue par start hota hai
+sync_worker = AlgorandSyncWorker()
@@ -0,0 +1,189 @@
+"""
+Contractor performance materialization.
+
+`Contractor.performance` (0-5) ab in components se banta hai:
+
+  - on_time_rate   (35%) — same project par lagatar updates ka gap <= 30 din
+                           (`/ai/alerts` wala staleness rule); adhoore
+                           project par last update ke baad 30 din se zyada
+                           chup rehna bhi ek late gap hai
+  - efficiency     (30%) — progress / spent ratio, budget-weighted, max 1
+  - complaint_rate (20%) — unke projects ke feedback me rating <= 2
+  - flagged_rate   (15%) — flagged photos (duplicate / fake / geofence)
+
+Jis component ka data nahi hai wo chhod diya jata hai (weights baaki par
+normalize); koi data hi nahi to performance jaisa hai waisa rehta hai.
+Update / feedback / assignment commit hone par sirf affected contractors
+dobara gine jate hain; `/contractors/list` sirf column padhta hai.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, case
+from sqlalchemy.orm import Session
+
+from models import Contractor, ContractorPerformance, ContractorUpdate, Feedback, Project
+
+UPDATE_GAP = timedelta(days=30)
+STALE_AFTER = timedelta(days=1)   # khula gap waqt ke saath badhta hai — startup par purane scores dobara
+NEGATIVE_RATING = 2
+WEIGHTS = {"on_time_rate": 0.35, "efficiency": 0.30, "complaint_rate": 0.20, "flagged_rate": 0.15}
+
+
+def _on_time(db: Session, contractor_ids, now: datetime = None):
+    """{contractor_id: (updates, gaps <= 30 din, total gaps)}"""
+    now = now or datetime.now()
+    rows = (
+        db.query(ContractorUpdate.contractor_id, ContractorUpdate.project_id,
+                 ContractorUpdate.submitted_at, Project.status)
+        .outerjoin(Project, Project.id == ContractorUpdate.project_id)
+        .filter(ContractorUpdate.contractor_id.in_(contractor_ids))
+        .order_by(ContractorUpdate.contractor_id, ContractorUpdate.project_id,
+                  ContractorUpdate.submitted_at, ContractorUpdate.id)
+    )
+    out = {}
+    last = {}
+    open_projects = set()
+    for cid, pid, at, status in rows:
+        n, on_time, gaps = out.get(cid, (0, 0, 0))
+        prev = last.get((cid, pid))
+        if prev is not None and at is not None:
+            gaps += 1
+            on_time += (at - prev) <= UPDATE_GAP
+        if at is not None:
+            last[(cid, pid)] = at
+        if pid is not None and (status or "").lower() != "completed":
+            open_projects.add((cid, pid))
+        out[cid] = (n + 1, on_time, gaps)
+
+    # Khula gap: adhoore project par last update se ab tak 30 din se zyada — late
+    for cid, pid in open_projects:
+        prev = last.get((cid, pid))
+        if prev is not None and now - prev > UPDATE_GAP:
+            n, on_time, gaps = out[cid]
+            out[cid] = (n, on_time, gaps + 1)
+    return out
+
+
+def _efficiency(db: Session, contractor_ids):
+    """{contractor_id: budget-weighted min(1, progress / spent ratio)}"""
+    rows = (
+        db.query(Project.contractor_id, Project.budget, Project.spent, Project.progress_percent)
+        .filter(Project.contractor_id.in_(contractor_ids), Project.budget > 0)
+    )
+    acc = {}
+    for cid, budget, spent, progress in rows:
+        spent_ratio = (spent or 0) / budget
+        value = 1.0 if spent_ratio <= 0 else min(1.0, ((progress or 0) / 100) / spent_ratio)
+        weight, total = acc.get(cid, (0.0, 0.0))
+        acc[cid] = (weight + budget, total + budget * value)
+    return {cid: total / weight for cid, (weight, total) in acc.items()}
+
+
+def _feedback(db: Session, contractor_ids):
+    """{contractor_id: (feedback count, negative, flagged)}"""
+    rows = (
+        db.query(
+            Project.contractor_id,
+            func.count(Feedback.id),
+            func.sum(case((Feedback.rating <= NEGATIVE_RATING, 1), else_=0)),
+            func.sum(case((Feedback.is_flagged == 1, 1), else_=0)),
+        )
+        .join(Feedback, Feedback.project_id == Project.id)
+        .filter(Project.contractor_id.in_(contractor_ids))
+        .group_by(Project.contractor_id)
+    )
+    return {cid: (n, negative or 0, flagged or 0) for cid, n, negative, flagged in rows}
+
+
+def score_components(components: dict):
+    """0-5 score; None components skip, weights renormalized. Sab None -> None."""
+    total = weight = 0.0
+    for name, w in WEIGHTS.items():
+        value = components.get(name)
+        if value is None:
+            continue
+        good = 1 - value if name in ("complaint_rate", "flagged_rate") else value
+        total += w * good
+        weight += w
+    if not weight:
+        return None
+    return round(5 * total / weight, 2)
+
+
+def refresh_contractors(db: Session, contractor_ids):
+    """Sirf in contractors ke components dobara gino aur materialize karo."""
+    contractor_ids = {c for c in contractor_ids if c is not None}
+    if not contractor_ids:
+        return
+    ids = list(contractor_ids)
+    now = datetime.now()
+    on_time, efficiency, feedback = _on_time(db, ids, now), _efficiency(db, ids), _feedback(db, ids)
+
+    contractors = {c.id: c for c in db.query(Contractor).filter(Contractor.id.in_(ids))}
+    for cid in contractor_ids:
+        contractor = contractors.get(cid)
+        row = db.get(ContractorPerformance, cid)
+        if contractor is None:  # contractor delete ho chuka
+            if row is not None:
+                db.delete(row)
+            continue
+
+        n_updates, n_on_time, gaps = on_time.get(cid, (0, 0, 0))
+        n_feedback, negative, flagged = feedback.get(cid, (0, 0, 0))
+        components = {
+            "on_time_rate": n_on_time / gaps if gaps else None,
+            "efficiency": efficiency.get(cid),
+            "complaint_rate": negative / n_feedback if n_feedback else None,
+            "flagged_rate": flagged / n_feedback if n_feedback else None,
+        }
+        score = score_components(components)
+
+        if row is None:
+            row = ContractorPerformance(contractor_id=cid)
+            db.add(row)
+        row.updates = n_updates
+        row.feedback_count = n_feedback
+        for name, value in components.items():
+            setattr(row, name, round(value, 4) if value is not None else None)
+        row.score = score
+        row.computed_at = now
+        if score is not None:
+            contractor.performance = score
+
+    db.commit()
+
+
+def refresh_projects(db: Session, project_ids):
+    """Project level event (feedback, progress / spent change) -> uska contractor."""
+    project_ids = [p for p in set(project_ids) if p is not None]
+    if not project_ids:
+        return
+    rows = db.query(Project.contractor_id).filter(Project.id.in_(project_ids)).distinct()
+    refresh_contractors(db, [cid for (cid,) in rows])
+
+
+def rebuild_performance(db: Session):
+    refresh_contractors(db, [cid for (cid,) in db.query(Contractor.id)])
+
+
+def ensure_performance(db: Session):
+    oldest = db.query(func.min(ContractorPerformance.computed_at)).scalar()
+    if oldest is None or datetime.now() - oldest > STALE_AFTER:
+        rebuild_performance(db)
+
+
+def get_performance(db: Session, contractor_id: int):
+    row = db.get(ContractorPerformance, contractor_id)
+    if row is None:
+        return None
+    return {
+        "contractor_id": row.contractor_id,
+        "score": row.score,
+        "updates": row.updates,
+        "on_time_rate": row.on_time_rate,
+        "efficiency": row.efficiency,
+        "feedback_count": row.feedback_count,
+        "complaint_rate": row.complaint_rate,
+        "flagged_rate": row.flagged_rate,
+        "computed_at": row.computed_at.strftime("%Y-%m-%d %H:%M:%S") if row.computed_at else None,
+    }
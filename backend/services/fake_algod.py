@@ -0,0 +1,72 @@
+"""
+Local in-memory stand-in for algod.AlgodClient.
+
+Sync worker / verification ko bina network ke test karne ke liye: app call
+transactions ke "register" / "update" args ko contract jaisa hi box storage
+par apply karta hai (48 bytes = budget | spent | status_hash).
+
+    from algosdk import account, mnemonic
+    sk, _ = account.generate_account()
+    service = AlgorandService(client=FakeAlgodClient(), deployer_mnemonic=mnemonic.from_private_key(sk), app_id=1)
+"""
+import base64
+import threading
+
+
+class FakeAlgodClient:
+    def __init__(self, fail_times: int = 0):
+        self.fail_times = fail_times
+        self.boxes = {}           # project_id bytes -> 48 bytes
+        self.groups = []          # har send_transactions call ke txids
+        self.params_calls = 0
+        self.box_reads = 0
+        self._lock = threading.Lock()
+
+    def suggested_params(self):
+        from algosdk import transaction
+
+        self.params_calls += 1
+        return transaction.SuggestedParams(
+            fee=1000, first=1, last=1001,
+            gh=base64.b64encode(b"\x00" * 32).decode(), gen="fake-v1",
+            flat_fee=True, min_fee=1000,
+        )
+
+    def send_transactions(self, signed_txns):
+        with self._lock:
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise Exception("Fake algod: transaction rejected")
+
+            # Pehle sab validate, phir apply — atomic group jaisa
+            staged = dict(self.boxes)
+            for stxn in signed_txns:
+                args = stxn.transaction.app_args
+                op, box = args[0], args[1]
+                if op == b"register":
+                    if box in staged:
+                        raise Exception("Fake algod: box already exists")
+                    staged[box] = args[2] + args[3] + args[4]
+                elif op == b"update":
+                    if box not in staged:
+                        raise Exception("Fake algod: box does not exist")
+                    staged[box] = staged[box][:8] + args[2] + args[3]
+                else:
+                    raise Exception(f"Fake algod: unknown op {op!r}")
+            self.boxes = staged
+            txids = [stxn.get_txid() for stxn in signed_txns]
+            self.groups.append(txids)
+            return txids[0]
+
+    def send_transaction(self, signed_txn):
+        return self.send_transactions([signed_txn])
+
+    def application_box_by_name(self, app_id, box_name):
+        self.box_reads += 1
+        value = self.boxes.get(box_name)
+        if value is None:
+            raise Exception("Fake algod: box not found")
+        return {
+            "name": base64.b64encode(box_name).decode(),
+            "value": base64.b64encode(value).decode(),
+        }
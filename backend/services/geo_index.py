@@ -0,0 +1,268 @@
+"""
+Spatial index for villages and geotagged feedback.
+
+Points ko lat/lng grid cells (default 0.05° ≈ 5.5 km) me bucket kiya jata
+hai. Radius query sirf bounding box ke cells ke candidates uthati hai aur
+unki distance numpy se ek saath (vectorized haversine) nikalti hai.
+
+- geofence(village_id, lat, lng)      — feedback photo village ke paas hai ya nahi
+- villages_within                     — "N km ke andar" queries
+- feedback_clusters                   — point ke aas-paas feedback ka grid clustering
+
+Village centres location tree jaise hi `data_versions` ke "locations"
+counter se bandhe hain: `ensure_loaded` har LOCATION_VERSION_CHECK seconds
+me version dekhta hai, badla ho (doosre process / seed script ka write) to
+village index dobara banta hai.
+
+Feedback append-only hai, isliye feedback grid ek id high-water mark
+rakhta hai: usi check par `MAX(feedbacks.id)` aage badha ho (doosre
+uvicorn worker / process ne feedback likha) to sirf naye rows grid me
+jodte hain. Is process ke `add_feedback` wale ids dobara nahi judte.
+Catch-up mark se FEEDBACK_ID_OVERLAP peeche se padhta hai — PostgreSQL par
+chhoti id wala row baad me commit ho (sequence order != commit order) to
+bhi chhootta nahi.
+"""
+import math
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from services.location_tree import read_version, VERSION_CHECK_SECONDS
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEG_LAT = 111.32
+GEOFENCE_RADIUS_KM = 0.5   # village center se 500 m
+FEEDBACK_ID_OVERLAP = 1000
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def haversine_many(lat, lng, lats, lngs):
+    """Ek point se bahut saare points ki distance (km), numpy array."""
+    lat, lng = np.radians(lat), np.radians(lng)
+    lats, lngs = np.radians(np.asarray(lats, dtype=float)), np.radians(np.asarray(lngs, dtype=float))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def haversine_pairs(lats1, lngs1, lats2, lngs2):
+    """Element-wise distance between two equal-length coordinate arrays (km)."""
+    lats1, lngs1, lats2, lngs2 = (np.radians(np.asarray(x, dtype=float)) for x in (lats1, lngs1, lats2, lngs2))
+    a = np.sin((lats2 - lats1) / 2) ** 2 + np.cos(lats1) * np.cos(lats2) * np.sin((lngs2 - lngs1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class GridIndex:
+    """Fixed-size lat/lng grid buckets; payload per point kuch bhi ho sakta hai."""
+
+    def __init__(self, cell_deg: float = 0.05):
+        self.cell_deg = cell_deg
+        self.cells = {}
+        self.lats = []
+        self.lngs = []
+        self.payloads = []
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lng / self.cell_deg))
+
+    def add(self, lat, lng, payload):
+        slot = len(self.payloads)
+        self.lats.append(lat)
+        self.lngs.append(lng)
+        self.payloads.append(payload)
+        self.cells.setdefault(self._cell(lat, lng), []).append(slot)
+
+    def within(self, lat, lng, radius_km):
+        """[(distance_km, lat, lng, payload), ...] closest first."""
+        dlat = radius_km / KM_PER_DEG_LAT
+        dlng = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 0.01))
+        lo_r, lo_c = self._cell(lat - dlat, lng - dlng)
+        hi_r, hi_c = self._cell(lat + dlat, lng + dlng)
+
+        slots = []
+        for r in range(lo_r, hi_r + 1):
+            for c in range(lo_c, hi_c + 1):
+                slots.extend(self.cells.get((r, c), ()))
+        if not slots:
+            return []
+
+        lats = [self.lats[s] for s in slots]
+        lngs = [self.lngs[s] for s in slots]
+        dist = haversine_many(lat, lng, lats, lngs)
+        keep = np.nonzero(dist <= radius_km)[0]
+        keep = keep[np.argsort(dist[keep], kind="stable")]
+        return [(float(dist[i]), lats[i], lngs[i], self.payloads[slots[i]]) for i in keep]
+
+
+class GeoService:
+    def __init__(self, check_interval: float = VERSION_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._villages = {}            # village_id -> (lat, lng, name)
+        self._village_grid = GridIndex()
+        self._feedback_grid = GridIndex(cell_deg=0.01)
+        self._feedback_ids = set()     # grid me pehle se jo feedback hain
+        self._feedback_max_id = 0      # DB me kis id tak padh chuke
+        self.version = None            # "locations" version jis par village index bana
+        self._checked_at = 0.0
+        self.loaded = False
+
+    def _load_villages(self, db: Session):
+        from models import Village
+
+        version = read_version(db)   # pehle version — beech ka write agle check me pakda jayega
+        villages = {}
+        village_grid = GridIndex()
+        for v_id, name, lat, lng in db.query(Village.id, Village.name, Village.latitude, Village.longitude).filter(
+            Village.latitude != None, Village.longitude != None
+        ):
+            villages[v_id] = (lat, lng, name)
+            village_grid.add(lat, lng, v_id)
+        with self._lock:
+            self._villages = villages
+            self._village_grid = village_grid
+            self.version = version
+            self._checked_at = time.monotonic()
+
+    @staticmethod
+    def _feedback_rows(db: Session, after_id: int = 0):
+        from models import Feedback, Project
+
+        return (
+            db.query(Feedback.id, Feedback.latitude, Feedback.longitude, Feedback.rating,
+                     Feedback.is_flagged, Project.village_id)
+            .join(Project, Feedback.project_id == Project.id)
+            .filter(Feedback.id > after_id)
+            .filter(Feedback.latitude != None, Feedback.longitude != None)
+        )
+
+    @staticmethod
+    def _max_feedback_id(db: Session) -> int:
+        from models import Feedback
+
+        return db.query(func.coalesce(func.max(Feedback.id), 0)).scalar()
+
+    def load(self, db: Session):
+        self._load_villages(db)
+        max_id = self._max_feedback_id(db)
+        feedback_grid = GridIndex(cell_deg=0.01)
+        ids = set()
+        for fb_id, lat, lng, rating, flagged, village_id in self._feedback_rows(db):
+            if fb_id <= max_id:   # snapshot ke baad wale agle catch-up me
+                feedback_grid.add(lat, lng, (fb_id, rating, flagged, village_id))
+                ids.add(fb_id)
+
+        with self._lock:
+            self._feedback_grid = feedback_grid
+            self._feedback_ids = ids
+            self._feedback_max_id = max_id
+            self.loaded = True
+
+    def _catch_up_feedback(self, db: Session):
+        """Doosre process ke likhe naye feedback (id high-water mark ke baad) grid me jodo."""
+        max_id = self._max_feedback_id(db)
+        if max_id <= self._feedback_max_id:
+            return
+        after = max(self._feedback_max_id - FEEDBACK_ID_OVERLAP, 0)
+        rows = [r for r in self._feedback_rows(db, after) if r[0] <= max_id]
+        with self._lock:
+            for fb_id, lat, lng, rating, flagged, village_id in rows:
+                if fb_id not in self._feedback_ids:
+                    self._feedback_grid.add(lat, lng, (fb_id, rating, flagged, village_id))
+                    self._feedback_ids.add(fb_id)
+            self._feedback_max_id = max(self._feedback_max_id, max_id)
+
+    def ensure_loaded(self, db: Session):
+        if not self.loaded:
+            self.load(db)
+        elif self.check_interval is not None and time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            if read_version(db) != self.version:
+                self._load_villages(db)
+            self._catch_up_feedback(db)
+
+    def invalidate(self):
+        self.loaded = False
+
+    def add_feedback(self, fb_id, lat, lng, rating, is_flagged, village_id):
+        if lat is None or lng is None:
+            return
+        with self._lock:
+            if fb_id in self._feedback_ids:
+                return
+            self._feedback_grid.add(lat, lng, (fb_id, rating, is_flagged, village_id))
+            self._feedback_ids.add(fb_id)
+
+    # ---------- queries ----------
+    def geofence(self, village_id: int, lat: float, lng: float, radius_km: float = GEOFENCE_RADIUS_KM):
+        """
+        None agar village ke coordinates nahi hain,
+        warna {"inside": bool, "distance_km": float, "village": name}
+        """
+        village = self._villages.get(village_id)
+        if not village:
+            return None
+        v_lat, v_lng, name = village
+        dist = haversine_km(lat, lng, v_lat, v_lng)
+        return {"inside": dist <= radius_km, "distance_km": dist, "village": name}
+
+    def batch_distances(self, village_ids, lats, lngs):
+        """
+        Bahut saare (village_id, lat, lng) points ki apne village center se
+        distance ek vectorized pass me. Village coords na hon to NaN.
+        """
+        centers = [self._villages.get(v_id) for v_id in village_ids]
+        c_lats = [c[0] if c else np.nan for c in centers]
+        c_lngs = [c[1] if c else np.nan for c in centers]
+        return haversine_pairs(lats, lngs, c_lats, c_lngs)
+
+    def villages_within(self, lat, lng, radius_km):
+        """[(distance_km, village_id), ...]"""
+        return [(d, v_id) for d, _, _, v_id in self._village_grid.within(lat, lng, radius_km)]
+
+    def feedback_clusters(self, lat, lng, radius_km, cell_km: float = 0.5):
+        """Radius ke andar ke feedback ko cell_km grid me group karo."""
+        with self._lock:
+            hits = self._feedback_grid.within(lat, lng, radius_km)
+        if not hits:
+            return []
+
+        cell_lat = cell_km / KM_PER_DEG_LAT
+        cell_lng = cell_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 0.01))
+        clusters = {}
+        for _, f_lat, f_lng, (fb_id, rating, flagged, village_id) in hits:
+            key = (math.floor(f_lat / cell_lat), math.floor(f_lng / cell_lng))
+            c = clusters.setdefault(key, {"lats": [], "lngs": [], "ratings": [], "flagged": 0, "ids": []})
+            c["lats"].append(f_lat)
+            c["lngs"].append(f_lng)
+            c["ratings"].append(rating or 0)
+            c["flagged"] += 1 if flagged else 0
+            c["ids"].append(fb_id)
+
+        result = []
+        for c in clusters.values():
+            c_lat, c_lng = float(np.mean(c["lats"])), float(np.mean(c["lngs"]))
+            result.append({
+                "latitude": round(c_lat, 6),
+                "longitude": round(c_lng, 6),
+                "count": len(c["ids"]),
+                "flagged": c["flagged"],
+                "avg_rating": round(float(np.mean(c["ratings"])), 2),
+                "distance_km": round(haversine_km(lat, lng, c_lat, c_lng), 3),
+                "feedback_ids": c["ids"],
+            })
+        result.sort(key=lambda c: (-c["count"], c["distance_km"]))
+        return result
+
+
+geo_service = GeoService()
@@ -0,0 +1,100 @@
+"""
+Feedback image ingestion pipeline.
+
+Stages (sab blocking kaam event loop ke bahar, IMAGE_POOL threads me):
+  1. stream_to_disk  — upload ko chunks me disk par likho aur saath me SHA-256
+  2. process_image   — image ek hi baar decode: perceptual hash + fake-detection
+                       + timestamp overlay + save
+
+Thread pool (process pool nahi) kyunki PIL decode/encode GIL chhod deta hai
+aur Windows dev machines par process pool ke liye __main__ guard chahiye.
+"""
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+CHUNK_SIZE = 64 * 1024
+IMAGE_POOL = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("IMAGE_WORKERS", min(4, os.cpu_count() or 1))),
+    thread_name_prefix="image-pipeline",
+)
+
+
+async def run_in_pool(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(IMAGE_POOL, fn, *args)
+
+
+def stream_to_disk(src, dest_path: str) -> str:
+    """Upload file object ko chunk-by-chunk copy karo; SHA-256 hex return karta hai."""
+    digest = hashlib.sha256()
+    src.seek(0)
+    with open(dest_path, "wb") as buffer:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            buffer.write(chunk)
+    return digest.hexdigest()
+
+
+def process_image(path: str, latitude=None, longitude=None, check_fake: bool = True):
+    """
+    Decode once, then:
+      - fake/edit heuristics (agar check_fake)
+      - timestamp + location overlay, original file overwrite
+      - perceptual hash saved (overlay wali) image ka — backfill bhi
+        uploads/ ki file se hi hash karta hai, dono same pixels naapte hain
+    Returns {"phash": str|None, "fake_detected": bool, "fake_reason": str|None}
+    """
+    from PIL import Image, ImageDraw, ImageFont
+    from routers.ai import inspect_image
+    from services.phash_index import dhash, dhash_file
+
+    result = {"phash": None, "fake_detected": False, "fake_reason": None}
+
+    try:
+        img = Image.open(path)
+        img.load()
+    except Exception as e:
+        print(f"Image decode failed: {e}")
+        return result
+
+    # AI Fake Detection
+    if check_fake:
+        result["fake_detected"], result["fake_reason"] = inspect_image(img)
+
+    # Metadata Overlay
+    try:
+        draw = ImageDraw.Draw(img)
+
+        # Simple timestamp & location text
+        text = f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
+        if latitude and longitude:
+            text += f"Lat: {latitude:.4f}, Long: {longitude:.4f}"
+
+        # Try standard fonts if available, else default
+        try:
+            font = ImageFont.truetype("arial.ttf", 20)
+        except Exception:
+            font = ImageFont.load_default()
+
+        # Draw text (Top-left, Red color for visibility)
+        draw.text((10, 10), text, fill="red", font=font)
+
+        # Overwrite original
+        img.save(path)
+
+    except Exception as e:
+        print(f"Overlay Failed: {e}")
+        result["phash"] = dhash_file(path)   # file jaisi thi waisi — usi ka hash
+        return result
+
+    try:
+        result["phash"] = dhash(img)
+    except Exception as e:
+        print(f"pHash failed: {e}")
+    return result
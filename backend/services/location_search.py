@@ -0,0 +1,266 @@
+"""
+Typeahead search over State / District / Block / Village names.
+
+Har naam ek phonetic key me fold hota hai — Devanagari pehle Latin me
+transliterate, phir dono scripts ke common spelling variants ek jaise
+(aa/a, ee/i, w/v, sh/s, kh/k, word ke end ka schwa "a" ...). Isliye
+"लखनऊ", "Lakhnau" aur "lucknow" ek doosre ke paas aate hain.
+
+Index (location tree ke har version par ek baar, memory me):
+  - prefix: saare word keys + full-name keys sorted; bisect se prefix range
+  - trigram: folded naam aur consonant skeleton ke trigrams -> posting arrays;
+    prefix se poore results na mile to fuzzy overlap score
+"""
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+LEVELS = ("state", "district", "block", "village")
+FUZZY_MIN_SCORE = 0.5
+
+# ---------- Devanagari -> Latin ----------
+_VOWELS = {
+    "अ": "a", "आ": "aa", "इ": "i", "ई": "ii", "उ": "u", "ऊ": "uu", "ऋ": "ri",
+    "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au",
+}
+_MATRAS = {
+    "ा": "aa", "ि": "i", "ी": "ii", "ु": "u", "ू": "uu", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au",
+}
+_CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n",
+    "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n",
+    "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m",
+    "य": "y", "र": "r", "ल": "l", "व": "v",
+    "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+}
+_NUKTA_FORMS = {"क": "q", "ख": "kh", "ग": "g", "ज": "z", "ड": "r", "ढ": "rh", "फ": "f"}   # base + nukta
+_VIRAMA, _NUKTA = "्", "़"
+_NASAL = {"ं": "n", "ँ": "n", "ः": "h"}
+
+
+def _aksharas(text: str):
+    """[consonant, vowel, base]; vowel None = inherent "a", "" = virama. Non-letters: consonant None."""
+    out = []
+    for ch in text:
+        if ch in _CONSONANTS:
+            out.append([_CONSONANTS[ch], None, ch])
+        elif ch == _NUKTA:
+            if out and out[-1][2] in _NUKTA_FORMS:
+                out[-1][0] = _NUKTA_FORMS[out[-1][2]]
+        elif ch in _MATRAS and out and out[-1][0]:
+            out[-1][1] = _MATRAS[ch]
+        elif ch == _VIRAMA and out and out[-1][0]:
+            out[-1][1] = ""
+        elif ch in _VOWELS:
+            out.append(["", _VOWELS[ch], ch])
+        else:
+            out.append([None, _NASAL.get(ch, ch), ch])
+    return out
+
+
+def transliterate(text: str) -> str:
+    """
+    Simple Devanagari -> Latin with schwa deletion, right to left: word ke end
+    ka inherent "a" girta hai, aur beech ka tab jab pichla akshar vowel par
+    khatam ho aur agla consonant + (bacha hua) vowel ho
+    (नगर -> nagar, गोमती -> gomti, लखनऊ -> lakhnau).
+    """
+    aks = _aksharas(unicodedata.normalize("NFD", text))
+    for i in range(len(aks) - 1, -1, -1):
+        cons, vowel, _ = aks[i]
+        if not cons or vowel is not None:
+            continue
+        nxt = aks[i + 1] if i + 1 < len(aks) else None
+        if nxt is None or nxt[0] is None:
+            aks[i][1] = "" if i > 0 and aks[i - 1][0] else "a"   # ek akshar wale word me "a" rehne do
+            continue
+        prev_open = i > 0 and aks[i - 1][0] is not None and aks[i - 1][1] != ""
+        aks[i][1] = "" if prev_open and nxt[0] and nxt[1] else "a"
+    return "".join(vowel if cons is None else cons + vowel for cons, vowel, _ in aks)
+
+
+# ---------- folding ----------
+_FOLDS = (
+    ("chh", "c"), ("ch", "c"), ("ck", "k"), ("kh", "k"), ("gh", "g"), ("jh", "j"),
+    ("th", "t"), ("dh", "d"), ("ph", "f"), ("bh", "b"), ("sh", "s"), ("rh", "r"),
+    ("aa", "a"), ("ee", "i"), ("ii", "i"), ("oo", "u"), ("uu", "u"), ("ou", "au"),
+    ("ow", "au"), ("w", "v"), ("z", "j"), ("q", "k"), ("x", "ks"),
+)
+
+
+def fold_word(word: str) -> str:
+    for a, b in _FOLDS:
+        word = word.replace(a, b)
+    # doubled letters (Allahabad / Alahabad) aur word-end schwa (Rama / Ram)
+    out = []
+    for ch in word:
+        if not out or out[-1] != ch:
+            out.append(ch)
+    word = "".join(out)
+    if len(word) > 3 and word.endswith("a"):
+        word = word[:-1]
+    return word
+
+
+def fold(text: str):
+    """Naam / query -> folded words (list)."""
+    if any("ऀ" <= ch <= "ॿ" for ch in text):
+        text = transliterate(text)
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch if ch.isalnum() else " " for ch in text if not unicodedata.combining(ch))
+    return [fold_word(w) for w in text.split() if w]
+
+
+def skeleton(word: str) -> str:
+    """Pehle letter ke baad vowels hatao — "lakanau" / "luknov" jaise spellings ke liye."""
+    return word[:1] + "".join(ch for ch in word[1:] if ch not in "aeiouy")
+
+
+def trigrams(text: str):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _query_grams(words):
+    grams = trigrams(" ".join(words))
+    grams |= {"#" + g for g in trigrams(" ".join(skeleton(w) for w in words))}
+    return grams
+
+
+class LocationSearchIndex:
+    def __init__(self, tree):
+        self.version = tree.version
+        self.levels = array("b")
+        self.ids = array("i")
+        self.names = []
+        self.parents = []          # entry -> parent entry (-1 for states)
+        self.lengths = array("i")  # entry -> trigram count, fuzzy score normalize karne ke liye
+        prefix = []
+        grams = {}
+
+        def add(level, loc_id, name, parent):
+            entry = len(self.names)
+            self.levels.append(level)
+            self.ids.append(loc_id)
+            self.names.append(name)
+            self.parents.append(parent)
+            words = fold(name)
+            for w in set(words) | {" ".join(words)}:
+                prefix.append((w, entry))
+            entry_grams = _query_grams(words)
+            self.lengths.append(len(entry_grams))
+            for g in entry_grams:
+                posting = grams.get(g)
+                if posting is None:
+                    posting = grams[g] = array("i")
+                posting.append(entry)
+            return entry
+
+        for state_id, state_name in tree.states:
+            s = add(0, state_id, state_name, -1)
+            for district_id, district_name in tree.districts.get(state_id, []):
+                d = add(1, district_id, district_name, s)
+                for block_id, block_name in tree.blocks.get(district_id, []):
+                    b = add(2, block_id, block_name, d)
+                    for village_id, village_name in tree.villages.get(block_id, []):
+                        add(3, village_id, village_name, b)
+
+        prefix.sort()
+        self.prefix_keys = [k for k, _ in prefix]
+        self.prefix_entries = array("i", (e for _, e in prefix))
+        # numpy arrays — fuzzy scoring ek bincount me
+        self.grams = {g: np.frombuffer(p, dtype=np.int32) for g, p in grams.items()}
+        self.levels = np.frombuffer(self.levels, dtype=np.int8)
+        self.lengths = np.frombuffer(self.lengths, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _result(self, entry, score):
+        path = []
+        parent = self.parents[entry]
+        while parent >= 0:
+            path.append({"level": LEVELS[self.levels[parent]], "id": self.ids[parent], "name": self.names[parent]})
+            parent = self.parents[parent]
+        return {
+            "level": LEVELS[self.levels[entry]],
+            "id": self.ids[entry],
+            "name": self.names[entry],
+            "path": path[::-1],
+            "score": round(score, 3),
+        }
+
+    def _prefix_matches(self, key, level, cap):
+        found = {}
+        i = bisect_left(self.prefix_keys, key)
+        while i < len(self.prefix_keys) and self.prefix_keys[i].startswith(key):
+            entry = self.prefix_entries[i]
+            if level is None or self.levels[entry] == level:
+                exact = self.prefix_keys[i] == key
+                found[entry] = max(found.get(entry, 0), 1.0 if exact else 0.9)
+                if len(found) >= cap:
+                    break
+            i += 1
+        return found
+
+    def _fuzzy_matches(self, words, level, limit):
+        query_grams = _query_grams(words)
+        postings = [self.grams[g] for g in query_grams if g in self.grams]
+        if not postings:
+            return {}
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.names))
+        # Dice 2s / (q + n) >= m tabhi ho sakta hai jab s >= m * q / (2 - m) — pehle
+        # isi se candidates chhaanto, score sirf unka (poore array par float math nahi)
+        min_shared = FUZZY_MIN_SCORE * len(query_grams) / (2 - FUZZY_MIN_SCORE)
+        candidates = np.flatnonzero(shared >= min_shared)
+        if level is not None:
+            candidates = candidates[self.levels[candidates] == level]
+        scores = 2 * shared[candidates] / (len(query_grams) + self.lengths[candidates])
+        keep = scores >= FUZZY_MIN_SCORE
+        candidates, scores = candidates[keep], scores[keep]
+        if len(candidates) > limit * 4:
+            top = np.argpartition(-scores, limit * 4)[:limit * 4]
+            candidates, scores = candidates[top], scores[top]
+        return {int(e): float(s) * 0.85 for e, s in zip(candidates, scores)}
+
+    def search(self, query: str, level: str = None, limit: int = 10):
+        words = fold(query)
+        if not words:
+            return []
+        level_code = LEVELS.index(level) if level in LEVELS else None
+        found = self._prefix_matches(" ".join(words), level_code, limit * 4)
+        if len(found) < limit and len("".join(words)) >= 3:
+            for entry, score in self._fuzzy_matches(words, level_code, limit).items():
+                if score > found.get(entry, 0):
+                    found[entry] = score
+        # score, phir badi unit pehle (state > village), phir chhota naam
+        ranked = sorted(found.items(), key=lambda e: (-e[1], self.levels[e[0]], len(self.names[e[0]]), e[0]))
+        return [self._result(entry, score) for entry, score in ranked[:limit]]
+
+
+class LocationSearch:
+    """Location tree version badalne par index dobara banta hai."""
+
+    def __init__(self):
+        self._index = None
+        self._lock = threading.Lock()
+
+    def current(self, tree) -> LocationSearchIndex:
+        index = self._index
+        if index is None or index.version != tree.version:
+            with self._lock:
+                index = self._index
+                if index is None or index.version != tree.version:
+                    index = LocationSearchIndex(tree)
+                    self._index = index
+                    print(f"[Locations] Search index built: {len(index)} names (version {tree.version})")
+        return index
+
+
+location_search = LocationSearch()
@@ -0,0 +1,133 @@
+"""
+In-memory location hierarchy (state -> district -> block -> village).
+
+Locations lagbhag kabhi nahi badalte, phir bhi har dropdown SQLite hit
+karta tha. Poora tree ek baar 4 column queries se memory me aata hai;
+`data_versions` table ka "locations" counter har write par badhta hai
+(seed_locations.py, admin API). `current()` har LOCATION_VERSION_CHECK
+seconds me sirf ye ek row dekhta hai — badla ho to tree reload.
+
+Tree ka ETag content hash hai, isliye clients If-None-Match bhej kar
+304 le sakte hain.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+VERSION_NAME = "locations"
+VERSION_CHECK_SECONDS = float(os.environ.get("LOCATION_VERSION_CHECK", 5))
+
+
+def read_version(db: Session) -> int:
+    from models import DataVersion
+
+    row = db.get(DataVersion, VERSION_NAME)
+    return row.version if row else 0
+
+
+def bump_version(db: Session) -> int:
+    """Location write ke baad call karo (commit bhi yahin hota hai)."""
+    from models import DataVersion
+
+    row = db.get(DataVersion, VERSION_NAME)
+    if row is None:
+        row = DataVersion(name=VERSION_NAME, version=0)
+        db.add(row)
+    row.version = (row.version or 0) + 1
+    db.commit()
+    return row.version
+
+
+class LocationTree:
+    """Immutable snapshot; swap hota hai, mutate nahi."""
+
+    def __init__(self, version, states, districts, blocks, villages):
+        self.version = version
+        self.states = states                   # [(id, name)]
+        self.districts = districts             # state_id -> [(id, name)]
+        self.blocks = blocks                   # district_id -> [(id, name)]
+        self.villages = villages               # block_id -> [(id, name)]
+        self.state_names = dict(states)
+        self.district_names = {i: n for ds in districts.values() for i, n in ds}
+        self.block_names = {i: n for bs in blocks.values() for i, n in bs}
+        payload = json.dumps([states, list(districts.items()), list(blocks.items()), list(villages.items())], default=str)
+        self.etag = f'W/"loc-{hashlib.sha1(payload.encode()).hexdigest()[:16]}"'
+
+    def subtree(self, state_id=None, district_id=None, block_id=None):
+        """Sabse specific id ka subtree; kuch na diya to saare states. Id na mile to None."""
+        if block_id:
+            name = self.block_names.get(block_id)
+            return self.block_node(block_id, name) if name is not None else None
+        if district_id:
+            name = self.district_names.get(district_id)
+            return self.district_node(district_id, name) if name is not None else None
+        if state_id:
+            name = self.state_names.get(state_id)
+            return self.state_node(state_id, name) if name is not None else None
+        return [self.state_node(*s) for s in self.states]
+
+    def _node(self, node_id, name, children=None):
+        node = {"id": node_id, "name": name}
+        if children is not None:
+            node["children"] = children
+        return node
+
+    def block_node(self, block_id, name):
+        return self._node(block_id, name, [self._node(*v) for v in self.villages.get(block_id, [])])
+
+    def district_node(self, district_id, name):
+        return self._node(district_id, name, [self.block_node(*b) for b in self.blocks.get(district_id, [])])
+
+    def state_node(self, state_id, name):
+        return self._node(state_id, name, [self.district_node(*d) for d in self.districts.get(state_id, [])])
+
+
+class LocationTreeCache:
+    def __init__(self, check_interval: float = VERSION_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self._tree = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> LocationTree:
+        from models import State, District, Block, Village
+
+        version = read_version(db)
+        states = [(i, n) for i, n in db.query(State.id, State.name).order_by(State.id)]
+        districts, blocks, villages = {}, {}, {}
+        for i, n, parent in db.query(District.id, District.name, District.state_id).order_by(District.id):
+            districts.setdefault(parent, []).append((i, n))
+        for i, n, parent in db.query(Block.id, Block.name, Block.district_id).order_by(Block.id):
+            blocks.setdefault(parent, []).append((i, n))
+        for i, n, parent in db.query(Village.id, Village.name, Village.block_id).order_by(Village.id):
+            villages.setdefault(parent, []).append((i, n))
+
+        tree = LocationTree(version, states, districts, blocks, villages)
+        with self._lock:
+            self._tree = tree  # atomic swap
+            self._checked_at = time.monotonic()
+        print(f"[Locations] Loaded {len(states)} states, {len(tree.district_names)} districts, "
+              f"{len(tree.block_names)} blocks (version {version})")
+        return tree
+
+    def current(self, db: Session) -> LocationTree:
+        tree = self._tree
+        if tree is None:
+            return self.load(db)
+        if self.check_interval is not None and time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            if read_version(db) != tree.version:
+                return self.load(db)
+        return tree
+
+    def invalidate(self, db: Session):
+        """Isi process ka write — version bump + turant reload."""
+        bump_version(db)
+        return self.load(db)
+
+
+location_cache = LocationTreeCache()
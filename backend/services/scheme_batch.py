@@ -0,0 +1,224 @@
+"""
+Batch scheme eligibility for household surveys.
+
+Survey me har vyakti ke liye `/ai/schemes/chat` call karne ki jagah poore
+batch ko ek saath score kiya jata hai. Scoring rules wahi hain jo
+`SchemeIndex.match_indices` ke hain, bas profiles ek numpy matrix me:
+
+  - har eligibility class ke liye rule columns (gender / occupation /
+    caste bitmask -> bool row, income / min_age thresholds -> arrays)
+  - batch ke har profile ka class score ek (profiles x classes) array,
+    fir class_of se (profiles x schemes) aur keyword hits add
+  - stable argsort se top 6 (tie me catalogue order, purane engine jaisa)
+
+Gender / occupation / caste ke unique values ka mask ek hi baar banta hai.
+"""
+import csv
+import io
+import json
+
+import numpy as np
+
+from services.scheme_index import TOP_N, _NO_MIN_AGE
+
+BATCH_SIZE = 512
+PROFILE_FIELDS = ("age", "gender", "occupation", "income", "caste", "education")
+# Chat request wale naam bhi chalte hain
+FIELD_ALIASES = {
+    "income_per_month": "income",
+    "caste_category": "caste",
+    "category": "occupation",
+}
+
+
+def _bits(mask: int, n: int):
+    return np.array([(mask >> c) & 1 for c in range(n)], dtype=bool)
+
+
+def parse_profile(raw: dict):
+    """CSV / JSONL row -> (SchemeIndex.match jaisa profile, row id). Galat number par ValueError."""
+    row = {}
+    for key, value in raw.items():
+        if key is None:
+            continue
+        key = FIELD_ALIASES.get(key.strip().lower(), key.strip().lower())
+        if isinstance(value, str):
+            value = value.strip()
+        if value in ("", None):
+            continue
+        row.setdefault(key, value)
+
+    profile = {f: row.get(f) for f in PROFILE_FIELDS}
+    if profile["age"] is not None:
+        profile["age"] = int(float(profile["age"]))
+    if profile["income"] is not None:
+        profile["income"] = float(profile["income"])
+    for f in ("gender", "occupation", "caste", "education"):
+        if profile[f] is not None:
+            profile[f] = str(profile[f])
+    return profile, row.get("id")
+
+
+class BatchScorer:
+    """Ek catalogue snapshot + ek (optional) survey message par vectorized scoring."""
+
+    def __init__(self, index, message: str = ""):
+        self.index = index
+        n_classes = len(index.signatures)
+        self.n_classes = n_classes
+
+        query = message.lower()
+        keywords, general, self.student_query = index.query_features(query)
+        self.general = 1 if general else 0
+
+        self.class_of = np.asarray(index.class_of, dtype=np.intp)
+        hits = index.keyword_hits(keywords)
+        self.keyword_score = np.zeros(len(index), dtype=np.int64)
+        for idx, count in hits.items():
+            self.keyword_score[idx] = 3 * count
+
+        self.neutral = _bits(index.neutral_mask, n_classes)
+        self.no_income = _bits(index.no_income_mask, n_classes)
+        self.scholar = _bits(index.scholar_mask, n_classes)
+
+        max_income = np.full(n_classes, np.nan)
+        min_age = np.full(n_classes, -np.inf)
+        for cls, (_, _, income_cap, _, age, _) in enumerate(index.signatures):
+            if income_cap:
+                max_income[cls] = income_cap
+            if age is not _NO_MIN_AGE:
+                min_age[cls] = age
+        self.max_income = max_income
+        self.min_age = min_age
+
+        self._gender, self._occupation, self._caste = {}, {}, {}
+
+    # ---------- unique-value rule rows ----------
+    def _row(self, cache, key, build):
+        row = cache.get(key)
+        if row is None:
+            row = cache[key] = _bits(build(key), self.n_classes) if key is not None else np.zeros(self.n_classes, bool)
+        return row
+
+    def _gender_rows(self, values):
+        return np.stack([
+            self._row(self._gender, v.lower() if v else None, self.index.gender_mask) for v in values
+        ])
+
+    def _occupation_rows(self, values):
+        return np.stack([
+            self._row(self._occupation, v.lower() if v else None, self.index.occupation_mask) for v in values
+        ])
+
+    def _caste_rows(self, values):
+        return np.stack([
+            self._row(self._caste, v.upper() if v else None, lambda c: self.index.caste_masks.get(c, 0))
+            for v in values
+        ])
+
+    # ---------- scoring ----------
+    def class_scores(self, profiles):
+        """(profiles x classes) int array; age se bahar classes -1."""
+        ages = np.array([p["age"] or 0 for p in profiles], dtype=float)
+        incomes = np.array([p["income"] or 0 for p in profiles], dtype=float)
+        has_age = ages != 0
+        has_income = incomes != 0
+
+        scores = np.full((len(profiles), self.n_classes), self.general, dtype=np.int64)
+        scores += self.neutral
+        scores += 8 * self._gender_rows([p["gender"] for p in profiles])
+        scores += 8 * self._occupation_rows([p["occupation"] for p in profiles])
+        with np.errstate(invalid="ignore"):
+            under_cap = incomes[:, None] <= self.max_income[None, :]   # NaN cap -> False
+        scores += 5 * (under_cap & has_income[:, None])
+        scores += self.no_income[None, :] & has_income[:, None]
+        scores += 10 * self._caste_rows([p["caste"] for p in profiles])
+        scholar = np.array([
+            bool(p["education"] and self.student_query or (p["occupation"] and "student" in p["occupation"].lower()))
+            for p in profiles
+        ])
+        scores += 4 * (self.scholar[None, :] & scholar[:, None])
+
+        too_young = has_age[:, None] & (self.min_age[None, :] > ages[:, None])
+        scores[too_young] = -1
+        return scores
+
+    def match_indices(self, profiles, limit: int = TOP_N):
+        """Har profile ke top scheme positions (index.schemes me), best first."""
+        if not profiles:
+            return []
+        base = self.class_scores(profiles)[:, self.class_of]
+        scores = np.where(base >= 0, base + self.keyword_score[None, :], 0)
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :limit]
+        top = np.take_along_axis(scores, order, axis=1)
+        return [[int(i) for i, s in zip(ids, row) if s > 0] for ids, row in zip(order, top)]
+
+
+# ---------- streaming input ----------
+def jsonl_parser():
+    """line -> (row, error) ya None (khali line)."""
+    def parse(line):
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            return None, f"invalid JSON: {e}"
+        if not isinstance(row, dict):
+            return None, "row must be a JSON object"
+        return row, None
+    return parse
+
+
+def csv_parser():
+    """Pehli non-empty line header hai; baaki jsonl_parser jaisa."""
+    header = []
+
+    def parse(line):
+        if not line.strip():
+            return None
+        values = next(csv.reader(io.StringIO(line)))
+        if not header:
+            header.extend(v.strip() for v in values)
+            return None
+        return dict(zip(header, values)), None
+    return parse
+
+
+def line_parser(content_type: str, fmt: str = None):
+    return csv_parser() if detect_format(content_type, fmt) == "csv" else jsonl_parser()
+
+
+def detect_format(content_type: str, fmt: str = None) -> str:
+    if fmt:
+        return "csv" if fmt.lower() == "csv" else "jsonl"
+    return "csv" if "csv" in (content_type or "").lower() else "jsonl"
+
+
+def score_rows(scorer: BatchScorer, rows, start: int = 0):
+    """[(raw row | None, error)] -> NDJSON result lines, input order me."""
+    index = scorer.index
+    results = [None] * len(rows)
+    profiles, positions, ids = [], [], []
+    for pos, (raw, error) in enumerate(rows):
+        if error is None:
+            try:
+                profile, row_id = parse_profile(raw)
+            except (TypeError, ValueError) as e:
+                error = f"invalid profile: {e}"
+            else:
+                profiles.append(profile)
+                positions.append(pos)
+                ids.append(row_id)
+        if error is not None:
+            results[pos] = {"row": start + pos, "error": error}
+
+    for pos, row_id, matched in zip(positions, ids, scorer.match_indices(profiles)):
+        result = {"row": start + pos}
+        if row_id is not None:
+            result["id"] = row_id
+        result["schemes_found"] = len(matched)
+        result["scheme_names"] = [index.schemes[i]["name"] for i in matched]
+        results[pos] = result
+    return [json.dumps(r, ensure_ascii=False) + "\n" for r in results]
@@ -0,0 +1,111 @@
+"""
+Scheme catalogue loader with hot reload.
+
+Schemes ab code me nahi, `data/schemes.json` (ya env SCHEMES_PATH) me hain:
+
+    {"version": 3, "schemes": [{...}, ...]}
+
+File ek baar padh kar `SchemeIndex` compile hota hai. `current()` har
+SCHEMES_RELOAD_CHECK seconds me file ka mtime dekhta hai — badla ho to
+naya index bana kar ek hi reference assignment se swap karta hai. Jo
+request purana index pakad chuki hai wo usi se poori hoti hai. Galat
+file aane par purana catalogue chalta rehta hai aur error status me dikhta hai.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from services.scheme_index import SchemeIndex
+from services.scheme_responses import build_fragments, ResponseCache
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "schemes.json")
+RELOAD_CHECK_SECONDS = float(os.environ.get("SCHEMES_RELOAD_CHECK", 5))
+REQUIRED_FIELDS = ("name", "hindi", "amount", "for", "description", "how_to_apply", "documents")
+
+
+def _validate(schemes):
+    if not isinstance(schemes, list):
+        raise ValueError("'schemes' must be a list")
+    for pos, scheme in enumerate(schemes):
+        missing = [f for f in REQUIRED_FIELDS if f not in scheme]
+        if missing:
+            raise ValueError(f"scheme #{pos} ({scheme.get('name', '?')}) missing fields: {', '.join(missing)}")
+
+
+class SchemeCatalogue:
+    def __init__(self, path: str = None, check_interval: float = RELOAD_CHECK_SECONDS):
+        self.path = path or os.environ.get("SCHEMES_PATH", DEFAULT_PATH)
+        self.check_interval = check_interval
+        self._index = None
+        self._info = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self._reload_lock = threading.Lock()
+        self.last_error = None
+
+    def load(self):
+        """File padho, compile karo, swap karo. Fail hone par purana index rehta hai."""
+        with self._reload_lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                mtime = None
+            try:
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+                data = json.loads(raw.decode("utf-8"))
+                schemes = data["schemes"] if isinstance(data, dict) else data
+                _validate(schemes)
+                index = SchemeIndex(schemes)
+                # Pre-rendered Markdown blocks + response cache index ke saath hi swap hote hain
+                index.fragments = build_fragments(index.schemes)
+                index.responses = ResponseCache()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                self._mtime = mtime  # same broken file baar-baar parse mat karo
+                self._checked_at = time.monotonic()
+                print(f"[Schemes] Catalogue load failed, keeping previous: {self.last_error}")
+                if self._index is None:
+                    raise
+                return False
+
+            self._info = {
+                "version": data.get("version") if isinstance(data, dict) else None,
+                "schemes": len(index),
+                "sha256": hashlib.sha256(raw).hexdigest(),
+                "loaded_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            self._index = index  # atomic swap
+            self._mtime = mtime
+            self._checked_at = time.monotonic()
+            self.last_error = None
+            print(f"[Schemes] Loaded {len(index)} schemes (version {self._info['version']})")
+            return True
+
+    def _changed(self):
+        try:
+            return os.path.getmtime(self.path) != self._mtime
+        except OSError:
+            return False
+
+    def current(self) -> SchemeIndex:
+        if self._index is None:
+            self.load()
+        elif self.check_interval and time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            if self._changed():
+                self.load()
+        return self._index
+
+    def info(self):
+        info = {"path": self.path, **self._info, "last_error": self.last_error}
+        if self._index is not None:
+            info["response_cache"] = self._index.responses.stats()
+        return info
+
+
+# Singleton — pehli request (ya startup) par load hota hai
+scheme_catalogue = SchemeCatalogue()
@@ -0,0 +1,274 @@
+"""
+Compiled matching index for the schemes assistant.
+
+Purana `find_matching_schemes` har message par poora catalogue loop karta
+tha. Yahan catalogue ek baar compile hota hai:
+
+  - keyword postings: saare keywords + name / hindi words ek Aho-Corasick
+    automaton me, query par ek hi pass me pata chal jata hai kaunse keyword
+    (substring match, purane `kw in query` jaisa hi) kis scheme ke hain
+  - eligibility classes: same (gender, occupation, income, caste, age,
+    scholarship) wali schemes ek class me; har profile rule class-level
+    bitmask hai, to profile score har class ke liye ek baar nikalta hai
+  - candidates: keyword wali schemes + har class ki pehli 6 schemes
+    (bina keyword ke same class ki schemes ka score barabar hota hai,
+    aur tie me catalogue order chalta hai) — baaki schemes score hi nahi hoti
+
+Result purane linear engine jaisa hi hai (same score, same order, top 6).
+"""
+from bisect import bisect_left, bisect_right
+from collections import Counter, deque
+
+GENERAL_TRIGGERS = (
+    "scheme", "yojana", "help", "madad", "sarkari", "government", "benefit", "labh", "kya", "chahiye", "milega",
+)
+TOP_N = 6
+_NO_MIN_AGE = object()
+
+
+class KeywordAutomaton:
+    """Aho-Corasick over keyword strings; `find` returns the set of keywords present in text."""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for kw in set(keywords):
+            if not kw:
+                continue
+            node = 0
+            for ch in kw:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                node = nxt
+            self.out[node] = (kw,)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find(self, text: str):
+        found = set()
+        node = 0
+        goto, fail, out = self.goto, self.fail, self.out
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+def scheme_keywords(scheme: dict):
+    """Wahi list jo purana engine har scheme ke liye har baar banata tha."""
+    return scheme.get("keywords", []) + scheme["name"].lower().split() + scheme["hindi"].lower().split()
+
+
+def _signature(scheme: dict):
+    occupations = scheme.get("for_occupation")
+    castes = scheme.get("for_caste")
+    return (
+        scheme.get("for_gender") or None,
+        tuple(occupations) if occupations else None,
+        scheme.get("max_income") or None,
+        tuple(c.upper() for c in castes) if castes else None,
+        scheme["min_age"] if "min_age" in scheme else _NO_MIN_AGE,
+        "scholarship" in scheme["name"].lower() or "student" in str(scheme.get("for_occupation", "")),
+    )
+
+
+def _threshold_masks(pairs):
+    """[(value, mask)] -> (sorted values, suffix OR masks) for `>= value` lookups via bisect."""
+    pairs = sorted(pairs)
+    values = [v for v, _ in pairs]
+    suffix = [0] * (len(pairs) + 1)
+    for i in range(len(pairs) - 1, -1, -1):
+        suffix[i] = suffix[i + 1] | pairs[i][1]
+    return values, suffix
+
+
+class SchemeIndex:
+    def __init__(self, schemes):
+        self.schemes = list(schemes)
+
+        # ---- keyword postings ----
+        postings = {}
+        self.always = Counter()  # empty keyword — `"" in query` hamesha True
+        for idx, scheme in enumerate(self.schemes):
+            for kw in scheme_keywords(scheme):
+                if kw:
+                    postings.setdefault(kw, Counter())[idx] += 1
+                else:
+                    self.always[idx] += 1
+        self.postings = postings
+        self.automaton = KeywordAutomaton(postings)
+
+        # ---- eligibility classes ----
+        classes = {}
+        self.class_of = []
+        for idx, scheme in enumerate(self.schemes):
+            cls = classes.setdefault(_signature(scheme), len(classes))
+            self.class_of.append(cls)
+        self.signatures = list(classes)
+        self.members = [[] for _ in self.signatures]
+        for idx, cls in enumerate(self.class_of):
+            self.members[cls].append(idx)
+
+        self.all_mask = (1 << len(self.signatures)) - 1
+        self.neutral_mask = 0
+        self.no_income_mask = 0
+        self.scholar_mask = 0
+        self.gender_masks = {}
+        self.occupation_masks = {}
+        self.caste_masks = {}
+        income, min_age = {}, {}
+        for cls, (gender, occupations, max_income, castes, age, scholar) in enumerate(self.signatures):
+            bit = 1 << cls
+            if gender:
+                self.gender_masks[gender.lower()] = self.gender_masks.get(gender.lower(), 0) | bit
+            else:
+                self.neutral_mask |= bit
+            for o in occupations or ():
+                self.occupation_masks[o] = self.occupation_masks.get(o, 0) | bit
+            if max_income:
+                income[max_income] = income.get(max_income, 0) | bit
+            else:
+                self.no_income_mask |= bit
+            for c in castes or ():
+                self.caste_masks[c] = self.caste_masks.get(c, 0) | bit
+            if age is not _NO_MIN_AGE:
+                min_age[age] = min_age.get(age, 0) | bit
+            if scholar:
+                self.scholar_mask |= bit
+        self.income_values, self.income_suffix = _threshold_masks(income.items())
+        self.age_values, self.age_suffix = _threshold_masks(min_age.items())
+
+    def __len__(self):
+        return len(self.schemes)
+
+    # ---------- per-query masks ----------
+    def gender_mask(self, gender):
+        g = gender.lower()
+        mask = 0
+        for value, m in self.gender_masks.items():
+            if g in value:
+                mask |= m
+        return mask
+
+    def occupation_mask(self, occupation):
+        occ = occupation.lower()
+        mask = 0
+        for o, m in self.occupation_masks.items():
+            if o in occ:
+                mask |= m
+        return mask
+
+    def query_features(self, query_lower):
+        """
+        Query ke woh hisse jin par result depend karta hai:
+        (present keywords, general trigger?, "student" in query?)
+        """
+        return (
+            frozenset(self.automaton.find(query_lower)),
+            any(t in query_lower for t in GENERAL_TRIGGERS),
+            "student" in query_lower,
+        )
+
+    def cache_key(self, query, age=None, gender=None, occupation=None, income=None, caste=None, education=None):
+        """
+        Normalized key — do queries/profiles ka key same hai to matching
+        result bhi same hoga (e.g. "kisan yojana" aur "Kisan Yojana!").
+        """
+        return (
+            self.query_features(query.lower()),
+            age or None,
+            gender.lower() if gender else None,
+            occupation.lower() if occupation else None,
+            income or None,
+            caste.upper() if caste else None,
+            bool(education),
+        )
+
+    def class_scores(self, features, age, gender, occupation, income, caste, education):
+        """{class_id: profile score} for classes not excluded by age."""
+        _, general, student_query = features
+        alive = self.all_mask
+        if age:
+            alive &= ~self.age_suffix[bisect_right(self.age_values, age)]
+
+        weighted = [(1, self.neutral_mask)]
+        if gender:
+            weighted.append((8, self.gender_mask(gender)))
+        if occupation:
+            weighted.append((8, self.occupation_mask(occupation)))
+        if income:
+            weighted.append((5, self.income_suffix[bisect_left(self.income_values, income)]))
+            weighted.append((1, self.no_income_mask))
+        if caste:
+            weighted.append((10, self.caste_masks.get(caste.upper(), 0)))
+        if education and student_query or (occupation and "student" in occupation.lower()):
+            weighted.append((4, self.scholar_mask))
+        general = 1 if general else 0
+
+        scores = {}
+        cls = 0
+        while alive:
+            if alive & 1:
+                bit = 1 << cls
+                scores[cls] = general + sum(w for w, m in weighted if m & bit)
+            alive >>= 1
+            cls += 1
+        return scores
+
+    def keyword_hits(self, keywords):
+        """{scheme_idx: number of its keywords present in query}"""
+        hits = Counter(self.always)
+        for kw in keywords:
+            hits.update(self.postings[kw])
+        return hits
+
+    def match_indices(self, query, age=None, gender=None, occupation=None, income=None, caste=None, education=None,
+                      limit: int = TOP_N, features=None):
+        """Top matching scheme positions (self.schemes me), best first."""
+        features = features or self.query_features(query.lower())
+        scores = self.class_scores(features, age, gender, occupation, income, caste, education)
+        hits = self.keyword_hits(features[0])
+
+        candidates = []
+        for idx, count in hits.items():
+            base = scores.get(self.class_of[idx])
+            if base is not None:
+                candidates.append((base + 3 * count, idx))
+        for cls, base in scores.items():
+            if base <= 0:
+                continue
+            taken = 0
+            for idx in self.members[cls]:
+                if idx in hits:
+                    continue
+                candidates.append((base, idx))
+                taken += 1
+                if taken >= limit:
+                    break
+
+        candidates = [c for c in candidates if c[0] > 0]
+        candidates.sort(key=lambda c: (-c[0], c[1]))
+        return [idx for _, idx in candidates[:limit]]
+
+    def match(self, query, age=None, gender=None, occupation=None, income=None, caste=None, education=None,
+              limit: int = TOP_N):
+        ids = self.match_indices(query, age, gender, occupation, income, caste, education, limit)
+        return [self.schemes[idx] for idx in ids]
@@ -0,0 +1,118 @@
+"""
+Scheme chat response rendering + cache.
+
+Har scheme ka Markdown block (hindi + english) catalogue load par ek baar
+ban jata hai; response sirf header + matched blocks + footer ka join hai.
+Kiosk queries zyada tar same hoti hain ("kisan yojana", "ghar chahiye"),
+isliye poora response normalized (query features, profile, lang) key par
+LRU cache me rakha jata hai.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+RESPONSE_CACHE_SIZE = int(os.environ.get("SCHEME_RESPONSE_CACHE", 2048))
+LANGS = ("hindi", "english")
+
+NO_MATCH = {
+    "hindi": (
+        "माफ़ करें, आपकी जानकारी के आधार पर कोई योजना नहीं मिली। "
+        "कृपया अपनी स्थिति बताएं जैसे: किसान हैं, छात्र हैं, बेरोजगार हैं, या घर चाहिए। "
+        "मैं सही सरकारी योजना बताऊंगा और कैसे आवेदन करना है, वो भी बताऊंगा।"
+    ),
+    "english": (
+        "I couldn't find matching schemes for your profile. "
+        "Please describe your situation (e.g., 'farmer', 'student', 'need house', 'no job') "
+        "and I'll guide you to the right government scheme and how to apply."
+    ),
+}
+HEADER = {
+    "hindi": "आपके profile के आधार पर **{n} सरकारी योजनाएं** मिली हैं:\n\n",
+    "english": "Based on your profile, I found **{n} government schemes** for you:\n\n",
+}
+FOOTER = {
+    "hindi": "\n---\nक्या आप किसी योजना के बारे में विस्तार से जानना चाहते हैं? बताइए! 😊",
+    "english": "\n---\nWant details about any specific scheme? Just ask! 😊",
+}
+
+
+def render_lang(lang: str) -> str:
+    return "hindi" if lang == "hindi" else "english"
+
+
+def render_fragment(s: dict, lang: str) -> str:
+    if render_lang(lang) == "hindi":
+        return (
+            f"### {s['name']}\n"
+            f"**{s['hindi']}**\n"
+            f"- **लाभ:** {s['amount']}\n"
+            f"- **किसके लिए:** {s['for']}\n"
+            f"- **विवरण:** {s['description']}\n"
+            f"- **आवेदन कहाँ करें:** {s['how_to_apply']}\n"
+            f"- **जरूरी दस्तावेज़:** {', '.join(s['documents'])}\n\n"
+        )
+    return (
+        f"### {s['name']}\n"
+        f"*{s['hindi']}*\n"
+        f"- **Benefit:** {s['amount']}\n"
+        f"- **For:** {s['for']}\n"
+        f"- **Description:** {s['description']}\n"
+        f"- **How to apply:** {s['how_to_apply']}\n"
+        f"- **Documents needed:** {', '.join(s['documents'])}\n\n"
+    )
+
+
+def build_fragments(schemes):
+    """{lang: [fragment per scheme position]}"""
+    return {lang: [render_fragment(s, lang) for s in schemes] for lang in LANGS}
+
+
+def render_response(lang: str, fragments) -> str:
+    lang = render_lang(lang)
+    if not fragments:
+        return NO_MATCH[lang]
+    return HEADER[lang].format(n=len(fragments)) + "".join(fragments) + FOOTER[lang]
+
+
+class ResponseCache:
+    """Thread-safe LRU with hit / miss / eviction counters."""
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,259 @@
+"""
+Background SMS alert dispatch.
+
+`/ai/alerts` sirf alerts queue karta hai; ek worker thread unhe batches me
+gateway ko bhejta hai, same contractor/project ke repeat alerts ek window ke
+andar drop karta hai, aur fail hone par exponential backoff se retry karta hai.
+Har alert ka delivery status `alert_id` se dekha ja sakta hai.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+
+# ----------------------------
+# GATEWAYS
+# ----------------------------
+class ConsoleSMSGateway:
+    """
+    Simulates sending an SMS.
+    In production, this would use Twilio, SNS, or Fast2SMS.
+    """
+
+    def send_batch(self, messages):
+        results = []
+        for phone, message in messages:
+            print(f"--------[SMS ALERT]--------")
+            print(f"To: {phone}")
+            print(f"Message: {message}")
+            print(f"---------------------------")
+            results.append(None)
+        return results
+
+
+class FakeSMSGateway:
+    """
+    Local gateway for tests — bheje gaye messages `sent` me record hote hain.
+    `fail_times` pehli N sends ko fail karta hai (retry check karne ke liye).
+    """
+
+    def __init__(self, fail_times: int = 0):
+        self.fail_times = fail_times
+        self.sent = []
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def send_batch(self, messages):
+        results = []
+        with self._lock:
+            self.batches.append(list(messages))
+            for phone, message in messages:
+                if self.fail_times > 0:
+                    self.fail_times -= 1
+                    results.append("Fake gateway failure")
+                else:
+                    self.sent.append((phone, message))
+                    results.append(None)
+        return results
+
+
+# ----------------------------
+# DISPATCHER
+# ----------------------------
+class AlertDispatcher:
+    """
+    send_batch(messages) -> list of error-or-None, one per message.
+    Status values: queued | sent | retrying | failed | no_phone
+    """
+
+    def __init__(
+        self,
+        gateway,
+        batch_size: int = 20,
+        flush_interval: float = 0.5,
+        dedupe_window: float = 6 * 3600,
+        max_attempts: int = 4,
+        backoff_base: float = 2.0,
+        max_tracked: int = 10000,
+    ):
+        self.gateway = gateway
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dedupe_window = dedupe_window
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.max_tracked = max_tracked
+
+        self._cond = threading.Condition()
+        self._ready = deque()
+        self._retry = []                 # heap of (ready_at, seq, alert_id)
+        self._seq = itertools.count()
+        self._jobs = OrderedDict()       # alert_id -> job dict (status tracking)
+        self._recent = {}                # (contractor_id, project_id) -> (alert_id, enqueued_at)
+        self._in_flight = 0
+        self._thread = None
+        self._stopping = False
+
+    # ---------- public API ----------
+    def enqueue(self, phone, message, contractor_id=None, project_id=None):
+        now = time.monotonic()
+        with self._cond:
+            key = (contractor_id, project_id)
+            recent = self._recent.get(key)
+            if contractor_id is not None and recent and now - recent[1] < self.dedupe_window:
+                job = self._jobs.get(recent[0])
+                if job and job["status"] != "failed":
+                    return {"alert_id": job["id"], "status": job["status"], "deduplicated": True}
+
+            job = {
+                "id": uuid.uuid4().hex[:12],
+                "phone": phone,
+                "message": message,
+                "contractor_id": contractor_id,
+                "project_id": project_id,
+                "status": "queued",
+                "attempts": 0,
+                "last_error": None,
+            }
+            self._track(job)
+
+            if not phone:
+                job["status"] = "no_phone"
+                job["last_error"] = "No phone number linked."
+                return {"alert_id": job["id"], "status": job["status"], "deduplicated": False}
+
+            if contractor_id is not None:
+                self._recent[key] = (job["id"], now)
+            self._ready.append(job["id"])
+            self._ensure_worker()
+            self._cond.notify()
+            return {"alert_id": job["id"], "status": job["status"], "deduplicated": False}
+
+    def status(self, alert_id: str):
+        with self._cond:
+            job = self._jobs.get(alert_id)
+            if not job:
+                return None
+            return {k: v for k, v in job.items() if k != "phone"}
+
+    def stats(self):
+        with self._cond:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return {
+                "queued": len(self._ready),
+                "waiting_retry": len(self._retry),
+                "in_flight": self._in_flight,
+                "by_status": counts,
+            }
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Jab tak ready + in-flight khali na ho, wait karo (tests/shutdown ke liye)."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._ready or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+
+    # ---------- internals ----------
+    def _track(self, job):
+        self._jobs[job["id"]] = job
+        while len(self._jobs) > self.max_tracked:
+            self._jobs.popitem(last=False)
+        cutoff = time.monotonic() - self.dedupe_window
+        if len(self._recent) > self.max_tracked:
+            self._recent = {k: v for k, v in self._recent.items() if v[1] >= cutoff}
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="sms-dispatcher", daemon=True)
+            self._thread.start()
+
+    def _promote_due_retries(self, now):
+        while self._retry and self._retry[0][0] <= now:
+            _, _, alert_id = heapq.heappop(self._retry)
+            self._ready.append(alert_id)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._stopping:
+                now = time.monotonic()
+                self._promote_due_retries(now)
+                if self._ready:
+                    break
+                wait = self._retry[0][0] - now if self._retry else None
+                self._cond.wait(wait)
+            if self._stopping:
+                return None
+
+        # Thoda ruk kar batch bharne do
+        if len(self._ready) < self.batch_size and self.flush_interval:
+            time.sleep(self.flush_interval)
+
+        with self._cond:
+            batch = []
+            while self._ready and len(batch) < self.batch_size:
+                job = self._jobs.get(self._ready.popleft())
+                if job:
+                    batch.append(job)
+            self._in_flight += len(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if not batch:
+                continue
+
+            try:
+                results = self.gateway.send_batch([(j["phone"], j["message"]) for j in batch])
+            except Exception as e:
+                results = [str(e)] * len(batch)
+
+            with self._cond:
+                now = time.monotonic()
+                for job, error in zip(batch, results):
+                    job["attempts"] += 1
+                    if error is None:
+                        job["status"] = "sent"
+                        job["last_error"] = None
+                    elif job["attempts"] < self.max_attempts:
+                        job["status"] = "retrying"
+                        job["last_error"] = str(error)
+                        delay = self.backoff_base * (2 ** (job["attempts"] - 1))
+                        heapq.heappush(self._retry, (now + delay, next(self._seq), job["id"]))
+                    else:
+                        job["status"] = "failed"
+                        job["last_error"] = str(error)
+                        print(f"[SMS] Giving up on alert {job['id']} after {job['attempts']} attempts: {error}")
+                self._in_flight -= len(batch)
+                self._cond.notify_all()
+
+
+def _default_gateway():
+    if os.environ.get("SMS_GATEWAY", "console") == "fake":
+        return FakeSMSGateway()
+    return ConsoleSMSGateway()
+
+
+# Singleton — worker thread pehle enqueue par start hota hai
+alert_dispatcher = AlertDispatcher(_default_gateway())
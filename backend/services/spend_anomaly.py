@@ -0,0 +1,228 @@
+"""
+Statistical spending anomalies over contractor updates.
+
+`ContractorUpdate.amount_spent` ko do time series me dekha jata hai — per
+project aur per contractor. Har series ka state constant size hai:
+Welford running mean / variance (z-score) + last WINDOW amounts (median /
+MAD robust z-score). Updates id order me ek streaming pass me aate hain;
+startup par DB se, phir har naya update `observe` se.
+
+Har update par check:
+  - z-score / robust MAD outlier (series ke pichle amounts ke against)
+  - spend spike: ek hi update budget ka bada hissa, aur cumulative spend
+    project progress se 10% se zyada aage (`/ai/risk` jaisa deviation rule)
+Block peers: har (block, contractor) ka running average update; block ke
+baaki contractors ke median / MAD se bahut door wale contractors flag.
+
+Update-wise progress DB me nahi hai, isliye project ka current
+progress_percent use hota hai.
+"""
+import math
+import os
+import threading
+from collections import deque
+
+from sqlalchemy.orm import Session
+
+WINDOW = 32                  # robust stats ke liye last N amounts per series
+MIN_HISTORY = 4              # itne updates se pehle series par outlier nahi bolte
+Z_THRESHOLD = 3.0
+MAD_THRESHOLD = 3.5          # modified z-score (Iglewicz & Hoaglin)
+SPIKE_SHARE = 0.25           # ek update budget ka >= 25%
+PROGRESS_TOLERANCE = 0.1
+MAX_FLAGGED = int(os.environ.get("SPEND_ANOMALY_MAX_FLAGGED", 5000))
+
+
+def _median(values):
+    values = sorted(values)
+    n = len(values)
+    mid = n // 2
+    return values[mid] if n % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+def robust_z(x, values):
+    """Modified z-score 0.6745 * (x - median) / MAD; MAD 0 ho to None."""
+    if not values:
+        return None
+    med = _median(values)
+    mad = _median([abs(v - med) for v in values])
+    if not mad:
+        return None
+    return 0.6745 * (x - med) / mad
+
+
+class SeriesStats:
+    __slots__ = ("n", "mean", "m2", "total", "window")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.total = 0.0
+        self.window = deque(maxlen=WINDOW)
+
+    def zscores(self, x):
+        """(z, robust z) of x against history so far; kam history par (None, None)."""
+        if self.n < MIN_HISTORY:
+            return None, None
+        std = math.sqrt(self.m2 / (self.n - 1))
+        z = (x - self.mean) / std if std else None
+        return z, robust_z(x, self.window)
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        self.total += x
+        self.window.append(x)
+
+
+class SpendAnomalyDetector:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        self.loaded = False
+
+    def _reset(self):
+        self.projects = {}        # project_id -> SeriesStats
+        self.contractors = {}     # contractor_id -> SeriesStats
+        self.peers = {}           # block_id -> {contractor_id: [count, sum]}
+        self.project_meta = {}    # project_id -> (budget, progress_percent, block_id)
+        self.flagged = deque(maxlen=MAX_FLAGGED)
+        self.seen = 0
+
+    @staticmethod
+    def _meta_query(db: Session):
+        from models import Project, Village
+
+        return (
+            db.query(Project.id, Project.budget, Project.progress_percent, Village.block_id)
+            .outerjoin(Village, Project.village_id == Village.id)
+        )
+
+    def load(self, db: Session):
+        """Saare updates id order me ek pass — memory series count ke hisaab se, update count se nahi."""
+        from models import ContractorUpdate
+
+        with self._lock:
+            self._reset()
+            for pid, budget, progress, block_id in self._meta_query(db):
+                self.project_meta[pid] = (budget or 0, progress or 0, block_id)
+            rows = (
+                db.query(
+                    ContractorUpdate.id, ContractorUpdate.project_id,
+                    ContractorUpdate.contractor_id, ContractorUpdate.amount_spent,
+                )
+                .order_by(ContractorUpdate.id)
+                .yield_per(1000)
+            )
+            for row in rows:
+                self._observe(*row)
+            self.loaded = True
+        print(f"[Spend] Scanned {self.seen} contractor updates, {len(self.flagged)} flagged")
+
+    def observe(self, db: Session, update):
+        """Naya ContractorUpdate; project meta (budget / progress) taza padhte hain."""
+        from models import Project
+
+        meta = self._meta_query(db).filter(Project.id == update.project_id).first()
+        with self._lock:
+            if meta:
+                self.project_meta[meta[0]] = (meta[1] or 0, meta[2] or 0, meta[3])
+            return self._observe(update.id, update.project_id, update.contractor_id, update.amount_spent)
+
+    def _observe(self, update_id, project_id, contractor_id, amount):
+        amount = amount or 0.0
+        budget, progress, block_id = self.project_meta.get(project_id, (0, 0, None))
+        project = self.projects.setdefault(project_id, SeriesStats())
+        contractor = self.contractors.setdefault(contractor_id, SeriesStats())
+
+        reasons = []
+        detail = {}
+        for name, series in (("project", project), ("contractor", contractor)):
+            z, rz = series.zscores(amount)
+            if z is not None and abs(z) >= Z_THRESHOLD:
+                reasons.append(f"{name} z-score {z:.1f}")
+            if rz is not None and abs(rz) >= MAD_THRESHOLD:
+                reasons.append(f"{name} MAD outlier {rz:.1f}")
+            detail[f"{name}_z"] = round(z, 2) if z is not None else None
+            detail[f"{name}_robust_z"] = round(rz, 2) if rz is not None else None
+
+        if budget > 0:
+            spent_ratio = (project.total + amount) / budget
+            if amount / budget >= SPIKE_SHARE and spent_ratio > progress / 100 + PROGRESS_TOLERANCE:
+                reasons.append(f"spike: {amount / budget:.0%} of budget, spent {spent_ratio:.0%} at {progress:.0f}% progress")
+
+        project.add(amount)
+        contractor.add(amount)
+        if block_id is not None:
+            stats = self.peers.setdefault(block_id, {}).setdefault(contractor_id, [0, 0.0])
+            stats[0] += 1
+            stats[1] += amount
+        self.seen += 1
+
+        if not reasons:
+            return None
+        flag = {
+            "update_id": update_id,
+            "project_id": project_id,
+            "contractor_id": contractor_id,
+            "amount_spent": amount,
+            "reasons": reasons,
+            **detail,
+        }
+        self.flagged.append(flag)
+        return flag
+
+    def flagged_updates(self, project_id: int = None, contractor_id: int = None, limit: int = 100):
+        """Newest first."""
+        with self._lock:
+            flags = list(self.flagged)
+        out = []
+        for f in reversed(flags):
+            if project_id and f["project_id"] != project_id:
+                continue
+            if contractor_id and f["contractor_id"] != contractor_id:
+                continue
+            out.append(f)
+            if len(out) >= limit:
+                break
+        return out
+
+    def peer_outliers(self, block_id: int = None):
+        """Block ke contractors jinka average update peers ke median se MAD_THRESHOLD door hai."""
+        with self._lock:
+            blocks = {b: dict(s) for b, s in self.peers.items() if block_id is None or b == block_id}
+        out = []
+        for b, contractors in blocks.items():
+            if len(contractors) < 4:  # 2-3 peers ka median / MAD matlab nahi
+                continue
+            averages = {cid: total / n for cid, (n, total) in contractors.items()}
+            for cid, avg in averages.items():
+                others = [a for c, a in averages.items() if c != cid]
+                rz = robust_z(avg, others)
+                if rz is not None and abs(rz) >= MAD_THRESHOLD:
+                    out.append({
+                        "block_id": b,
+                        "contractor_id": cid,
+                        "avg_update": round(avg, 2),
+                        "peer_median": round(_median(others), 2),
+                        "robust_z": round(rz, 2),
+                        "updates": contractors[cid][0],
+                    })
+        out.sort(key=lambda r: -abs(r["robust_z"]))
+        return out
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": self.loaded,
+                "updates_seen": self.seen,
+                "project_series": len(self.projects),
+                "contractor_series": len(self.contractors),
+                "flagged": len(self.flagged),
+            }
+
+
+spend_detector = SpendAnomalyDetector()
@@ -0,0 +1,37 @@
+import os
+import sys
+import tempfile
+
+# Tests kabhi asli panchayat.db ko nahi chhoote — imports se pehle temp DB
+_TMP = tempfile.mkdtemp(prefix="panchayat-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_TMP, 'test.db')}")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture()
+def db():
+    """Khali schema + ek chhota location tree (1 state / district / block, 2 villages)."""
+    from database import Base, engine, SessionLocal
+    from models import State, District, Block, Village
+    from services.location_tree import location_cache
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    session.add_all([
+        State(id=1, name="Uttar Pradesh"),
+        District(id=1, name="Lucknow", state_id=1),
+        Block(id=1, name="Aliganj", district_id=1),
+        Village(id=1, name="Village A", block_id=1),
+        Village(id=2, name="Village B", block_id=1),
+    ])
+    session.commit()
+    location_cache.load(session)
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from database import SessionLocal
+from models import Project, ProjectSyncState
+from services.algorand_service import AlgorandService
+from services.algorand_sync import AlgorandSyncWorker, project_payload
+
+algosdk = pytest.importorskip("algosdk")
+from services.fake_algod import FakeAlgodClient  # noqa: E402
+
+
+@pytest.fixture()
+def chain():
+    from algosdk import account, mnemonic
+
+    sk, _ = account.generate_account()
+    client = FakeAlgodClient()
+    return AlgorandService(client=client, deployer_mnemonic=mnemonic.from_private_key(sk), app_id=1)
+
+
+@pytest.fixture()
+def worker(chain):
+    w = AlgorandSyncWorker(service=chain, session_factory=SessionLocal, flush_interval=0, backoff_base=60)
+    yield w
+    w.stop()
+
+
+def _projects(db, *ids):
+    db.add_all(Project(id=i, name=f"Work {i}", village_id=1, budget=100 * i, spent=i, status="ongoing") for i in ids)
+    db.commit()
+
+
+def _states(db):
+    db.expire_all()
+    return {s.project_id: s for s in db.query(ProjectSyncState)}
+
+
+def test_legacy_registered_project_is_sent_as_update(db, chain, worker):
+    _projects(db, 1, 2)
+    # Project 1 purane inline sync se chain par hai, sync state nahi
+    chain.client.boxes[(1).to_bytes(8, "big")] = (100).to_bytes(8, "big") + bytes(40)
+
+    worker._sync_batch([1, 2])
+
+    assert len(chain.client.groups) == 1 and len(chain.client.groups[0]) == 2
+    states = _states(db)
+    assert all(s.status == "synced" and s.is_registered for s in states.values())
+    on_chain = chain.get_on_chain_data(1)
+    assert on_chain["spent"] == 1
+    assert on_chain["hash"] == states[1].last_hash == chain.generate_project_hash(
+        project_payload(db.get(Project, 1), False)).hex()
+
+
+def test_failed_group_is_retried_solo_with_backoff(db, chain, worker):
+    _projects(db, 1, 2)
+    chain.client.fail_times = 1
+
+    worker._sync_batch([1, 2])
+    states = _states(db)
+    assert {s.status for s in states.values()} == {"failed"} and states[1].attempts == 1
+    assert worker._solo == {1, 2}
+    assert sorted(pid for _, _, pid in worker._retry) == [1, 2]
+    assert min(due for due, _, _ in worker._retry) > time.monotonic() + 50   # backoff_base 60
+
+    params_calls = chain.client.params_calls
+    worker._sync_batch([1])
+    worker._sync_batch([2])
+    assert chain.client.params_calls == params_calls + 1   # fail ke baad params dobara liye
+    assert [len(g) for g in chain.client.groups] == [1, 1]
+    assert {s.status for s in _states(db).values()} == {"synced"} and not worker._solo
+
+
+def test_large_batch_goes_out_in_atomic_groups(db, chain, worker):
+    ids = list(range(1, 21))
+    _projects(db, *ids)
+    worker.enqueue_many(ids)
+    assert worker.flush()
+    assert sorted(len(g) for g in chain.client.groups) == [4, 16]
+    assert len(chain.client.boxes) == 20
+
+
+def test_box_lookup_error_fails_instead_of_registering(db, chain, worker, monkeypatch):
+    _projects(db, 1)
+
+    def down(app_id, box):
+        raise Exception("connection reset by peer")
+
+    monkeypatch.setattr(chain.client, "application_box_by_name", down)
+    worker._sync_batch([1])
+    state = _states(db)[1]
+    assert (state.status, state.is_registered, state.last_error) == ("failed", 0, "could not check on-chain box")
+    assert chain.client.groups == []
@@ -0,0 +1,69 @@
+import threading
+from datetime import date
+
+from ai.anomaly import AnomalyEngine
+from database import SessionLocal
+from models import Project, Feedback, ProjectAnomalyState
+
+
+def _setup(db):
+    db.add(Project(id=1, name="Road", village_id=1, budget=100, spent=10, status="ongoing"))
+    db.add_all(Feedback(project_id=1, rating=1, comment="kharab") for _ in range(2))
+    db.commit()
+
+
+def test_stale_cursor_run_is_skipped(db, monkeypatch):
+    _setup(db)
+    engine = AnomalyEngine()
+    engine.run(db)
+    db.add(Feedback(project_id=1, rating=1, comment="phir kharab"))
+    db.commit()
+
+    # Doosre process ka run jo cursor 0 par padh chuka tha — range claim nahi kar paata
+    monkeypatch.setattr(engine, "_cursors", lambda _db: {"feedbacks": 0, "contractor_updates": 0})
+    assert engine.run(db)["skipped"] is True
+    assert db.get(ProjectAnomalyState, 1).negative_feedback == 2
+
+    monkeypatch.undo()
+    engine.run(db)
+    db.expire_all()
+    assert db.get(ProjectAnomalyState, 1).negative_feedback == 3
+
+
+def test_concurrent_runs_apply_each_delta_once(db):
+    _setup(db)
+    engine = AnomalyEngine()
+    engine.run(db)
+    db.add_all(Feedback(project_id=1, rating=2, comment="late") for _ in range(3))
+    db.commit()
+
+    def worker():
+        session = SessionLocal()
+        try:
+            engine.run(session)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    db.expire_all()
+    assert db.get(ProjectAnomalyState, 1).negative_feedback == 5
+
+
+def test_passing_planned_end_flags_delayed_without_writes(db):
+    # start 2025 + 14 mahine -> planned end 2026-03-01
+    db.add(Project(id=1, name="Road", village_id=1, budget=100, spent=10, status="ongoing",
+                   start_year=2025, duration_months=14))
+    db.commit()
+    engine = AnomalyEngine()
+    engine.run(db, today=date(2026, 2, 1))
+    assert "Delayed" not in (db.get(ProjectAnomalyState, 1).flags or "")
+
+    # Koi naya feedback / update / edit nahi — sirf ghadi aage
+    assert engine.run(db, today=date(2026, 2, 1))["recomputed"] == 0
+    engine.run(db, today=date(2026, 3, 5))
+    db.expire_all()
+    assert "Delayed" in db.get(ProjectAnomalyState, 1).flags
@@ -0,0 +1,14 @@
+import pytest
+
+from async_database import async_url, make_async_engine
+
+
+def test_async_url_follows_database_url():
+    assert async_url("sqlite:///./panchayat.db").drivername == "sqlite+aiosqlite"
+    assert async_url("postgresql://u:p@db/panchayat").drivername == "postgresql+asyncpg"
+
+
+@pytest.mark.parametrize("url", ["sqlite://", "sqlite:///:memory:", "sqlite+aiosqlite://"])
+def test_in_memory_sqlite_is_refused(url):
+    with pytest.raises(RuntimeError, match="In-memory SQLite"):
+        make_async_engine(async_url(url))
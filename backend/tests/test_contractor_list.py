@@ -0,0 +1,29 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from models import Contractor
+from routers import contractor
+
+app = FastAPI()
+app.include_router(contractor.router)
+client = TestClient(app)
+
+
+def test_list_is_bounded_and_pages_with_cursor(db):
+    db.add_all(Contractor(id=i, name=f"C{i}", performance=i % 3) for i in range(1, 8))
+    db.commit()
+
+    seen, after = [], None
+    while True:
+        params = {"limit": 3, "sort": "performance"}
+        if after:
+            params["after"] = after
+        res = client.get("/contractors/list", params=params)
+        assert res.status_code == 200 and len(res.json()) <= 3
+        seen += [c["id"] for c in res.json()]
+        after = res.headers.get("X-Next-Cursor")
+        if not after:
+            break
+    assert seen == [2, 5, 1, 4, 7, 3, 6]
+    assert all("pin" not in c for c in client.get("/contractors/list").json())
+    assert client.get("/contractors/list", params={"after": "bad"}).status_code == 400
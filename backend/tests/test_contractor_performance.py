@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+from models import Contractor, ContractorUpdate, Project
+from services.contractor_performance import _on_time
+
+NOW = datetime(2026, 6, 1)
+
+
+def _project(db, status, *days_ago):
+    db.add(Contractor(id=1, name="Ramesh"))
+    db.add(Project(id=1, name="Road", village_id=1, budget=100, contractor_id=1, status=status))
+    db.add_all(
+        ContractorUpdate(project_id=1, contractor_id=1, amount_spent=1, submitted_at=NOW - timedelta(days=d))
+        for d in days_ago
+    )
+    db.commit()
+
+
+def test_silent_open_project_counts_a_late_gap(db):
+    _project(db, "ongoing", 70, 60)
+    assert _on_time(db, [1], NOW) == {1: (2, 1, 2)}
+
+
+def test_recent_update_leaves_gap_open(db):
+    _project(db, "ongoing", 30, 20)
+    assert _on_time(db, [1], NOW) == {1: (2, 1, 1)}
+
+
+def test_completed_project_has_no_open_gap(db):
+    _project(db, "completed", 70, 60)
+    assert _on_time(db, [1], NOW) == {1: (2, 1, 1)}
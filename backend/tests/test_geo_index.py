@@ -0,0 +1,43 @@
+from models import Village
+from services.geo_index import GeoService
+from services.location_tree import bump_version
+
+
+def test_village_centres_follow_locations_version(db):
+    db.get(Village, 1).latitude, db.get(Village, 1).longitude = 26.85, 80.95
+    db.commit()
+    geo = GeoService(check_interval=0)
+    geo.ensure_loaded(db)
+    assert geo.geofence(1, 26.85, 80.95)["inside"]
+
+    # Doosre process (seed script / admin API) ka write — is process ka invalidate() nahi chala
+    village = db.get(Village, 1)
+    village.latitude, village.longitude = 25.32, 82.97
+    db.commit()
+    geo.ensure_loaded(db)
+    assert geo.geofence(1, 26.85, 80.95)["inside"]   # version nahi badla to purana centre
+
+    bump_version(db)
+    geo.ensure_loaded(db)
+    assert not geo.geofence(1, 26.85, 80.95)["inside"]
+    assert geo.geofence(1, 25.32, 82.97)["inside"]
+
+
+def test_feedback_from_other_processes_reaches_clusters(db):
+    from models import Feedback, Project
+
+    db.add(Project(id=1, name="Road", village_id=1, budget=100))
+    db.add(Feedback(id=1, project_id=1, rating=4, latitude=26.85, longitude=80.95))
+    db.commit()
+    geo = GeoService(check_interval=0)
+    geo.ensure_loaded(db)
+    assert geo.feedback_clusters(26.85, 80.95, 1)[0]["count"] == 1
+
+    # Isi process ka add + doosre worker ka seedha DB write
+    db.add(Feedback(id=2, project_id=1, rating=1, latitude=26.8501, longitude=80.9501))
+    db.add(Feedback(id=3, project_id=1, rating=2, latitude=26.8502, longitude=80.9502))
+    db.commit()
+    geo.add_feedback(2, 26.8501, 80.9501, 1, 0, 1)
+    geo.ensure_loaded(db)
+    clusters = geo.feedback_clusters(26.85, 80.95, 1)
+    assert sorted(clusters[0]["feedback_ids"]) == [1, 2, 3]
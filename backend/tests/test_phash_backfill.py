@@ -0,0 +1,81 @@
+from PIL import Image
+
+from models import Contractor, ContractorUpdate, Feedback, Project
+from services.phash_index import PhashIndex, backfill_hashes, dhash_file
+
+
+def _photo(path, shade):
+    img = Image.new("RGB", (64, 48))
+    img.putdata([(((x * shade) ^ (y * 37)) % 256, (x * y) % 256, 90) for y in range(48) for x in range(64)])
+    img.save(path)
+
+
+def test_load_fills_hashes_of_old_photos(db, tmp_path, monkeypatch):
+    _photo(tmp_path / "old.jpg", 3)
+    _photo(tmp_path / "work_1_1_site.jpg", 5)
+    db.add(Contractor(id=1, name="Ramesh"))
+    db.add(Project(id=1, name="Road", village_id=1, budget=100, contractor_id=1))
+    db.add_all([
+        Feedback(id=1, project_id=1, rating=2, image_path="old.jpg"),          # migration 003 se pehle
+        Feedback(id=2, project_id=1, rating=4, image_path="gone.jpg"),         # file delete ho chuki
+        ContractorUpdate(id=1, project_id=1, contractor_id=1, work_image_path="work_1_1_site.jpg"),
+    ])
+    db.commit()
+
+    monkeypatch.setattr("services.phash_index.UPLOAD_DIR", str(tmp_path))
+    index = PhashIndex()
+    index.load(db)
+
+    db.expire_all()
+    old_hash = db.get(Feedback, 1).phash
+    assert old_hash == dhash_file(str(tmp_path / "old.jpg"))
+    assert db.get(Feedback, 2).phash is None
+    assert db.get(ContractorUpdate, 1).work_phash == dhash_file(str(tmp_path / "work_1_1_site.jpg"))
+    assert index.find_near(old_hash)[0] == (0, ("feedback", 1))
+    assert len(index) == 2
+    assert backfill_hashes(db, str(tmp_path)) == 0   # dobara chalane par kuch nahi
+
+
+def test_upload_hash_matches_backfill_of_saved_file(tmp_path):
+    from services.image_pipeline import process_image
+
+    path = tmp_path / "fb.png"
+    _photo(path, 3)
+    result = process_image(str(path), 26.85, 80.95, check_fake=False)
+    assert result["phash"] == dhash_file(str(path))   # overlay ke baad wali file
+
+
+def test_flat_images_never_match(tmp_path):
+    Image.new("RGB", (64, 48), (120, 120, 120)).save(tmp_path / "flat.png")
+    flat = dhash_file(str(tmp_path / "flat.png"))
+    index = PhashIndex()
+    index.add("feedback", 1, flat)
+    assert len(index) == 0 and index.find_near(flat) == []
+
+
+def test_reused_work_photo_is_flagged(db, tmp_path, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from routers import contractor
+    from services.phash_index import MultiIndexHash, phash_index
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "uploads").mkdir()
+    monkeypatch.setattr(phash_index, "_table", MultiIndexHash())
+    _photo(tmp_path / "site.png", 5)
+    db.add(Contractor(id=1, name="Ramesh"))
+    db.add(Project(id=1, name="Road", village_id=1, budget=100, spent=0, contractor_id=1))
+    db.commit()
+
+    app = FastAPI()
+    app.include_router(contractor.router)
+    client = TestClient(app)
+
+    def submit(name):
+        with open(tmp_path / "site.png", "rb") as f:
+            return client.post("/contractors/update", data={"project_id": 1, "contractor_id": 1, "amount_spent": 5},
+                               files={"work_image": (name, f, "image/png")}).json()
+
+    first, second = submit("day1.png"), submit("day9.png")
+    assert first["work_flag_reason"] is None
+    assert second["work_flag_reason"].startswith(f"Near-Duplicate Photo Detected (matches contractor work photo #{first['id']}")
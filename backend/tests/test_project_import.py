@@ -0,0 +1,45 @@
+import io
+
+import pytest
+
+from models import Project, ProjectSyncState
+from services import rollup_service
+from services.project_import import import_projects, read_rows
+
+
+def _csv(n_rows, tail=b""):
+    lines = [b"name,village,budget"] + [f"Work {i},village {'ab'[i % 2]},1000".encode() for i in range(n_rows)]
+    return io.BytesIO(b"\n".join(lines) + b"\n" + tail)
+
+
+def test_import_inserts_rows_and_refreshes_rollups(db):
+    report = import_projects(db, read_rows(_csv(3, b"Bad,Nowhere,1\n"), "list.csv"), schedule_sync=False)
+    assert (report["inserted"], report["failed"]) == (3, 1)
+    assert report["errors"][0]["row"] == 5
+    assert rollup_service.get_rollup(db, "block", 1)["total_projects"] == 3
+    assert db.query(ProjectSyncState).filter(ProjectSyncState.status == "pending").count() == 3
+
+
+def test_dry_run_reports_valid_rows_without_inserting(db):
+    report = import_projects(db, read_rows(_csv(3, b"Bad,Nowhere,1\n"), "list.csv"), dry_run=True)
+    assert (report["valid"], report["inserted"], report["failed"]) == (3, 0, 1)
+    assert "first_id" not in report
+    assert db.query(Project).count() == 0
+    assert db.query(ProjectSyncState).count() == 0
+
+
+def test_reader_error_keeps_committed_chunks_consistent(db):
+    report = import_projects(
+        db, read_rows(_csv(700, b"Broken,\xff\xfe,1\n"), "list.csv"), chunk_size=500, schedule_sync=False,
+    )
+    assert report["inserted"] == 700
+    assert report["reader_error"]["row"] == 702
+    assert db.query(Project).count() == 700
+    assert rollup_service.get_rollup(db, "all", 0)["total_projects"] == 700
+    assert db.query(ProjectSyncState).count() == 700
+
+
+def test_unreadable_file_raises(db):
+    with pytest.raises(ValueError):
+        import_projects(db, read_rows(io.BytesIO(b"\xff\xfe\x00bad"), "list.csv"), schedule_sync=False)
+    assert db.query(Project).count() == 0
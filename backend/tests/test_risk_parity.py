@@ -0,0 +1,75 @@
+import random
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from ai.anomaly import compute_risk_score, spend_velocity
+from models import Project, ProjectAnomalyState
+from services.risk_engine import feedback_component
+
+
+def _random_project(rng):
+    budget = rng.choice([0, 100000, 500000, 2000000])
+    project = Project(
+        budget=budget,
+        spent=rng.choice([0, budget * rng.random(), budget * (1 + rng.random()), None]),
+        status=rng.choice(["ongoing", "completed", "Completed", "delayed", None]),
+        start_year=rng.choice([None, 0, 2022, 2023, 2024, 2025, 2026]),
+        duration_months=rng.choice([None, 0, 6, 11, 12, 21, 36]),
+    )
+    n_updates = rng.choice([0, 0, 1, 3, 10])
+    first = last = None
+    if n_updates:
+        first = datetime(2022, 1, 1) + timedelta(days=rng.randint(0, 1500))
+        last = first + timedelta(days=rng.randint(0, 400))
+        if rng.random() < 0.1:
+            first = last = None   # submitted_at bina purane updates
+    state = ProjectAnomalyState(
+        update_count=n_updates,
+        update_spent=rng.random() * (project.budget or 100000) if n_updates else 0,
+        first_update_at=first,
+        last_update_at=last,
+    )
+    return project, rng.choice([0, 0, 1, 2, 3, 7]), state
+
+
+def _dates(values):
+    return np.array([v.date() if v is not None else None for v in values], dtype="datetime64[D]")
+
+
+def test_feedback_component_matches_compute_risk_score():
+    rng = random.Random(16)
+    for today in (date(2026, 10, 18), date(2024, 3, 1), date(2027, 1, 1)):
+        cases = [_random_project(rng) for _ in range(2000)]
+        projects, negative, states = zip(*cases)
+
+        expected = [
+            compute_risk_score(
+                p, n, today=today,
+                actual_end_date=s.last_update_at.date() if s.last_update_at else None,
+                spend_velocity=spend_velocity(p, s),
+            )
+            for p, n, s in cases
+        ]
+        got = feedback_component(
+            [p.budget or 0 for p in projects],
+            [p.spent or 0 for p in projects],
+            [p.status for p in projects],
+            [np.nan if p.start_year is None else p.start_year for p in projects],
+            [np.nan if p.duration_months is None else p.duration_months for p in projects],
+            np.array(negative),
+            np.array([s.update_count for s in states]),
+            np.array([s.update_spent for s in states], dtype=float),
+            _dates([s.first_update_at for s in states]),
+            _dates([s.last_update_at for s in states]),
+            today,
+        )
+        assert list(got) == expected
+
+
+def test_start_2025_duration_21_is_delayed_in_oct_2026():
+    project = Project(budget=100, spent=50, status="ongoing", start_year=2025, duration_months=21)
+    expected = compute_risk_score(project, 0, today=date(2026, 10, 18))
+    got = feedback_component([100], [50], ["ongoing"], [2025], [21], np.array([0]), np.array([0]),
+                             np.array([0.0]), _dates([None]), _dates([None]), date(2026, 10, 18))
+    assert expected == got[0] == 0.3
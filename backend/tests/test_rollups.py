@@ -0,0 +1,54 @@
+from crud import create_project, update_project, delete_project
+from models import Block, LocationRollup, Village
+from schemas import ProjectCreate
+from services import rollup_service
+
+
+def _rollups(db):
+    db.expire_all()
+    return {(r.level, r.location_id): (r.total_projects, r.total_budget) for r in db.query(LocationRollup)}
+
+
+def _rebuilt(db):
+    rollup_service.rebuild_rollups(db)
+    return _rollups(db)
+
+
+def test_incremental_refresh_matches_rebuild(db):
+    db.add_all([Block(id=2, name="Chinhat", district_id=1), Village(id=3, name="Village C", block_id=2)])
+    db.commit()
+    rollup_service.rebuild_rollups(db)
+
+    a = create_project(db, ProjectCreate(village_id=1, name="A", budget=100))
+    create_project(db, ProjectCreate(village_id=2, name="B", budget=50))
+    c = create_project(db, ProjectCreate(village_id=3, name="C", budget=25))
+    update_project(db, a.id, {"village_id": 3, "budget": 70})
+    delete_project(db, c.id)
+
+    incremental = _rollups(db)
+    assert incremental[("all", 0)] == (2, 120)
+    assert incremental[("block", 1)] == (1, 50)
+    rebuilt = _rebuilt(db)
+    for key in set(incremental) | set(rebuilt):   # khali village ka row 0 par rehta hai, rebuild me nahi
+        assert incremental.get(key, (0, 0)) == rebuilt.get(key, (0, 0)), key
+
+
+def test_refresh_runs_inside_caller_transaction(db):
+    rollup_service.rebuild_rollups(db)
+    from models import Project
+    db.add(Project(name="X", village_id=1, budget=10))
+    rollup_service.refresh_villages(db, [1])
+    db.rollback()   # caller ne rollback kiya — rollups bhi wapas
+    assert _rollups(db)[("all", 0)] == (0, 0)
+
+
+def test_ancestor_rows_are_locked_in_fixed_order():
+    from sqlalchemy.dialects import postgresql
+    from services.rollup_service import _lock_statements
+
+    keys = {("village", 7), ("block", 3), ("all", 0), ("district", 2), ("state", 1), ("block", 1)}
+    sql = [str(s.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+           for s in _lock_statements(keys)]
+    assert [s.split("level = '")[1].split("'")[0] for s in sql] == ["all", "state", "district", "block", "village"]
+    assert all(s.rstrip().endswith("FOR UPDATE") for s in sql)
+    assert "IN (1, 3)" in sql[3]
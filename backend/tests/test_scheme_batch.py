@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import schemes
+from services.scheme_catalogue import scheme_catalogue
+
+app = FastAPI()
+app.include_router(schemes.router)
+client = TestClient(app)
+
+PROFILES = [
+    {"id": "a", "age": 25, "gender": "female", "occupation": "farmer", "income": 5000, "caste": "sc"},
+    {"id": "b", "age": 70, "gender": "male", "occupation": "labour", "income": 2000},
+    {"id": "c", "age": 19, "gender": "female", "education": "student"},
+]
+
+
+def _expected(profile):
+    matched = scheme_catalogue.current().match(
+        "", age=profile.get("age"), gender=profile.get("gender"), occupation=profile.get("occupation"),
+        income=profile.get("income"), caste=profile.get("caste"), education=profile.get("education"),
+    )
+    return [s["name"] for s in matched]
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line.strip()]
+
+
+def test_batch_csv():
+    fields = ["id", "age", "gender", "occupation", "income", "caste", "education"]
+    body = ",".join(fields) + "\r\n" + "".join(
+        ",".join(str(p.get(f, "")) for f in fields) + "\r\n" for p in PROFILES
+    )
+    response = client.post("/ai/schemes/batch", content=body.encode(), headers={"content-type": "text/csv"})
+    assert response.status_code == 200
+    results = _lines(response)
+    assert [r["row"] for r in results] == [0, 1, 2]
+    for result, profile in zip(results, PROFILES):
+        assert result["id"] == profile["id"]
+        assert result["scheme_names"] == _expected(profile)
+
+
+def test_batch_ndjson():
+    body = "\n".join(json.dumps(p) for p in PROFILES) + "\nnot json\n"
+    response = client.post(
+        "/ai/schemes/batch", content=body.encode(), headers={"content-type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    results = _lines(response)
+    assert len(results) == 4
+    for result, profile in zip(results, PROFILES):
+        assert result["scheme_names"] == _expected(profile)
+    assert "error" in results[3]
+
+
+def test_batch_completes_on_asgi_spec_2_3():
+    """uvicorn spec_version 2.3 bhejta hai — body response se pehle padhna zaroori hai."""
+    body = ("\n".join(json.dumps(p) for p in PROFILES) + "\n").encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/ai/schemes/batch", "raw_path": b"/ai/schemes/batch",
+        "query_string": b"", "root_path": "", "server": ("test", 80), "client": ("test", 1),
+        "headers": [(b"content-type", b"application/x-ndjson"), (b"content-length", str(len(body)).encode())],
+    }
+
+    async def call():
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+        done = asyncio.Event()
+        sent = []
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                done.set()
+
+        await asyncio.wait_for(app(scope, receive, send), timeout=10)
+        return b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+
+    lines = asyncio.run(call()).decode().splitlines()
+    assert len(lines) == len(PROFILES)
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+from services.sms_service import AlertDispatcher, FakeSMSGateway
+
+
+class TimedGateway(FakeSMSGateway):
+    """FakeSMSGateway + har batch ka bhejne ka samay."""
+
+    def __init__(self, fail_times=0):
+        super().__init__(fail_times)
+        self.times = []
+
+    def send_batch(self, messages):
+        self.times.append(time.monotonic())
+        return super().send_batch(messages)
+
+
+@pytest.fixture()
+def make_dispatcher():
+    made = []
+
+    def make(gateway, **kwargs):
+        kwargs.setdefault("flush_interval", 0.05)
+        dispatcher = AlertDispatcher(gateway, **kwargs)
+        made.append(dispatcher)
+        return dispatcher
+
+    yield make
+    for dispatcher in made:
+        dispatcher.stop()
+
+
+def _wait_for(dispatcher, alert_id, status, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if dispatcher.status(alert_id)["status"] == status:
+            return dispatcher.status(alert_id)
+        time.sleep(0.01)
+    raise AssertionError(f"{alert_id} never reached {status}: {dispatcher.status(alert_id)}")
+
+
+def test_duplicates_inside_window_are_dropped(make_dispatcher):
+    gateway = FakeSMSGateway()
+    dispatcher = make_dispatcher(gateway)
+    first = dispatcher.enqueue("9000000001", "Project 7 stale", contractor_id=1, project_id=7)
+    again = dispatcher.enqueue("9000000001", "Project 7 stale", contractor_id=1, project_id=7)
+    other = dispatcher.enqueue("9000000001", "Project 8 stale", contractor_id=1, project_id=8)
+
+    assert again == {"alert_id": first["alert_id"], "status": "queued", "deduplicated": True}
+    assert not other["deduplicated"]
+    assert dispatcher.flush()
+    assert [m for _, m in gateway.sent] == ["Project 7 stale", "Project 8 stale"]
+
+
+def test_duplicate_after_window_is_sent_again(make_dispatcher):
+    gateway = FakeSMSGateway()
+    dispatcher = make_dispatcher(gateway, dedupe_window=0.05)
+    dispatcher.enqueue("9000000001", "stale", contractor_id=1, project_id=7)
+    time.sleep(0.1)
+    assert not dispatcher.enqueue("9000000001", "stale", contractor_id=1, project_id=7)["deduplicated"]
+    assert dispatcher.flush()
+    assert len(gateway.sent) == 2
+
+
+def test_queued_alerts_go_out_in_batches(make_dispatcher):
+    gateway = FakeSMSGateway()
+    dispatcher = make_dispatcher(gateway, batch_size=4, flush_interval=0.2)
+    ids = [dispatcher.enqueue(f"90000000{i:02d}", f"alert {i}", contractor_id=i)["alert_id"] for i in range(10)]
+    assert dispatcher.flush()
+
+    assert [len(b) for b in gateway.batches] == [4, 4, 2]
+    assert all(dispatcher.status(i)["status"] == "sent" for i in ids)
+
+
+def test_failures_retry_with_exponential_backoff(make_dispatcher):
+    gateway = TimedGateway(fail_times=2)
+    dispatcher = make_dispatcher(gateway, backoff_base=0.1, flush_interval=0)
+    alert = dispatcher.enqueue("9000000001", "stale", contractor_id=1, project_id=7)
+
+    job = _wait_for(dispatcher, alert["alert_id"], "sent")
+    assert job["attempts"] == 3 and job["last_error"] is None
+    gaps = [b - a for a, b in zip(gateway.times, gateway.times[1:])]
+    assert gaps[0] >= 0.1 and gaps[1] >= 0.2   # base, phir 2x
+
+
+def test_gives_up_after_max_attempts(make_dispatcher):
+    gateway = FakeSMSGateway(fail_times=10)
+    dispatcher = make_dispatcher(gateway, backoff_base=0.01, max_attempts=3, flush_interval=0)
+    alert = dispatcher.enqueue("9000000001", "stale", contractor_id=1, project_id=7)
+
+    job = _wait_for(dispatcher, alert["alert_id"], "failed")
+    assert job["attempts"] == 3 and job["last_error"] == "Fake gateway failure"
+    # Failed alert dedupe nahi karta — agla alert naya job hai
+    assert not dispatcher.enqueue("9000000001", "stale", contractor_id=1, project_id=7)["deduplicated"]
+
+
+def test_alert_without_phone_is_not_sent(make_dispatcher):
+    gateway = FakeSMSGateway()
+    dispatcher = make_dispatcher(gateway)
+    assert dispatcher.enqueue(None, "stale", contractor_id=1)["status"] == "no_phone"
+    assert dispatcher.flush() and gateway.batches == []
@@ -0,0 +1,32 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from models import Project, ProjectSyncState
+from routers import projects
+from services.algorand_service import algo_service
+from services.algorand_sync import project_payload
+
+app = FastAPI()
+app.include_router(projects.router)
+client = TestClient(app)
+
+
+def test_db_edit_after_sync_is_a_mismatch(db, monkeypatch):
+    project = Project(id=1, name="Road", village_id=1, budget=100, spent=10, status="ongoing")
+    db.add(project)
+    db.commit()
+    synced = algo_service.generate_project_hash(project_payload(project, False)).hex()
+    db.add(ProjectSyncState(project_id=1, status="synced", is_registered=1, last_hash=synced, last_txid="tx"))
+    db.commit()
+    monkeypatch.setattr(algo_service, "get_verified_data",
+                        lambda pid, txid=None: {"budget": 100, "spent": 10, "hash": synced, "verified": True})
+
+    body = client.get("/projects/verify/bulk", params={"village_id": 1}).json()
+    assert body["verified"] == 1 and body["projects"][0]["db"]["hash"] == synced
+
+    project.status = "completed"   # sync ke baad DB edit
+    db.commit()
+    body = client.get("/projects/verify/bulk", params={"village_id": 1}).json()
+    item = body["projects"][0]
+    assert body["mismatch"] == 1 and item["checks"]["hash"] is False
+    assert item["db"]["hash"] != synced and item["last_synced_hash"] == synced